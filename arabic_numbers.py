@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Lesson numbers of Arabic captions, read with a trie of number words.
+
+extract_lesson_number() used to know the ordinals up to العاشر and tried
+each one with `in text`, so 'الدرس الثاني عشر' came out as lesson 2 and
+'الدرس السادس والأربعون' as lesson 6, and the result was a string that
+every sort turned back into a number. Here the number words are compiled
+once into a trie keyed on normalize_arabic() words (so الأولى/الاولى and
+الحادية عشرة/الحاديه عشره are the same path):
+
+- ordinals 1-10, masculine and feminine (الأول ... العاشر, الأولى ...)
+- teens (الحادي عشر, الثانية عشرة, ...), tens (العشرون ... التسعون) and
+  unit-and-tens compounds (الخامس والعشرون, الواحد والخمسون)
+- the same past a hundred (الحادي بعد المائة), and المائة itself
+- cardinals (واحد ... عشرة, أحد عشر, اثنا عشر, عشرون, ثلاثة وعشرون, ...)
+
+find_serial() looks for a lesson marker (الدرس, الحلقة, المجلس, اللقاء,
+المحاضرة), skips 'رقم' and punctuation after it and reads the longest
+number there: digits (Arabic-Indic or ASCII, optionally in braces, as in
+'المجلس {12}') or number words walked through the trie. A bare '{12}'
+anywhere in the caption is the fallback. The parse stage stores the
+result as an int column, so sorting and gap analysis never re-read the
+caption.
+
+Usage:
+    python arabic_numbers.py 'الدرس الخامس والعشرون' 'المجلس {12}' 'الحلقة ٣'
+"""
+
+import re
+import sys
+
+from arabic_text import normalize_arabic
+
+# Key of a trie node's value (words are never empty)
+_VALUE = ''
+
+MARKERS = ['الدرس', 'الحلقة', 'المجلس', 'اللقاء', 'المحاضرة']
+
+# Unit words: (alone, in compounds), each a list of masculine/feminine
+# spellings in normalized form
+ORDINAL_UNITS = [
+    (['الاول', 'الاولي'], ['الحادي', 'الحاديه', 'الواحد', 'الواحده']),
+    (['الثاني', 'الثانيه'], ['الثاني', 'الثانيه']),
+    (['الثالث', 'الثالثه'], ['الثالث', 'الثالثه']),
+    (['الرابع', 'الرابعه'], ['الرابع', 'الرابعه']),
+    (['الخامس', 'الخامسه'], ['الخامس', 'الخامسه']),
+    (['السادس', 'السادسه'], ['السادس', 'السادسه']),
+    (['السابع', 'السابعه'], ['السابع', 'السابعه']),
+    (['الثامن', 'الثامنه'], ['الثامن', 'الثامنه']),
+    (['التاسع', 'التاسعه'], ['التاسع', 'التاسعه']),
+]
+ORDINAL_TEN = ['العاشر', 'العاشره']
+ORDINAL_TENS = ['العشر', 'الثلاث', 'الاربع', 'الخمس', 'الست', 'السبع', 'الثمان', 'التسع']
+
+CARDINAL_UNITS = [
+    (['واحد', 'واحده'], ['احد', 'احدي', 'واحد', 'واحده']),
+    (['اثنان', 'اثنين', 'اثنتان', 'اثنتين'], ['اثنا', 'اثني', 'اثنتا', 'اثنتي', 'اثنان', 'اثنين']),
+    (['ثلاثه', 'ثلاث'], ['ثلاثه', 'ثلاث']),
+    (['اربعه', 'اربع'], ['اربعه', 'اربع']),
+    (['خمسه', 'خمس'], ['خمسه', 'خمس']),
+    (['سته', 'ست'], ['سته', 'ست']),
+    (['سبعه', 'سبع'], ['سبعه', 'سبع']),
+    (['ثمانيه', 'ثماني', 'ثمان'], ['ثمانيه', 'ثماني', 'ثمان']),
+    (['تسعه', 'تسع'], ['تسعه', 'تسع']),
+]
+CARDINAL_TEN = ['عشره', 'عشر']
+CARDINAL_TENS = ['عشر', 'ثلاث', 'اربع', 'خمس', 'ست', 'سبع', 'ثمان', 'تسع']
+
+# Second word of the teens, and the hundred
+TEEN_WORDS = ['عشر', 'عشره']
+HUNDRED = ['المائه', 'المئه']
+
+_DIGITS = re.compile(r'\{?(\d+)\}?')
+_BRACED = re.compile(r'\{(\d+)\}')
+_WORD = re.compile(r'\s*(\w+)')
+# Between a marker and its number: spaces, punctuation, 'رقم'
+_SEPARATOR = re.compile(r'[\s:\-–(\[#]*(?:رقم[\s:\-–(\[#]*)?')
+
+
+def _number_words(units, ten, tens, teen_words):
+    """(words, value) pairs for 1-99 of one number system; tens holds the
+    stems the -ون/-ين endings go on"""
+    for value, (alone, _) in enumerate(units, 1):
+        for word in alone:
+            yield (word,), value
+    for word in ten:
+        yield (word,), 10
+
+    for value, (_, compound) in enumerate(units, 1):
+        for word in compound:
+            for teen in teen_words:
+                yield (word, teen), 10 + value
+
+    for tens_value, stem in enumerate(tens, 2):
+        tens_words = [stem + 'ون', stem + 'ين']
+        for word in tens_words:
+            yield (word,), 10 * tens_value
+        for value, (_, compound) in enumerate(units, 1):
+            for word in compound:
+                for tens_word in tens_words:
+                    yield (word, 'و' + tens_word), 10 * tens_value + value
+
+
+def _build_trie():
+    trie = {}
+
+    def insert(words, value):
+        node = trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(_VALUE, value)
+
+    ordinals = list(_number_words(ORDINAL_UNITS, ORDINAL_TEN, ORDINAL_TENS, TEEN_WORDS))
+    cardinals = list(_number_words(CARDINAL_UNITS, CARDINAL_TEN, CARDINAL_TENS, TEEN_WORDS))
+
+    for words, value in ordinals + cardinals:
+        insert(words, value)
+    for words, value in ordinals:
+        for hundred in HUNDRED:
+            insert(words + ('بعد', hundred), 100 + value)
+    for hundred in HUNDRED:
+        insert((hundred,), 100)
+    return trie
+
+
+NUMBER_TRIE = _build_trie()
+
+_MARKER = re.compile('|'.join(normalize_arabic(marker) for marker in MARKERS))
+
+
+def read_number(text, pos=0):
+    """(value, digits, end) of the number starting at text[pos] (normalized
+    text): digits is the number as written when it is in digits, else
+    None. None when no number starts there."""
+    match = _DIGITS.match(text, pos)
+    if match:
+        return int(match.group(1)), match.group(1), match.end()
+
+    node = NUMBER_TRIE
+    found = None
+    while True:
+        match = _WORD.match(text, pos)
+        if not match:
+            break
+        node = node.get(match.group(1))
+        if node is None:
+            break
+        pos = match.end()
+        if _VALUE in node:
+            found = (node[_VALUE], None, pos)
+    return found
+
+
+def find_serial(text):
+    """(value, digits) of the lesson number of a caption (see the module
+    docstring), digits being the number as written in ASCII digits when it
+    is written in digits; None when the caption has none"""
+    text = normalize_arabic(text)
+    for marker in _MARKER.finditer(text):
+        number = read_number(text, _SEPARATOR.match(text, marker.end()).end())
+        if number:
+            return number[:2]
+
+    match = _BRACED.search(text)
+    if match:
+        return int(match.group(1)), match.group(1)
+    return None
+
+
+def parse_number(text):
+    """Value of a text that is just a number ('١٢', '{12}', 'الحادي عشر'),
+    or None"""
+    text = normalize_arabic(text)
+    number = read_number(text)
+    if number and number[2] == len(text):
+        return number[0]
+    return None
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    for text in sys.argv[1:]:
+        serial = find_serial(text)
+        print(f"{text}: {serial[0] if serial else 'no lesson number'}")
+
+
+if __name__ == '__main__':
+    main()
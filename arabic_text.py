@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Arabic text normalization for matching, built on precomputed str.translate
+tables.
+
+normalize_arabic() folds the spelling variants that differ between
+captions and the series catalog:
+- tashkeel (harakat, tanween, shadda, sukun, superscript alef) and
+  tatweel are removed
+- alef with hamza/madda and alef wasla become a bare alef (أ إ آ ٱ -> ا)
+- taa marbuta becomes haa (ة -> ه) and alef maksura yaa (ى -> ي)
+- Arabic-Indic and Persian digits become ASCII digits
+- runs of whitespace become one space
+
+All character folding is a single str.translate pass. Messages are
+normalized once when they are parsed (the record store keeps the result
+in a normalized_text column next to message_text) and catalog entries
+once when they are loaded, so matching only compares prepared strings.
+"""
+
+ARABIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+PERSIAN_DIGITS = '۰۱۲۳۴۵۶۷۸۹'
+
+# Arabic-Indic digits -> ASCII, and back
+TO_ASCII_DIGITS = str.maketrans(ARABIC_DIGITS + PERSIAN_DIGITS, '0123456789' * 2)
+TO_ARABIC_DIGITS = str.maketrans('0123456789', ARABIC_DIGITS)
+
+TASHKEEL = ''.join(map(chr, range(0x064B, 0x0660))) + 'ٰ'
+TATWEEL = 'ـ'
+
+MATCH_TABLE = str.maketrans({
+    **{char: None for char in TASHKEEL + TATWEEL},
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه',
+    'ى': 'ي',
+    **{digit: str(value) for value, digit in enumerate(ARABIC_DIGITS)},
+    **{digit: str(value) for value, digit in enumerate(PERSIAN_DIGITS)},
+})
+
+
+def to_ascii_digits(text):
+    """'١٤٤٧' -> '1447'"""
+    return text.translate(TO_ASCII_DIGITS)
+
+
+def to_arabic_digits(text):
+    """'1447' -> '١٤٤٧'"""
+    return text.translate(TO_ARABIC_DIGITS)
+
+
+def normalize_arabic(text):
+    """Matching form of a text (see the module docstring); '' for None"""
+    if not text:
+        return ''
+    return ' '.join(text.translate(MATCH_TABLE).split())
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Telegram export parsers on synthetic exports.
+
+For every size and parser backend a synthetic export is generated (see
+synth_export.py, cached in the work directory) and parsed in a fresh
+process, so each run's peak RSS is its own. Reported per run:
+messages/sec, peak RSS and the time spent in each stage (parse: reading
+and tokenizing the export, extract: building records from messages,
+write: dumping the parsed JSON).
+
+Usage:
+    python benchmark_parsers.py                      # 1k, 10k, 100k, all backends
+    python benchmark_parsers.py --sizes 1k 1m --backends lxml json
+    python benchmark_parsers.py --sizes 100k --output bench.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from synth_export import generate_export
+
+DEFAULT_SIZES = ['1k', '10k', '100k']
+
+
+class StageTimer:
+    """Accumulates wall time per named stage"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def timed(self, stage, iterator):
+        """Yield from iterator, charging the time spent producing items to stage"""
+        iterator = iter(iterator)
+        clock = time.perf_counter
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, clock() - start)
+                return
+            self.add(stage, clock() - start)
+            yield item
+
+
+def _write(records, timer):
+    start = time.perf_counter()
+    with open(os.devnull, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    timer.add('write', time.perf_counter() - start)
+
+
+def _html_backend(load_view):
+    """Backend streaming an HTML export through a telegram_parser view
+    (imported lazily, so only the benchmarked modules are loaded)"""
+    def run(export_file, timer):
+        from telegram_parser import MessageFields, iter_message_divs
+
+        view = load_view()
+        messages = 0
+        records = []
+        for msg_div in timer.timed('parse', iter_message_divs(export_file)):
+            messages += 1
+            start = time.perf_counter()
+            records.extend(view(MessageFields(msg_div)))
+            timer.add('extract', time.perf_counter() - start)
+
+        _write(records, timer)
+        return messages, len(records)
+    return run
+
+
+def _audio_view():
+    from telegram_parser import audio_lecture_records
+    return audio_lecture_records
+
+
+def _archive_view():
+    from parse_archive_messages import archive_records
+    return archive_records
+
+
+def run_lxml_sharded(export_file, timer):
+    """parse_export_sharded: parse and extract happen inside the workers"""
+    from telegram_parser import parse_export_sharded
+
+    start = time.perf_counter()
+    records = parse_export_sharded(export_file, 'audio')
+    timer.add('parse+extract', time.perf_counter() - start)
+
+    _write(records, timer)
+    with open(export_file, 'rb') as f:
+        messages = f.read().count(b'<div class="message ')
+    return messages, len(records)
+
+
+def run_json(export_file, timer):
+    """telegram_json: streaming result.json decoder"""
+    from telegram_json import audio_lecture_record, iter_export
+
+    messages = 0
+    records = []
+    for message in timer.timed('parse', iter_export(export_file)):
+        messages += 1
+        start = time.perf_counter()
+        record = audio_lecture_record(message, media_duration=True)
+        if record is not None:
+            records.append(record)
+        timer.add('extract', time.perf_counter() - start)
+
+    _write(records, timer)
+    return messages, len(records)
+
+
+# Backend name -> (export format, function(export_file, timer) -> (messages, records))
+BACKENDS = {
+    'lxml': ('html', _html_backend(_audio_view)),
+    'lxml-sharded': ('html', run_lxml_sharded),
+    'archive': ('html', _html_backend(_archive_view)),
+    'json': ('json', run_json),
+}
+
+
+def parse_size(text):
+    """'1k' -> 1000, '1m' -> 1000000, '2500' -> 2500"""
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    if multiplier != 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def export_path(workdir, size, export_format, seed):
+    """Generate the synthetic export of a size once and reuse it"""
+    path = os.path.join(workdir, f'synth_{size}_{seed}.{export_format}')
+    if not os.path.exists(path):
+        print(f"   Generating {path} ...")
+        generate_export(size, path, export_format, seed)
+    return path
+
+
+def run_backend(backend, export_file):
+    """Parse one export in this process and return the measurements"""
+    _, run = BACKENDS[backend]
+    timer = StageTimer()
+
+    start = time.perf_counter()
+    messages, records = run(export_file, timer)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'backend': backend,
+        'export': export_file,
+        'messages': messages,
+        'records': records,
+        'seconds': elapsed,
+        'messages_per_sec': messages / elapsed if elapsed else 0.0,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'stages': timer.stages,
+    }
+
+
+def run_isolated(backend, export_file):
+    """run_backend in a fresh interpreter, so peak RSS is not shared"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', backend, export_file],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def print_result(size, result):
+    stages = '  '.join(f"{name}={seconds:.2f}s" for name, seconds in result['stages'].items())
+    print(f"   {size:>8}  {result['backend']:13s} {result['records']:8d} rec  "
+          f"{result['seconds']:7.2f}s  {result['messages_per_sec']:9.0f} msg/s  "
+          f"{result['peak_rss_mb']:6.0f} MB  {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Telegram export parsers")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                        help="export sizes in messages, e.g. 1k 10k 100k 1m")
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=list(BACKENDS),
+                        help="parser backends to run (default: all)")
+    parser.add_argument('--workdir', default='bench_exports', help="where synthetic exports are kept")
+    parser.add_argument('--seed', type=int, default=0, help="synthetic export seed")
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    parser.add_argument('--child', nargs=2, metavar=('BACKEND', 'EXPORT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(*args.child)))
+        return
+
+    os.makedirs(args.workdir, exist_ok=True)
+
+    print("=" * 80)
+    print("PARSER BENCHMARK")
+    print("=" * 80)
+    print()
+
+    results = []
+    for size in map(parse_size, args.sizes):
+        for backend in args.backends:
+            export_format, _ = BACKENDS[backend]
+            export_file = export_path(args.workdir, size, export_format, args.seed)
+            result = run_isolated(backend, export_file)
+            result['size'] = size
+            results.append(result)
+            print_result(size, result)
+        print()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Saved results to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
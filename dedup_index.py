@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Persistent content-hash index of already-ingested lessons.
+
+The exports overlap in time (archive_messages.html, messages.html,
+5feb26messages.html and 9feb26messages.html), so the same lesson can be
+parsed from several of them. Every parsed record is keyed on its
+normalized text, audio filename and date; the keys live in a small SQLite
+database, and records whose key is already there are dropped before they
+reach the extractors.
+
+For very large histories an optional Bloom filter sits in front of the
+database: a key it has never seen is new without a database lookup.
+
+Usage:
+    python dedup_index.py messages_parsed.json 5feb26_messages_parsed.json
+    python dedup_index.py *_parsed.json --index /tmp/check.sqlite --bloom 1000000
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import unicodedata
+from datetime import datetime
+
+DEDUP_INDEX = 'dedup_index.sqlite'
+
+_WHITESPACE = re.compile(r'\s+')
+_DATE = re.compile(r'(\d{1,2})[./](\d{1,2})[./](\d{4})')
+
+
+def normalize_content(text):
+    """Text with all whitespace and invisible format characters (RLM,
+    ZWNJ, ...) removed, so exports that break lines differently agree"""
+    text = _WHITESPACE.sub('', text or '')
+    return ''.join(c for c in text if unicodedata.category(c) != 'Cf')
+
+
+def normalize_date(date_str):
+    """'19.01.2026' or '19/01/2026' -> '2026-01-19' (other values unchanged)"""
+    match = _DATE.search(date_str or '')
+    if not match:
+        return date_str or ''
+    day, month, year = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def record_key(record):
+    """16-byte digest of (normalized text, audio filename, date) of a parsed record"""
+    content = '\0'.join([
+        normalize_content(record.get('message_text', '')),
+        record.get('filename', ''),
+        normalize_date(record.get('greg_date', '')),
+    ])
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over record keys (already uniform digests)"""
+
+    # File header: magic, capacity, number of index keys it was saved with
+    MAGIC = b'BLM2'
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.keys = 0
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing from the two halves of the digest
+        h1 = int.from_bytes(key[:8], 'little')
+        h2 = int.from_bytes(key[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def save(self, path, keys):
+        """Write the filter, recording that it holds the index's first
+        ``keys`` keys"""
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(self.capacity.to_bytes(8, 'little'))
+            f.write(keys.to_bytes(8, 'little'))
+            f.write(self.size.to_bytes(8, 'little'))
+            f.write(self.hashes.to_bytes(4, 'little'))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path):
+        """The saved filter, or None when the file is not one"""
+        bloom = cls.__new__(cls)
+        with open(path, 'rb') as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                return None
+            bloom.capacity = int.from_bytes(f.read(8), 'little')
+            bloom.keys = int.from_bytes(f.read(8), 'little')
+            bloom.size = int.from_bytes(f.read(8), 'little')
+            bloom.hashes = int.from_bytes(f.read(4), 'little')
+            bloom.bits = bytearray(f.read())
+        return bloom
+
+
+class DedupIndex:
+    """Keys of every record ingested so far, with the export they came from.
+
+    ``bloom_capacity`` enables the Bloom filter front, sized for that many
+    keys; it is kept next to the database as ``<index>.bloom``. The saved
+    filter is only reused when it was saved for the same capacity with as
+    many keys as the index holds (keys are never removed, so the same
+    count means the same keys); otherwise, e.g. after runs without a
+    Bloom filter, it is rebuilt from the index.
+
+    New keys are committed by commit() or on leaving a ``with`` block
+    normally; an exception rolls them back.
+    """
+
+    def __init__(self, path=DEDUP_INDEX, bloom_capacity=None):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS seen ('
+                        'key BLOB PRIMARY KEY, source TEXT, added TEXT)')
+
+        self.bloom = None
+        self.bloom_path = f"{path}.bloom"
+        if bloom_capacity:
+            if os.path.exists(self.bloom_path):
+                self.bloom = BloomFilter.load(self.bloom_path)
+                if self.bloom is not None and (self.bloom.capacity != bloom_capacity
+                                               or self.bloom.keys != len(self)):
+                    self.bloom = None
+            if self.bloom is None:
+                self.bloom = BloomFilter(bloom_capacity)
+                for (key,) in self.db.execute('SELECT key FROM seen'):
+                    self.bloom.add(key)
+
+        self.stats = {'lookups': 0, 'bloom_skips': 0, 'duplicates': 0, 'added': 0}
+
+    def __contains__(self, key):
+        self.stats['lookups'] += 1
+        if self.bloom is not None and key not in self.bloom:
+            self.stats['bloom_skips'] += 1
+            return False
+        return self.db.execute('SELECT 1 FROM seen WHERE key = ?', (key,)).fetchone() is not None
+
+    def add(self, key, source=''):
+        cursor = self.db.execute('INSERT OR IGNORE INTO seen VALUES (?, ?, ?)',
+                                 (key, source, datetime.now().isoformat(timespec='seconds')))
+        if self.bloom is not None:
+            self.bloom.add(key)
+        # A key already in the index is ignored, not added
+        self.stats['added'] += cursor.rowcount
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+    def filter_new(self, records, source=''):
+        """Records not seen before (also dropping repeats within ``records``),
+        registering their keys under ``source``"""
+        new_records = []
+        for record in records:
+            key = record_key(record)
+            if key in self:
+                self.stats['duplicates'] += 1
+                continue
+            self.add(key, source)
+            new_records.append(record)
+        return new_records
+
+    def register(self, records, source=''):
+        """Add the keys of already-ingested records"""
+        for record in records:
+            self.add(record_key(record), source)
+
+    def commit(self):
+        """Make the keys added so far permanent"""
+        self.db.commit()
+        if self.bloom is not None:
+            self.bloom.save(self.bloom_path, len(self))
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is not None:
+            # Keys of records that never made it into the output
+            self.db.rollback()
+            self.db.close()
+            return
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register parsed JSON files in the dedup index and report repeats")
+    parser.add_argument('inputs', nargs='+', help="parsed JSON files, oldest export first")
+    parser.add_argument('--index', default=DEDUP_INDEX, help="dedup index database")
+    parser.add_argument('--bloom', type=int, default=None, metavar='CAPACITY',
+                        help="put a Bloom filter sized for CAPACITY keys in front of the index")
+    args = parser.parse_args()
+
+    with DedupIndex(args.index, args.bloom) as index:
+        for input_file in args.inputs:
+            with open(input_file, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+
+            duplicates_before = index.stats['duplicates']
+            new_records = index.filter_new(records, os.path.basename(input_file))
+            duplicates = index.stats['duplicates'] - duplicates_before
+            print(f"📄 {input_file}: {len(records)} records, {len(new_records)} new, {duplicates} duplicates")
+
+        print()
+        print(f"✅ {len(index)} distinct lessons in {args.index}")
+        if index.bloom is not None:
+            print(f"   Bloom filter answered {index.stats['bloom_skips']}/{index.stats['lookups']} lookups")
+
+
+if __name__ == '__main__':
+    main()
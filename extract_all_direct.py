@@ -5,11 +5,18 @@ Islamic Lecture Data Extraction Script
 Extracts structured data from 268 Telegram messages according to detailed extraction rules
 """
 
-import json
+import argparse
 import csv
 import re
 from typing import Dict, List, Tuple
 
+from field_scanner import MessageScan, compile_rules
+from parallel_extract import extract_parallel
+from record_store import load_messages
+from series_catalog import load_catalog
+
+_SPACES = re.compile(r'\s+')
+
 class LectureExtractor:
     def __init__(self):
         # Schedule knowledge for online detection and series identification
@@ -19,29 +26,30 @@ class LectureExtractor:
             "معارج القبول"
         }
 
-        # Series to author mapping
-        self.series_authors = {
-            "تأسيس الأحكام": "أحمد بن يحيى النجمي",
-            "الملخص الفقهي": "صالح الفوزان",
-            "الملخص شرح كتاب التوحيد": "صالح الفوزان",
-            "الأفنان الندية": "زيد بن هادي المدخلي",
-            "منظومة سلم الوصول": "حافظ حكمي",
-            "معارج القبول": "حافظ حكمي",
-            "شرح السنة": "البربهاري",
-            "التفسير الميسر": "نخبة من أهل العلم"
-        }
-
-        # Series to category mapping
-        self.series_categories = {
-            "تأسيس الأحكام": "Hadeeth",
-            "الملخص الفقهي": "Fiqh",
-            "الملخص شرح كتاب التوحيد": "Aqeedah",
-            "الأفنان الندية": "Fiqh",
-            "منظومة سلم الوصول": "Aqeedah",
-            "معارج القبول": "Aqeedah",
-            "شرح السنة": "Aqeedah",
-            "التفسير الميسر": "Other"
-        }
+        # Series to author and category mappings and series name patterns
+        # (highest priority first, compiled into one regex), from
+        # series_catalog.json
+        tables = load_catalog().extractors['extract_all_direct']
+        self.series_authors = tables['authors']
+        self.series_categories = tables['categories']
+        self.series_patterns = tables['patterns']
+
+        self._scan = None
+
+    def scan(self, text: str) -> MessageScan:
+        """Trigger positions of a message, shared by all field recognizers
+        (kept until another text is extracted)"""
+        if self._scan is None or self._scan.text != text:
+            self._scan = MessageScan(text)
+        return self._scan
+
+    # Lesson-number patterns marking a Series
+    SERIES_MARKER_RULES = compile_rules([
+        r"الدرس\s+",
+        r"الحلقة\s+",
+        r"(الأول|الثاني|الثالث|الرابع|الخامس|السادس|السابع|الثامن|التاسع|العاشر)",
+        r"(الحادي|الثاني|الثالث|الرابع|الخامس|السادس|السابع|الثامن|التاسع)\s+(عشر|والعشرون|والثلاثون|والأربعون|والخمسون|والستون|والسبعون|والثمانون|والتسعون)"
+    ])
 
     def extract_type(self, text: str) -> Tuple[str, List[str]]:
         """Determine if message is Khutba, Lecture, or Series"""
@@ -52,16 +60,8 @@ class LectureExtractor:
             return "Khutba", doubts
 
         # Check for Series (has lesson number)
-        series_patterns = [
-            r"الدرس\s+",
-            r"الحلقة\s+",
-            r"(الأول|الثاني|الثالث|الرابع|الخامس|السادس|السابع|الثامن|التاسع|العاشر)",
-            r"(الحادي|الثاني|الثالث|الرابع|الخامس|السادس|السابع|الثامن|التاسع)\s+(عشر|والعشرون|والثلاثون|والأربعون|والخمسون|والستون|والسبعون|والثمانون|والتسعون)"
-        ]
-
-        for pattern in series_patterns:
-            if re.search(pattern, text):
-                return "Series", doubts
+        if self.scan(text).first(self.SERIES_MARKER_RULES):
+            return "Series", doubts
 
         # Check for standalone lecture
         if "محاضرة" in text:
@@ -71,6 +71,15 @@ class LectureExtractor:
         doubts.append("Type unclear - defaulted to Series")
         return "Series", doubts
 
+    # For Khutba/Lecture - topic in brackets or after بعنوان
+    TOPIC_RULES = compile_rules([
+        r"•\[\s*\n?\s*([^\]]+?)\s*\n?\s*\]•",  # •[ topic ]• with possible newlines
+        r"عنوان الخطبة:\s*\n?\s*([^\n\.]+)",  # عنوان الخطبة: topic
+        r"محاضرة[^:]*بعنوان:\s*\n?\s*▪️\s*\n?\s*([^\n]+?)\s*\n?\s*▪️",  # محاضرة بعنوان: ▪️ topic ▪️
+        r"بعنوان:\s*\n?\s*([^\n▪]+)",  # بعنوان: topic
+        r"▪️\s*\n?\s*([^\n▪]+?)\s*\n?\s*▪️"  # ▪️ topic ▪️
+    ])
+
     def extract_topic(self, text: str, msg_type: str) -> Tuple[str, List[str]]:
         """Extract topic for Khutba/Lecture only"""
         doubts = []
@@ -79,21 +88,13 @@ class LectureExtractor:
         if msg_type == "Series":
             return "Not Available", doubts
 
-        # For Khutba/Lecture - look for topic in brackets or after بعنوان
-        patterns = [
-            r"•\[\s*\n?\s*([^\]]+?)\s*\n?\s*\]•",  # •[ topic ]• with possible newlines
-            r"عنوان الخطبة:\s*\n?\s*([^\n\.]+)",  # عنوان الخطبة: topic
-            r"محاضرة[^:]*بعنوان:\s*\n?\s*▪️\s*\n?\s*([^\n]+?)\s*\n?\s*▪️",  # محاضرة بعنوان: ▪️ topic ▪️
-            r"بعنوان:\s*\n?\s*([^\n▪]+)",  # بعنوان: topic
-            r"▪️\s*\n?\s*([^\n▪]+?)\s*\n?\s*▪️"  # ▪️ topic ▪️
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        scan = self.scan(text)
+        for rule in self.TOPIC_RULES:
+            match = scan.search(rule)
             if match:
                 topic = match.group(1).strip()
                 # Clean up
-                topic = re.sub(r'\s+', ' ', topic)
+                topic = _SPACES.sub(' ', topic)
                 # Remove extra markers
                 topic = re.sub(r'^[▪️\s]+', '', topic)
                 topic = re.sub(r'[▪️\s]+$', '', topic)
@@ -111,25 +112,20 @@ class LectureExtractor:
             return "Not Available", doubts
 
         # Look for series names
-        series_patterns = {
-            "تأسيس الأحكام شرح عمدة الأحكام": [r"تأسيس الأحكام"],
-            "الملخص شرح كتاب التوحيد": [r"الملخص شرح كتاب التوحيد", r"الملخّص في شرح كتاب التوحيد"],
-            "الملخص الفقهي": [r"الملخص الفقهي", r"الملخّص الفقهي"],
-            "الأفنان الندية": [r"الأفنان الندية"],
-            "منظومة سلم الوصول": [r"منظومة سلم الوصول", r"سلم الوصول"],
-            "معارج القبول": [r"معارج القبول"],
-            "شرح السنة": [r'شرح "السنة"', r"شرح السنة"],
-            "التفسير الميسر": [r"التفسير الميسر", r"التفسير الميسّر"]
-        }
-
-        for full_name, patterns in series_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text):
-                    return full_name, doubts
+        full_name = self.series_patterns.first(text)
+        if full_name:
+            return full_name, doubts
 
         doubts.append("Series name not clearly identified")
         return "Not Available", doubts
 
+    # كتاب or باب patterns
+    SUBTOPIC_RULES = compile_rules([
+        r"(كتاب\s+[^\n\-]+(?:\s*\([^\)]+\))?)",
+        r"(باب\s+[^\n\-]+)",
+        r"\(\s*(سورة\s+[^\)]+)\s*\)"
+    ])
+
     def extract_subtopic(self, text: str, msg_type: str) -> Tuple[str, List[str]]:
         """Extract chapter/section within series"""
         doubts = []
@@ -137,23 +133,27 @@ class LectureExtractor:
         if msg_type != "Series":
             return "Not Available", doubts
 
-        # Look for كتاب or باب patterns
-        patterns = [
-            r"(كتاب\s+[^\n\-]+(?:\s*\([^\)]+\))?)",
-            r"(باب\s+[^\n\-]+)",
-            r"\(\s*(سورة\s+[^\)]+)\s*\)"
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                subtopic = match.group(1).strip()
-                # Clean up
-                subtopic = re.sub(r'\s+', ' ', subtopic)
-                return subtopic, doubts
+        match = self.scan(text).first(self.SUBTOPIC_RULES)
+        if match:
+            subtopic = match.group(1).strip()
+            # Clean up
+            subtopic = _SPACES.sub(' ', subtopic)
+            return subtopic, doubts
 
         return "Not Available", doubts
 
+    # Lesson number patterns - more flexible matching
+    SERIAL_RULES = compile_rules([
+        # Match "الدرس الأول" style with Arabic words
+        r"الدرس\s+(ال[\u0600-\u06FF]+(?:\s+[\u0600-\u06FF]+)*?)(?:\s+ب|\s+في|\s+مع|\s+عن|\s*\n)",
+        # Match "الحلقة الأولى" style
+        r"الحلقة\s+(ال[\u0600-\u06FF]+(?:\s+[\u0600-\u06FF]+)*?)(?:\s+ب|\s+في|\s+مع|\s+عن|\s*\n)",
+        # Match Arabic numerals
+        r"الدرس\s+([٠-٩]+)",
+        # Match Western numerals
+        r"الدرس\s+(\d+)",
+    ])
+
     def extract_serial(self, text: str, msg_type: str) -> Tuple[str, List[str]]:
         """Extract lesson number in Arabic"""
         doubts = []
@@ -161,28 +161,23 @@ class LectureExtractor:
         if msg_type != "Series":
             return "Not Available", doubts
 
-        # Look for lesson number patterns - more flexible matching
-        patterns = [
-            # Match "الدرس الأول" style with Arabic words
-            r"الدرس\s+(ال[\u0600-\u06FF]+(?:\s+[\u0600-\u06FF]+)*?)(?:\s+ب|\s+في|\s+مع|\s+عن|\s*\n)",
-            # Match "الحلقة الأولى" style
-            r"الحلقة\s+(ال[\u0600-\u06FF]+(?:\s+[\u0600-\u06FF]+)*?)(?:\s+ب|\s+في|\s+مع|\s+عن|\s*\n)",
-            # Match Arabic numerals
-            r"الدرس\s+([٠-٩]+)",
-            # Match Western numerals
-            r"الدرس\s+(\d+)",
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                serial = match.group(1).strip()
-                serial = re.sub(r'\s+', ' ', serial)
-                return serial, doubts
+        match = self.scan(text).first(self.SERIAL_RULES)
+        if match:
+            serial = match.group(1).strip()
+            serial = _SPACES.sub(' ', serial)
+            return serial, doubts
 
         doubts.append("Serial number not found")
         return "Not Available", doubts
 
+    # Book author as named in the caption
+    AUTHOR_RULES = compile_rules([
+        r"للعلامة:\s*([^\n\-]+?)(?:\s*-|رحمه)",
+        r"للعلامة\s+([^\n\-]+?)(?:\s*-|رحمه)",
+        r"للإمام:\s*([^\n]+?)(?:\s*-|رحمه)",
+        r"قام بإعداده\s+([^\n]+)"
+    ])
+
     def extract_original_author(self, text: str, series_name: str, msg_type: str) -> Tuple[str, List[str]]:
         """Extract book author (not the Sheikh)"""
         doubts = []
@@ -191,23 +186,15 @@ class LectureExtractor:
             return "Not Available", doubts
 
         # First try to extract from text
-        author_patterns = [
-            r"للعلامة:\s*([^\n\-]+?)(?:\s*-|رحمه)",
-            r"للعلامة\s+([^\n\-]+?)(?:\s*-|رحمه)",
-            r"للإمام:\s*([^\n]+?)(?:\s*-|رحمه)",
-            r"قام بإعداده\s+([^\n]+)"
-        ]
-
-        for pattern in author_patterns:
-            match = re.search(pattern, text)
-            if match:
-                author = match.group(1).strip()
-                # Clean up
-                author = re.sub(r'\s+', ' ', author)
-                # Remove common honorifics at the end
-                author = re.sub(r'\s*رحمه الله\s*', '', author)
-                author = re.sub(r'\s*حفظه الله\s*', '', author)
-                return author, doubts
+        match = self.scan(text).first(self.AUTHOR_RULES)
+        if match:
+            author = match.group(1).strip()
+            # Clean up
+            author = _SPACES.sub(' ', author)
+            # Remove common honorifics at the end
+            author = re.sub(r'\s*رحمه الله\s*', '', author)
+            author = re.sub(r'\s*حفظه الله\s*', '', author)
+            return author, doubts
 
         # Fall back to series mapping
         for series_key, author in self.series_authors.items():
@@ -217,22 +204,22 @@ class LectureExtractor:
         doubts.append("Original author not found")
         return "Not Available", doubts
 
+    # Explicit online indicators
+    ONLINE_RULES = compile_rules([
+        r"عن\s*بُعد",
+        r"عن\s*بعد",
+        r"بُعد",
+        r"عبر قناة التليجرام",
+        r"عبر قناته الرسمية"
+    ])
+
     def extract_location(self, text: str, series_name: str) -> Tuple[str, List[str]]:
         """Determine if Online or جامع الورود"""
         doubts = []
 
         # Check for explicit online indicators
-        online_indicators = [
-            r"عن\s*بُعد",
-            r"عن\s*بعد",
-            r"بُعد",
-            r"عبر قناة التليجرام",
-            r"عبر قناته الرسمية"
-        ]
-
-        for indicator in online_indicators:
-            if re.search(indicator, text):
-                return "Online", doubts
+        if self.scan(text).first(self.ONLINE_RULES):
+            return "Online", doubts
 
         # Check for explicit mosque mention
         if "جامع الورود" in text or "في جامع الورود" in text:
@@ -241,33 +228,32 @@ class LectureExtractor:
         # Default to جامع الورود
         return "جامع الورود", doubts
 
+    # Hijri date patterns
+    DATE_RULES = compile_rules([
+        r"❲\s*([^❳]+)\s*❳",  # ❲ date ❳
+        r"التاريخ:\s*([^\n]+?)(?:ه‍|\n|$)",  # التاريخ: date
+        r"([٠-٩]+\s*[/\-]\s*[٠-٩]+\s*[/\-]\s*[٠-٩]+)",  # Arabic numerals: ٥/٢/١٤٤٧
+        r"(\d+\s*[/\-]\s*\d+\s*[/\-]\s*\d+\s*ه)",  # 5/2/1447ه
+        r"(\d+\s+[\u0600-\u06FF]+\s+\d+\s*ه)",  # 17 جمادى الآخرة 1440ه
+        r"(الجمعة\s+[٠-٩]+\s*[/\-]\s*[٠-٩]+\s*[/\-]\s*[٠-٩]+)",  # الجمعة ٥/٢/١٤٤٧
+        r"(الجمعة\s+\d+\s*[/\-]\s*\d+\s*[/\-]\s*\d+)",  # الجمعة 5/2/1447
+        r"ليلة\s+[\u0600-\u06FF]+\s+([٠-٩]+\s+[\u0600-\u06FF]+\s+[٠-٩]+)",  # ليلة السبت ١٢ ربيع الآخر ١٤٤٧
+        r"ليلة\s+\w+\s+(\d+\s+[\u0600-\u06FF]+\s+\d+\s*ه)",  # ليلة السبت 12 ربيع الآخر 1447هـ
+        r"(?:في|بجدة)\s*-\s*([٠-٩]+\s*/\s*[٠-٩]+\s*/\s*[٠-٩]+)",  # في - ١٥ / ٣ / ١٤٤٧
+        r"(?:في|بجدة)\s*-\s*(\d+\s*/\s*\d+\s*/\s*\d+)"  # في - 14 / 3 / 1447
+    ])
+
     def extract_date_arabic(self, text: str) -> Tuple[str, List[str]]:
         """Extract Hijri date in any format"""
         doubts = []
 
-        # Look for various date patterns
-        patterns = [
-            r"❲\s*([^❳]+)\s*❳",  # ❲ date ❳
-            r"التاريخ:\s*([^\n]+?)(?:ه‍|\n|$)",  # التاريخ: date
-            r"([٠-٩]+\s*[/\-]\s*[٠-٩]+\s*[/\-]\s*[٠-٩]+)",  # Arabic numerals: ٥/٢/١٤٤٧
-            r"(\d+\s*[/\-]\s*\d+\s*[/\-]\s*\d+\s*ه)",  # 5/2/1447ه
-            r"(\d+\s+[\u0600-\u06FF]+\s+\d+\s*ه)",  # 17 جمادى الآخرة 1440ه
-            r"(الجمعة\s+[٠-٩]+\s*[/\-]\s*[٠-٩]+\s*[/\-]\s*[٠-٩]+)",  # الجمعة ٥/٢/١٤٤٧
-            r"(الجمعة\s+\d+\s*[/\-]\s*\d+\s*[/\-]\s*\d+)",  # الجمعة 5/2/1447
-            r"ليلة\s+[\u0600-\u06FF]+\s+([٠-٩]+\s+[\u0600-\u06FF]+\s+[٠-٩]+)",  # ليلة السبت ١٢ ربيع الآخر ١٤٤٧
-            r"ليلة\s+\w+\s+(\d+\s+[\u0600-\u06FF]+\s+\d+\s*ه)",  # ليلة السبت 12 ربيع الآخر 1447هـ
-            r"(?:في|بجدة)\s*-\s*([٠-٩]+\s*/\s*[٠-٩]+\s*/\s*[٠-٩]+)",  # في - ١٥ / ٣ / ١٤٤٧
-            r"(?:في|بجدة)\s*-\s*(\d+\s*/\s*\d+\s*/\s*\d+)"  # في - 14 / 3 / 1447
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                date = match.group(1).strip()
-                date = re.sub(r'\s+', ' ', date)
-                # Remove trailing ه‍ marker if present (it's a special character)
-                date = re.sub(r'ه‍$', '', date)
-                return date, doubts
+        match = self.scan(text).first(self.DATE_RULES)
+        if match:
+            date = match.group(1).strip()
+            date = _SPACES.sub(' ', date)
+            # Remove trailing ه‍ marker if present (it's a special character)
+            date = re.sub(r'ه‍$', '', date)
+            return date, doubts
 
         doubts.append("Arabic date not found")
         return "Not Available", doubts
@@ -359,12 +345,25 @@ class LectureExtractor:
             "doubtsStatus": doubts_status
         }
 
+    def extract_messages(self, messages: List[Dict], workers: int = 1) -> List[Dict]:
+        """Extract all fields from many messages (extract_message for each);
+        with workers != 1 in parallel (see parallel_extract; None: all CPUs)"""
+        messages = list(messages)
+        if workers != 1:
+            return extract_parallel(self, messages, workers)
+
+        return [self.extract_message(message) for message in messages]
+
 def main():
+    parser = argparse.ArgumentParser(description="Extract lecture data from the parsed messages")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for large inputs (default: all CPUs)")
+    args = parser.parse_args()
+
     print("Starting extraction of 268 Islamic lecture messages...")
 
     # Load messages
-    with open('/home/user/intelliExtract/messages_parsed.json', 'r', encoding='utf-8') as f:
-        messages = json.load(f)
+    messages = load_messages('/home/user/intelliExtract/messages_parsed.json')
 
     print(f"Loaded {len(messages)} messages")
 
@@ -372,13 +371,7 @@ def main():
     extractor = LectureExtractor()
 
     # Extract data from all messages
-    extracted_data = []
-    for i, message in enumerate(messages, 1):
-        if i % 50 == 0:
-            print(f"Processed {i}/{len(messages)} messages...")
-
-        extracted = extractor.extract_message(message)
-        extracted_data.append(extracted)
+    extracted_data = extractor.extract_messages(messages, args.workers)
 
     print(f"Extraction complete. Processed {len(extracted_data)} messages")
 
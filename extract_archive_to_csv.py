@@ -7,6 +7,8 @@ import json
 import csv
 from collections import defaultdict
 
+from arabic_numbers import parse_number
+
 def main():
     input_file = 'archive_messages_parsed.json'
     output_csv = 'archive_lectures_extracted.csv'
@@ -23,6 +25,14 @@ def main():
     print(f"📖 Loaded {len(messages)} messages")
     print()
 
+    # Sort by series name, then by lesson number: the value the parse stage
+    # stored (parsed from the text for files parsed before it did)
+    def get_sort_key(msg):
+        serial = msg['lesson_serial'] if 'lesson_serial' in msg else parse_number(msg['lesson_number'])
+        return (msg['series_name'], serial or 0)
+
+    messages.sort(key=get_sort_key)
+
     # Convert to CSV format
     csv_records = []
     for msg in messages:
@@ -41,30 +51,6 @@ def main():
         }
         csv_records.append(record)
 
-    # Sort by series name, then by serial number
-    def get_sort_key(record):
-        series = record['SeriesName']
-        serial = record['Serial']
-
-        # Convert Arabic numerals to English for sorting
-        arabic_to_eng = {
-            '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
-            '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9'
-        }
-
-        serial_eng = serial
-        for ar, en in arabic_to_eng.items():
-            serial_eng = serial_eng.replace(ar, en)
-
-        try:
-            serial_num = int(serial_eng)
-        except:
-            serial_num = 0
-
-        return (series, serial_num)
-
-    csv_records.sort(key=get_sort_key)
-
     # Write CSV
     fieldnames = [
         'TelegramFileName', 'Type', 'SeriesName', 'Serial',
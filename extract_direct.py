@@ -4,69 +4,17 @@ Parse messages from HTML and prepare them for Claude Code extraction
 This script parses the messages and outputs them in a format for analysis
 """
 
-import re
-import json
-from bs4 import BeautifulSoup
+from media_probe import files_dir_of, fill_clip_lengths
+from record_store import save_messages, store_path_of
+from telegram_parser import VIEWS, iter_records
 
 
 def parse_html_messages(html_file):
     """Parse messages from the exported Telegram HTML file"""
     print(f"📖 Reading {html_file}...")
 
-    with open(html_file, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
-
-    messages = []
-    message_divs = soup.find_all('div', class_='message')
-
-    for msg_div in message_divs:
-        # Skip service messages (date separators)
-        if 'service' in msg_div.get('class', []):
-            continue
-
-        # Extract message text
-        text_div = msg_div.find('div', class_='text')
-        if not text_div:
-            continue
-
-        message_text = text_div.get_text(separator='\n', strip=True)
-
-        # Skip if message is too short or doesn't contain meaningful content
-        if len(message_text) < 50:
-            continue
-
-        # Extract audio file info
-        audio_file = "Not Available"
-        clip_length = "Not Available"
-
-        media_div = msg_div.find('div', class_='media_audio_file')
-        if media_div:
-            title_div = media_div.find('div', class_='title')
-            if title_div:
-                audio_file = title_div.get_text(strip=True)
-
-            status_div = media_div.find('div', class_='status')
-            if status_div:
-                status_text = status_div.get_text(strip=True)
-                # Extract duration (format: "14:56, 7.0 MB")
-                duration_match = re.match(r'(\d+:\d+)', status_text)
-                if duration_match:
-                    clip_length = duration_match.group(1)
-
-        # Extract date
-        date_div = msg_div.find('div', class_='date')
-        greg_date = "Not Available"
-        if date_div and 'title' in date_div.attrs:
-            date_str = date_div['title']
-            # Format: "03.10.2025 12:25:20 UTC+03:00"
-            greg_date = date_str.split()[0]  # Get just the date part
-
-        messages.append({
-            'filename': audio_file,
-            'message_text': message_text,
-            'clip_length': clip_length,
-            'greg_date': greg_date
-        })
+    # Messages shorter than 50 characters are skipped (the 'direct' view)
+    messages = list(iter_records(html_file, VIEWS['direct']))
 
     print(f"✅ Found {len(messages)} messages to process")
     return messages
@@ -86,10 +34,15 @@ def main():
         print("❌ No messages found in HTML file")
         return
 
-    # Save to JSON for processing
+    # Fill missing clip lengths from the audio files, when the export has them
+    filled = fill_clip_lengths(messages, files_dir_of(html_file))
+    if filled:
+        print(f"🎧 Read {filled} clip lengths from the audio file headers")
+
+    # Save to JSON, plus the record store the extractors read
     output_file = 'messages_parsed.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(messages, f, ensure_ascii=False, indent=2)
+    save_messages(messages, output_file)
+    save_messages(messages, store_path_of(output_file))
 
     print(f"💾 Saved {len(messages)} messages to {output_file}")
 
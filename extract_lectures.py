@@ -9,10 +9,11 @@ import re
 import json
 import csv
 import time
-from bs4 import BeautifulSoup
 from datetime import datetime
 from anthropic import Anthropic
 
+from telegram_parser import iter_records, text_message_records
+
 # Initialize Claude API client
 client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
 
@@ -20,56 +21,7 @@ def parse_html_messages(html_file):
     """Parse messages from the exported Telegram HTML file"""
     print(f"📖 Reading {html_file}...")
 
-    with open(html_file, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
-
-    messages = []
-    message_divs = soup.find_all('div', class_='message')
-
-    for msg_div in message_divs:
-        # Skip service messages (date separators)
-        if 'service' in msg_div.get('class', []):
-            continue
-
-        # Extract message text
-        text_div = msg_div.find('div', class_='text')
-        if not text_div:
-            continue
-
-        message_text = text_div.get_text(separator='\n', strip=True)
-
-        # Extract audio file info
-        audio_file = "Not Available"
-        clip_length = "Not Available"
-
-        media_div = msg_div.find('div', class_='media_audio_file')
-        if media_div:
-            title_div = media_div.find('div', class_='title')
-            if title_div:
-                audio_file = title_div.get_text(strip=True)
-
-            status_div = media_div.find('div', class_='status')
-            if status_div:
-                status_text = status_div.get_text(strip=True)
-                # Extract duration (format: "14:56, 7.0 MB")
-                duration_match = re.match(r'(\d+:\d+)', status_text)
-                if duration_match:
-                    clip_length = duration_match.group(1)
-
-        # Extract date
-        date_div = msg_div.find('div', class_='date')
-        greg_date = "Not Available"
-        if date_div and 'title' in date_div.attrs:
-            date_str = date_div['title']
-            # Format: "03.10.2025 12:25:20 UTC+03:00"
-            greg_date = date_str.split()[0]  # Get just the date part
-
-        messages.append({
-            'filename': audio_file,
-            'message_text': message_text,
-            'clip_length': clip_length,
-            'greg_date': greg_date
-        })
+    messages = list(iter_records(html_file, text_message_records))
 
     print(f"✅ Found {len(messages)} messages to process")
     return messages
@@ -8,132 +8,33 @@ Manual-style extraction: Process series one-by-one like a human would
 5. Move to next series
 """
 
-import json
 import csv
+import os
 import re
 from datetime import datetime
 from collections import defaultdict
 
-# Complete series list from WEEKLY_SCHEDULE_REFERENCE.md with search keywords
-SERIES_DATABASE = [
-    {
-        'name': 'تأسيس الأحكام شرح عمدة الأحكام',
-        'keywords': ['تأسيس الأحكام', 'تأسيس', 'عمدة الأحكام', 'عمدة'],
-        'location_masjid': True,
-        'location_online': True,  # Exists in both locations
-        'author': 'أحمد بن يحيى النجمي',
-        'category': 'Hadeeth',
-        'days_masjid': ['Sunday', 'Monday'],
-        'days_online': ['Wednesday']
-    },
-    {
-        'name': 'الملخص شرح كتاب التوحيد',
-        'keywords': ['كتاب التوحيد', 'التوحيد', 'الملخص شرح كتاب'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'صالح الفوزان',
-        'category': 'Aqeedah',
-        'days_masjid': ['Sunday', 'Tuesday']
-    },
-    {
-        'name': 'الملخص الفقهي',
-        'keywords': ['الملخص الفقهي', 'الفقهي'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'صالح الفوزان',
-        'category': 'Fiqh',
-        'days_masjid': ['Monday', 'Wednesday']
-    },
-    {
-        'name': 'الأفنان الندية',
-        'keywords': ['الأفنان الندية', 'الأفنان', 'السبل السوية'],
-        'location_masjid': False,
-        'location_online': True,
-        'author': 'زيد بن هادي المدخلي',
-        'category': 'Fiqh',
-        'days_online': ['Sunday', 'Monday']
-    },
-    {
-        'name': 'معارج القبول شرح منظومة سلم الوصول',
-        'keywords': ['سلم الوصول', 'منظومة', 'معارج القبول'],
-        'location_masjid': False,
-        'location_online': True,
-        'author': 'حافظ حكمي',
-        'category': 'Aqeedah',
-        'days_online': ['Tuesday']
-    },
-    {
-        'name': 'التفسير الميسر',
-        'keywords': ['التفسير الميسر', 'التفسير', 'سورة'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'نخبة من أهل العلم',
-        'category': 'Other',
-        'days_masjid': ['Saturday']
-    },
-    {
-        'name': 'إرشاد الساري شرح السنة للبربهاري',
-        'keywords': ['شرح السنة', 'البربهاري', 'إرشاد الساري'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'أحمد النجمي',
-        'category': 'Aqeedah',
-        'days_masjid': ['Saturday']
-    },
-    {
-        'name': 'صحيح البخاري',
-        'keywords': ['صحيح البخاري', 'البخاري'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'محمد بن إسماعيل البخاري',
-        'category': 'Hadeeth',
-        'days_masjid': ['Friday']
-    },
-    {
-        'name': 'المورد العذب الزلال',
-        'keywords': ['المورد العذب', 'الزلال'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'أحمد النجمي',
-        'category': 'Aqeedah',
-        'days_masjid': ['Saturday']
-    },
-    {
-        'name': 'التحفة النجمية بشرح الأربعين النووية',
-        'keywords': ['التحفة النجمية', 'الأربعين النووية', 'النووية'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'أحمد النجمي',
-        'category': 'Hadeeth',
-        'days_masjid': ['Saturday']
-    },
-    {
-        'name': 'مختصر السيرة النبوية',
-        'keywords': ['مختصر السيرة', 'السيرة النبوية'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'محمد بن عبدالوهاب',
-        'category': 'Seerah',
-        'days_masjid': ['Saturday']
-    },
-    {
-        'name': 'تنبيه الانام على ما في كتاب سبل السلام من الفوائد والأحكام',
-        'keywords': ['تنبيه الانام', 'سبل السلام'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'أحمد النجمي',
-        'category': 'Fiqh',
-        'days_masjid': ['Saturday']
-    },
-    {
-        'name': 'غنية السائل بما في لامية شيخ الإسلام من مسائل',
-        'keywords': ['غنية السائل', 'لامية شيخ الإسلام'],
-        'location_masjid': True,
-        'location_online': False,
-        'author': 'أحمد النجمي',
-        'category': 'Aqeedah',
-        'days_masjid': ['Saturday']
-    }
+from extraction_cache import ExtractionCache, rules_fingerprint
+from message_index import MessageIndex, open_index
+from record_store import load_messages
+from series_catalog import load_catalog
+
+# Complete series list from WEEKLY_SCHEDULE_REFERENCE.md with search keywords,
+# and a keyword automaton over them (compiled from series_catalog.json)
+CATALOG = load_catalog()
+SERIES_DATABASE = CATALOG.series_database
+SERIES_AUTOMATON = CATALOG.series_automaton
+
+# What the extracted records depend on besides the messages (extraction_cache)
+RULES_FINGERPRINT = rules_fingerprint(
+    ['extract_manual_style', 'message_index', 'keyword_automaton', 'arabic_text', 'series_catalog'],
+    CATALOG.fingerprints['series'], CATALOG.fingerprints['weekly_slots'])
+
+FIELDNAMES = [
+    'TelegramFileName', 'Type', 'Topic', 'SeriesName', 'SubTopic',
+    'Serial', 'OriginalAuthor', 'Location/Online', 'Sheikh',
+    'DateInArabic', 'DateInGreg', 'DayOfWeek', 'ClipLength',
+    'Category', 'MatchedBy', 'doubtsStatus'
 ]
 
 
@@ -203,219 +104,247 @@ def extract_arabic_date(text):
     return 'Not Available'
 
 
-def main():
-    print("\n" + "="*80)
-    print("🎯 MANUAL-STYLE SERIES-BY-SERIES EXTRACTION")
-    print("   Processing like a human: one series at a time")
-    print("="*80 + "\n")
+def series_locations(series):
+    """Locations a series is held at, in the order they are processed"""
+    locations = []
+    if series.get('location_masjid'):
+        locations.append('جامع الورود')
+    if series.get('location_online'):
+        locations.append('Online')
+    return locations
+
+
+def series_record(msg, series, series_idx, location):
+    """CSV record of a message matched to a series at a location, plus
+    its day of week (None when the date is unknown)"""
+    text = msg['message_text']
+
+    # Parse date and day
+    date = parse_date(msg['greg_date'])
+    day_of_week = get_day_name(date)
+
+    # Optional: validate day of week if we have date
+    expected_days = series.get(f"days_{'online' if location == 'Online' else 'masjid'}", [])
+    if day_of_week and expected_days and day_of_week not in expected_days:
+        # Day doesn't match schedule, but include with doubt
+        doubt = f"Day mismatch: {day_of_week} (expected: {', '.join(expected_days)})"
+    else:
+        doubt = "none"
+
+    # Extract details
+    record = {
+        'TelegramFileName': msg['filename'],
+        'Type': 'Series',
+        'Topic': 'Not Available',
+        'SeriesName': series['name'],
+        'SubTopic': extract_subtopic(text),
+        'Serial': extract_serial(text),
+        'OriginalAuthor': series['author'],
+        'Location/Online': location,
+        'Sheikh': 'حسن بن محمد منصور الدغريري',
+        'DateInArabic': extract_arabic_date(text),
+        'DateInGreg': msg['greg_date'],
+        'DayOfWeek': day_of_week or 'Unknown',
+        'ClipLength': msg['clip_length'],
+        'Category': series['category'],
+        'MatchedBy': f'Manual-style ({series_idx})',
+        'doubtsStatus': doubt
+    }
+    return record, day_of_week
 
-    # Load messages
-    with open('messages_parsed.json', 'r', encoding='utf-8') as f:
-        messages = json.load(f)
 
-    print(f"Loaded {len(messages)} messages\n")
+def khutba_record(msg, day_of_week, location):
+    """CSV record of a Khutba (Friday sermon)"""
+    text = msg['message_text']
+
+    # Extract topic from Khutba
+    topic = 'Not Available'
+    topic_patterns = [
+        r'[\[【]([^\]】]+)[\]】]',
+        r'عنوان[:\s]+([^\n]+)',
+    ]
+    for pattern in topic_patterns:
+        match = re.search(pattern, text)
+        if match:
+            topic = match.group(1).strip()
+            break
+
+    return {
+        'TelegramFileName': msg['filename'],
+        'Type': 'Khutba',
+        'Topic': topic,
+        'SeriesName': 'Not Available',
+        'SubTopic': 'Not Available',
+        'Serial': 'Not Available',
+        'OriginalAuthor': 'Not Available',
+        'Location/Online': location,
+        'Sheikh': 'حسن بن محمد منصور الدغريري',
+        'DateInArabic': extract_arabic_date(text),
+        'DateInGreg': msg['greg_date'],
+        'DayOfWeek': day_of_week or 'Unknown',
+        'ClipLength': msg['clip_length'],
+        'Category': 'Other',
+        'MatchedBy': 'Khutba Detection',
+        'doubtsStatus': 'none' if day_of_week == 'Friday' else 'not on Friday'
+    }
+
+
+def unmatched_record(msg, day_of_week, location):
+    """CSV record of a message that matched no series"""
+    text = msg['message_text']
+    return {
+        'TelegramFileName': msg['filename'],
+        'Type': 'Unknown',
+        'Topic': 'Not Available',
+        'SeriesName': 'Not Available',
+        'SubTopic': extract_subtopic(text),
+        'Serial': extract_serial(text),
+        'OriginalAuthor': 'Not Available',
+        'Location/Online': location,
+        'Sheikh': 'حسن بن محمد منصور الدغريري',
+        'DateInArabic': extract_arabic_date(text),
+        'DateInGreg': msg['greg_date'],
+        'DayOfWeek': day_of_week or 'Unknown',
+        'ClipLength': msg['clip_length'],
+        'Category': 'Other',
+        'MatchedBy': 'Unmatched',
+        'doubtsStatus': 'Could not match to any series'
+    }
+
+
+def series_candidates(index):
+    """Indexes of the messages that may match a series: every keyword
+    looked up in the index, at the locations its series is held at. The
+    index compares normalized text, so it finds a superset of the messages
+    the keywords match exactly; only those are scanned."""
+    candidates = set()
+    for series in SERIES_DATABASE:
+        for location in series_locations(series):
+            for keyword in series['keywords']:
+                candidates.update(index.search(keyword, location=location))
+    return candidates
+
+
+def message_result(msg, candidate=True):
+    """(group, CSV record, day of week) of one message. The group is
+    (series index, location) of the first series (in SERIES_DATABASE
+    order) that has a keyword in it and is held at the message's location,
+    exactly as if the series were searched one by one and matched messages
+    skipped afterwards; else 'Khutba' or 'Unmatched'. ``candidate`` is
+    False when the index ruled out every series."""
+    text = msg['message_text']
+    location = 'Online' if is_online(text) else 'جامع الورود'
+
+    if candidate:
+        combined_text = f"{text} {msg['filename']}".lower()
+        for series_idx in sorted(SERIES_AUTOMATON.values_in(combined_text)):
+            series = SERIES_DATABASE[series_idx]
+            if location in series_locations(series):
+                record, day_of_week = series_record(msg, series, series_idx + 1, location)
+                return (series_idx, location), record, day_of_week
+
+    date = parse_date(msg['greg_date'])
+    day_of_week = get_day_name(date)
+
+    # Check if it's a Khutba
+    if ('خطبة' in text or 'الجمعة' in text) and 'صحيح البخاري' not in text:
+        return 'Khutba', khutba_record(msg, day_of_week, location), day_of_week
+
+    return 'Unmatched', unmatched_record(msg, day_of_week, location), day_of_week
+
+
+def extract_records(messages, index=None, cache=None):
+    """Run the series-by-series extraction and return the CSV records:
+    series matches first, then Khutbas, then unmatched messages.
+
+    ``index`` is the MessageIndex of messages (built in memory if None and
+    needed); with an ExtractionCache, only the messages it has no results
+    for are matched.
+    """
+    def extract_missing(positions):
+        nonlocal index
+        if index is None:
+            index = MessageIndex.build(messages)
+        candidates = series_candidates(index)
+        return [message_result(messages[msg_idx], msg_idx in candidates) for msg_idx in positions]
+
+    if cache is None:
+        results = extract_missing(range(len(messages)))
+    else:
+        results = cache.map(RULES_FINGERPRINT, messages, extract_missing)
+
+    series_matches = defaultdict(list)
+    khutbas = []
+    unmatched = []
+    for group, record, day_of_week in results:
+        if group == 'Khutba':
+            khutbas.append(record)
+        elif group == 'Unmatched':
+            unmatched.append(record)
+        else:
+            series_matches[group].append((record, day_of_week))
 
-    # Track which messages have been matched
-    matched_messages = set()
     all_results = []
 
-    # Process each series one by one
+    # Report and collect the matches series by series
     for series_idx, series in enumerate(SERIES_DATABASE, 1):
         print(f"\n{'='*80}")
         print(f"[{series_idx}/{len(SERIES_DATABASE)}] Processing: {series['name']}")
         print(f"{'='*80}")
 
-        # Determine which locations to check
-        locations_to_check = []
-        if series.get('location_masjid'):
-            locations_to_check.append('جامع الورود')
-        if series.get('location_online'):
-            locations_to_check.append('Online')
-
-        for location in locations_to_check:
+        for location in series_locations(series):
             print(f"\n📍 Location: {location}")
             print(f"🔍 Searching for keywords: {', '.join(series['keywords'][:3])}...")
 
-            series_matches = []
-
-            # Search through all messages
-            for msg_idx, msg in enumerate(messages):
-                # Skip if already matched
-                if msg_idx in matched_messages:
-                    continue
-
-                text = msg['message_text']
-                filename = msg['filename']
-                combined_text = f"{text} {filename}".lower()
-
-                # Check location match
-                msg_location = 'Online' if is_online(text) else 'جامع الورود'
-                if msg_location != location:
-                    continue
-
-                # Check if any keyword matches
-                keyword_match = False
-                for keyword in series['keywords']:
-                    if keyword.lower() in combined_text:
-                        keyword_match = True
-                        break
-
-                if not keyword_match:
-                    continue
-
-                # Parse date and day
-                date = parse_date(msg['greg_date'])
-                day_of_week = get_day_name(date)
-
-                # Optional: validate day of week if we have date
-                expected_days = series.get(f"days_{'online' if location == 'Online' else 'masjid'}", [])
-                if day_of_week and expected_days and day_of_week not in expected_days:
-                    # Day doesn't match schedule, but include with doubt
-                    doubt = f"Day mismatch: {day_of_week} (expected: {', '.join(expected_days)})"
-                else:
-                    doubt = "none"
-
-                # Extract details
-                record = {
-                    'TelegramFileName': filename,
-                    'Type': 'Series',
-                    'Topic': 'Not Available',
-                    'SeriesName': series['name'],
-                    'SubTopic': extract_subtopic(text),
-                    'Serial': extract_serial(text),
-                    'OriginalAuthor': series['author'],
-                    'Location/Online': location,
-                    'Sheikh': 'حسن بن محمد منصور الدغريري',
-                    'DateInArabic': extract_arabic_date(text),
-                    'DateInGreg': msg['greg_date'],
-                    'DayOfWeek': day_of_week or 'Unknown',
-                    'ClipLength': msg['clip_length'],
-                    'Category': series['category'],
-                    'MatchedBy': f'Manual-style ({series_idx})',
-                    'doubtsStatus': doubt
-                }
-
-                series_matches.append((msg_idx, record))
-                print(f"   ✓ {filename[:50]:50s} | {day_of_week or 'N/A':9s} | {record['Serial'][:20]}")
+            matches = series_matches[series_idx - 1, location]
+            for record, day_of_week in matches:
+                print(f"   ✓ {record['TelegramFileName'][:50]:50s} | {day_of_week or 'N/A':9s} | {record['Serial'][:20]}")
 
             # Add all matches for this series/location
-            for msg_idx, record in series_matches:
-                matched_messages.add(msg_idx)
-                all_results.append(record)
+            all_results.extend(record for record, _ in matches)
 
-            print(f"\n   Found {len(series_matches)} lessons for {series['name']} at {location}")
+            print(f"\n   Found {len(matches)} lessons for {series['name']} at {location}")
 
     # Handle Khutbas separately
     print(f"\n{'='*80}")
     print(f"[Special] Processing Khutbas (Friday Sermons)")
     print(f"{'='*80}\n")
 
-    khutba_count = 0
-    for msg_idx, msg in enumerate(messages):
-        if msg_idx in matched_messages:
-            continue
+    for record in khutbas:
+        print(f"   ✓ {record['TelegramFileName'][:50]:50s} | {record['Topic'][:30]}")
+    all_results.extend(khutbas)
 
-        text = msg['message_text']
-        date = parse_date(msg['greg_date'])
-        day_of_week = get_day_name(date)
-
-        # Check if it's a Khutba
-        if ('خطبة' in text or 'الجمعة' in text) and 'صحيح البخاري' not in text:
-            location = 'Online' if is_online(text) else 'جامع الورود'
-
-            # Extract topic from Khutba
-            topic = 'Not Available'
-            topic_patterns = [
-                r'[\[【]([^\]】]+)[\]】]',
-                r'عنوان[:\s]+([^\n]+)',
-            ]
-            for pattern in topic_patterns:
-                match = re.search(pattern, text)
-                if match:
-                    topic = match.group(1).strip()
-                    break
-
-            record = {
-                'TelegramFileName': msg['filename'],
-                'Type': 'Khutba',
-                'Topic': topic,
-                'SeriesName': 'Not Available',
-                'SubTopic': 'Not Available',
-                'Serial': 'Not Available',
-                'OriginalAuthor': 'Not Available',
-                'Location/Online': location,
-                'Sheikh': 'حسن بن محمد منصور الدغريري',
-                'DateInArabic': extract_arabic_date(text),
-                'DateInGreg': msg['greg_date'],
-                'DayOfWeek': day_of_week or 'Unknown',
-                'ClipLength': msg['clip_length'],
-                'Category': 'Other',
-                'MatchedBy': 'Khutba Detection',
-                'doubtsStatus': 'none' if day_of_week == 'Friday' else 'not on Friday'
-            }
-
-            matched_messages.add(msg_idx)
-            all_results.append(record)
-            khutba_count += 1
-            print(f"   ✓ {msg['filename'][:50]:50s} | {topic[:30]}")
-
-    print(f"\n   Found {khutba_count} Khutbas")
+    print(f"\n   Found {len(khutbas)} Khutbas")
 
     # Add unmatched messages
     print(f"\n{'='*80}")
     print(f"[Remaining] Unmatched Messages")
     print(f"{'='*80}\n")
 
-    unmatched_count = 0
-    for msg_idx, msg in enumerate(messages):
-        if msg_idx in matched_messages:
-            continue
+    all_results.extend(unmatched)
 
-        text = msg['message_text']
-        date = parse_date(msg['greg_date'])
-        day_of_week = get_day_name(date)
-        location = 'Online' if is_online(text) else 'جامع الورود'
-
-        record = {
-            'TelegramFileName': msg['filename'],
-            'Type': 'Unknown',
-            'Topic': 'Not Available',
-            'SeriesName': 'Not Available',
-            'SubTopic': extract_subtopic(text),
-            'Serial': extract_serial(text),
-            'OriginalAuthor': 'Not Available',
-            'Location/Online': location,
-            'Sheikh': 'حسن بن محمد منصور الدغريري',
-            'DateInArabic': extract_arabic_date(text),
-            'DateInGreg': msg['greg_date'],
-            'DayOfWeek': day_of_week or 'Unknown',
-            'ClipLength': msg['clip_length'],
-            'Category': 'Other',
-            'MatchedBy': 'Unmatched',
-            'doubtsStatus': 'Could not match to any series'
-        }
-
-        all_results.append(record)
-        unmatched_count += 1
-
-    print(f"   {unmatched_count} messages could not be matched to any series")
+    print(f"   {len(unmatched)} messages could not be matched to any series")
 
-    # Save to CSV
-    output_file = 'extracted_lectures_manual_style.csv'
+    return all_results
 
-    fieldnames = [
-        'TelegramFileName', 'Type', 'Topic', 'SeriesName', 'SubTopic',
-        'Serial', 'OriginalAuthor', 'Location/Online', 'Sheikh',
-        'DateInArabic', 'DateInGreg', 'DayOfWeek', 'ClipLength',
-        'Category', 'MatchedBy', 'doubtsStatus'
-    ]
+
+def save_csv(records, output_file, append=False):
+    """Write records to the CSV (UTF-8 BOM for Excel), or append them
+    to an existing one"""
+    if append and os.path.exists(output_file):
+        with open(output_file, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
+            writer.writerows(records)
+        return
 
     with open(output_file, 'w', newline='', encoding='utf-8-sig') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer = csv.DictWriter(csvfile, fieldnames=FIELDNAMES)
         writer.writeheader()
-        writer.writerows(all_results)
+        writer.writerows(records)
+
 
-    # Print summary
+def print_summary(all_results, output_file):
+    """Print match statistics and the per-series breakdown"""
     print(f"\n{'='*80}")
     print("📊 EXTRACTION SUMMARY")
     print(f"{'='*80}")
@@ -446,5 +375,29 @@ def main():
     print(f"\n{'='*80}\n")
 
 
+def main(input_file='messages_parsed.json',
+         output_file='extracted_lectures_manual_style.csv'):
+    print("\n" + "="*80)
+    print("🎯 MANUAL-STYLE SERIES-BY-SERIES EXTRACTION")
+    print("   Processing like a human: one series at a time")
+    print("="*80 + "\n")
+
+    # Load messages
+    messages = load_messages(input_file)
+
+    print(f"Loaded {len(messages)} messages\n")
+
+    index = open_index(input_file, messages)
+    with ExtractionCache() as cache:
+        all_results = extract_records(messages, index, cache)
+        print(f"\n{cache.summary()}")
+    index.close()
+
+    # Save to CSV
+    save_csv(all_results, output_file)
+
+    print_summary(all_results, output_file)
+
+
 if __name__ == "__main__":
     main()
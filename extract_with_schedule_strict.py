@@ -4,173 +4,31 @@ Extract data using STRICT schedule matching from WEEKLY_SCHEDULE_REFERENCE.md
 This is the most accurate extraction method.
 """
 
-import json
 import csv
 import re
 from datetime import datetime
 from collections import defaultdict
+from types import MappingProxyType
 
-# Authoritative schedule from WEEKLY_SCHEDULE_REFERENCE.md
-SCHEDULE = {
-    'Saturday': [
-        {
-            'name': 'غنية السائل بما في لامية شيخ الإسلام من مسائل',
-            'type': 'Lecture',
-            'author': 'أحمد النجمي',
-            'location': 'جامع الورود',
-            'category': 'Aqeedah'
-        },
-        {
-            'name': 'المورد العذب الزلال',
-            'type': 'Series',
-            'author': 'أحمد النجمي',
-            'location': 'جامع الورود',
-            'category': 'Aqeedah'
-        },
-        {
-            'name': 'إرشاد الساري شرح السنة للبربهاري',
-            'type': 'Series',
-            'author': 'أحمد النجمي',
-            'location': 'جامع الورود',
-            'category': 'Aqeedah',
-            'aliases': ['شرح السنة للبربهاري', 'شرح السنة']
-        },
-        {
-            'name': 'التحفة النجمية بشرح الأربعين النووية',
-            'type': 'Series',
-            'author': 'أحمد النجمي',
-            'location': 'جامع الورود',
-            'category': 'Hadeeth'
-        },
-        {
-            'name': 'مختصر السيرة النبوية',
-            'type': 'Series',
-            'author': 'محمد بن عبدالوهاب',
-            'location': 'جامع الورود',
-            'category': 'Seerah'
-        },
-        {
-            'name': 'تنبيه الانام على ما في كتاب سبل السلام من الفوائد والأحكام',
-            'type': 'Series',
-            'author': 'أحمد النجمي',
-            'location': 'جامع الورود',
-            'category': 'Fiqh',
-            'aliases': ['تنبيه الانام', 'سبل السلام']
-        },
-        {
-            'name': 'التفسير الميسر',
-            'type': 'Series',
-            'author': 'نخبة من أهل العلم',
-            'location': 'جامع الورود',
-            'category': 'Other'
-        }
-    ],
-    'Sunday': [
-        {
-            'name': 'الملخص شرح كتاب التوحيد',
-            'type': 'Series',
-            'author': 'صالح الفوزان',
-            'location': 'جامع الورود',
-            'category': 'Aqeedah',
-            'aliases': ['الملخص في شرح كتاب التوحيد', 'كتاب التوحيد']
-        },
-        {
-            'name': 'تأسيس الأحكام شرح عمدة الأحكام',
-            'type': 'Series',
-            'author': 'أحمد بن يحيى النجمي',
-            'location': 'جامع الورود',
-            'category': 'Hadeeth',
-            'aliases': ['تأسيس الأحكام', 'عمدة الأحكام']
-        },
-        {
-            'name': 'الأفنان الندية',
-            'type': 'Series',
-            'author': 'زيد بن هادي المدخلي',
-            'location': 'Online',
-            'category': 'Fiqh',
-            'aliases': ['الأفنان الندية شرح السبل السوية']
-        }
-    ],
-    'Monday': [
-        {
-            'name': 'الملخص الفقهي',
-            'type': 'Series',
-            'author': 'صالح الفوزان',
-            'location': 'جامع الورود',
-            'category': 'Fiqh'
-        },
-        {
-            'name': 'تأسيس الأحكام شرح عمدة الأحكام',
-            'type': 'Series',
-            'author': 'أحمد بن يحيى النجمي',
-            'location': 'جامع الورود',
-            'category': 'Hadeeth',
-            'aliases': ['تأسيس الأحكام', 'عمدة الأحكام']
-        },
-        {
-            'name': 'الأفنان الندية',
-            'type': 'Series',
-            'author': 'زيد بن هادي المدخلي',
-            'location': 'Online',
-            'category': 'Fiqh',
-            'aliases': ['الأفنان الندية شرح السبل السوية']
-        }
-    ],
-    'Tuesday': [
-        {
-            'name': 'الملخص شرح كتاب التوحيد',
-            'type': 'Series',
-            'author': 'صالح الفوزان',
-            'location': 'جامع الورود',
-            'category': 'Aqeedah',
-            'aliases': ['الملخص في شرح كتاب التوحيد', 'كتاب التوحيد']
-        },
-        {
-            'name': 'معارج القبول شرح منظومة سلم الوصول',
-            'type': 'Series',
-            'author': 'حافظ حكمي',
-            'location': 'Online',
-            'category': 'Aqeedah',
-            'aliases': ['منظومة سلم الوصول', 'سلم الوصول', 'معارج القبول']
-        }
-    ],
-    'Wednesday': [
-        {
-            'name': 'الملخص الفقهي',
-            'type': 'Series',
-            'author': 'صالح الفوزان',
-            'location': 'جامع الورود',
-            'category': 'Fiqh'
-        },
-        {
-            'name': 'تأسيس الأحكام شرح عمدة الأحكام',
-            'type': 'Series',
-            'author': 'أحمد بن يحيى النجمي',
-            'location': 'Online',
-            'category': 'Hadeeth',
-            'aliases': ['تأسيس الأحكام', 'عمدة الأحكام']
-        }
-    ],
-    'Thursday': [
-        # No regular scheduled classes
-    ],
-    'Friday': [
-        {
-            'name': 'خطبة الجمعة',
-            'type': 'Khutba',
-            'author': 'Not Available',
-            'location': 'جامع الورود',
-            'category': 'Other'
-        },
-        {
-            'name': 'صحيح البخاري',
-            'type': 'Series',
-            'author': 'محمد بن إسماعيل البخاري',
-            'location': 'جامع الورود',
-            'category': 'Hadeeth'
-        }
-    ]
-}
+from extraction_cache import ExtractionCache, rules_fingerprint
+from record_store import load_messages
+from series_catalog import load_catalog
+
+# Authoritative schedule from WEEKLY_SCHEDULE_REFERENCE.md (compiled from
+# series_catalog.json): weekday -> series entries, names and aliases in
+# matching form (normalized once) in 'normalized_names', name first
+CATALOG = load_catalog()
+SCHEDULE = CATALOG.schedule
+
+# (weekday, location) -> (normalized name, series) of that day's series at
+# that location, longest name first; (weekday, None) -> the same over all
+# of the day's series, the fallback when none of them is at the location
+SCHEDULE_INDEX = MappingProxyType(CATALOG.schedule_index)
+
+# What the extracted records depend on besides the messages (extraction_cache)
+RULES_FINGERPRINT = rules_fingerprint(
+    ['extract_with_schedule_strict', 'record_store', 'arabic_text', 'series_catalog'],
+    CATALOG.fingerprints['series'], CATALOG.fingerprints['weekly_slots'])
 
 
 def parse_date(date_str):
@@ -201,55 +59,18 @@ def is_online(text):
     return any(indicator in text for indicator in online_indicators)
 
 
-def normalize_text(text):
-    """Normalize Arabic text for matching"""
-    if not text:
-        return ""
-    # Remove tashkeel and extra spaces
-    text = re.sub(r'[\u064B-\u065F]', '', text)  # Remove diacritics
-    text = re.sub(r'\s+', ' ', text)  # Normalize spaces
-    return text.strip()
-
-
-def match_series(message_text, day_of_week, location):
-    """Match message to series using schedule"""
-    if not day_of_week or day_of_week not in SCHEDULE:
-        return None
-
-    normalized_text = normalize_text(message_text)
-    day_series = SCHEDULE[day_of_week]
-
-    # Filter by location first
-    candidates = [s for s in day_series if s['location'] == location]
-
-    if not candidates:
-        # If no exact location match, try all series for that day
-        candidates = day_series
-
-    # Try to match series name
-    best_match = None
-    best_score = 0
+def match_series(normalized_text, day_of_week, location):
+    """Match a message (its normalize_arabic() form) to series using schedule:
+    the series with the longest name or alias in the text, among that day's
+    series at the location (all of that day's series when none is there)"""
+    matcher = SCHEDULE_INDEX.get((day_of_week, location))
+    if matcher is None:
+        matcher = SCHEDULE_INDEX.get((day_of_week, None), ())
 
-    for series in candidates:
-        # Check main name
-        series_normalized = normalize_text(series['name'])
-        if series_normalized in normalized_text:
-            score = len(series_normalized)
-            if score > best_score:
-                best_score = score
-                best_match = series
-
-        # Check aliases
-        if 'aliases' in series:
-            for alias in series['aliases']:
-                alias_normalized = normalize_text(alias)
-                if alias_normalized in normalized_text:
-                    score = len(alias_normalized)
-                    if score > best_score:
-                        best_score = score
-                        best_match = series
-
-    return best_match
+    for name, series in matcher:
+        if name in normalized_text:
+            return series
+    return None
 
 
 def extract_serial(text):
@@ -317,6 +138,93 @@ def extract_arabic_date(text):
     return 'Not Available'
 
 
+def extract_record(msg):
+    """(CSV record, statistics counter, day of week) of one message; the
+    counter is 'khutbas', 'matched_by_schedule' or 'unmatched'"""
+    # Parse date
+    date = parse_date(msg['greg_date'])
+    day_of_week = get_day_name(date) if date else None
+
+    # Determine location
+    text = msg['message_text']
+    location = 'Online' if is_online(text) else 'جامع الورود'
+
+    # Check if it's a Khutba (Friday sermon)
+    is_khutba = (day_of_week == 'Friday' and
+                 ('خطبة' in text or 'الجمعة' in text) and
+                 'صحيح البخاري' not in text)
+
+    if is_khutba:
+        # Handle Khutba separately
+        record = {
+            'TelegramFileName': msg['filename'],
+            'Type': 'Khutba',
+            'Topic': extract_topic_for_khutba(text),
+            'SeriesName': 'Not Available',
+            'SubTopic': 'Not Available',
+            'Serial': 'Not Available',
+            'OriginalAuthor': 'Not Available',
+            'Location/Online': location,
+            'Sheikh': 'حسن بن محمد منصور الدغريري',
+            'DateInArabic': extract_arabic_date(text),
+            'DateInGreg': msg['greg_date'],
+            'DayOfWeek': day_of_week or 'Unknown',
+            'ClipLength': msg['clip_length'],
+            'Category': 'Other',
+            'MatchedBy': 'Khutba Detection',
+            'doubtsStatus': 'none' if day_of_week == 'Friday' else 'not on Friday'
+        }
+        outcome = 'khutbas'
+    else:
+        # Try to match using schedule
+        matched_series = match_series(msg['normalized_text'], day_of_week, location)
+
+        if matched_series:
+            # Matched successfully
+            record = {
+                'TelegramFileName': msg['filename'],
+                'Type': matched_series['type'],
+                'Topic': 'Not Available' if matched_series['type'] == 'Series' else extract_topic_for_khutba(text),
+                'SeriesName': matched_series['name'],
+                'SubTopic': extract_subtopic(text),
+                'Serial': extract_serial(text),
+                'OriginalAuthor': matched_series['author'],
+                'Location/Online': matched_series['location'],
+                'Sheikh': 'حسن بن محمد منصور الدغريري',
+                'DateInArabic': extract_arabic_date(text),
+                'DateInGreg': msg['greg_date'],
+                'DayOfWeek': day_of_week or 'Unknown',
+                'ClipLength': msg['clip_length'],
+                'Category': matched_series['category'],
+                'MatchedBy': f'Schedule ({day_of_week})',
+                'doubtsStatus': 'none'
+            }
+            outcome = 'matched_by_schedule'
+        else:
+            # Could not match
+            record = {
+                'TelegramFileName': msg['filename'],
+                'Type': 'Unknown',
+                'Topic': 'Not Available',
+                'SeriesName': 'Not Available',
+                'SubTopic': extract_subtopic(text),
+                'Serial': extract_serial(text),
+                'OriginalAuthor': 'Not Available',
+                'Location/Online': location,
+                'Sheikh': 'حسن بن محمد منصور الدغريري',
+                'DateInArabic': extract_arabic_date(text),
+                'DateInGreg': msg['greg_date'],
+                'DayOfWeek': day_of_week or 'Unknown',
+                'ClipLength': msg['clip_length'],
+                'Category': 'Other',
+                'MatchedBy': 'Not Matched',
+                'doubtsStatus': f'Could not match to schedule (Day: {day_of_week}, Location: {location})'
+            }
+            outcome = 'unmatched'
+
+    return record, outcome, day_of_week
+
+
 def main():
     print("\n" + "="*80)
     print("📚 SCHEDULE-BASED STRICT EXTRACTION")
@@ -324,8 +232,7 @@ def main():
     print("="*80 + "\n")
 
     # Load messages
-    with open('messages_parsed.json', 'r', encoding='utf-8') as f:
-        messages = json.load(f)
+    messages = load_messages('messages_parsed.json')
 
     print(f"Loaded {len(messages)} messages\n")
 
@@ -338,93 +245,17 @@ def main():
         'by_day': defaultdict(int)
     }
 
-    for i, msg in enumerate(messages):
-        print(f"Processing {i+1}/{len(messages)}: {msg['filename'][:50]}...")
+    with ExtractionCache() as cache:
+        extracted = cache.map(RULES_FINGERPRINT, messages,
+                              lambda missing: [extract_record(messages[i]) for i in missing])
+        print(cache.summary() + "\n")
 
-        # Parse date
-        date = parse_date(msg['greg_date'])
-        day_of_week = get_day_name(date) if date else None
+    for i, (msg, (record, outcome, day_of_week)) in enumerate(zip(messages, extracted)):
+        print(f"Processing {i+1}/{len(messages)}: {msg['filename'][:50]}...")
 
         if day_of_week:
             stats['by_day'][day_of_week] += 1
-
-        # Determine location
-        text = msg['message_text']
-        location = 'Online' if is_online(text) else 'جامع الورود'
-
-        # Check if it's a Khutba (Friday sermon)
-        is_khutba = (day_of_week == 'Friday' and
-                     ('خطبة' in text or 'الجمعة' in text) and
-                     'صحيح البخاري' not in text)
-
-        if is_khutba:
-            # Handle Khutba separately
-            record = {
-                'TelegramFileName': msg['filename'],
-                'Type': 'Khutba',
-                'Topic': extract_topic_for_khutba(text),
-                'SeriesName': 'Not Available',
-                'SubTopic': 'Not Available',
-                'Serial': 'Not Available',
-                'OriginalAuthor': 'Not Available',
-                'Location/Online': location,
-                'Sheikh': 'حسن بن محمد منصور الدغريري',
-                'DateInArabic': extract_arabic_date(text),
-                'DateInGreg': msg['greg_date'],
-                'DayOfWeek': day_of_week or 'Unknown',
-                'ClipLength': msg['clip_length'],
-                'Category': 'Other',
-                'MatchedBy': 'Khutba Detection',
-                'doubtsStatus': 'none' if day_of_week == 'Friday' else 'not on Friday'
-            }
-            stats['khutbas'] += 1
-        else:
-            # Try to match using schedule
-            matched_series = match_series(text, day_of_week, location)
-
-            if matched_series:
-                # Matched successfully
-                record = {
-                    'TelegramFileName': msg['filename'],
-                    'Type': matched_series['type'],
-                    'Topic': 'Not Available' if matched_series['type'] == 'Series' else extract_topic_for_khutba(text),
-                    'SeriesName': matched_series['name'],
-                    'SubTopic': extract_subtopic(text),
-                    'Serial': extract_serial(text),
-                    'OriginalAuthor': matched_series['author'],
-                    'Location/Online': matched_series['location'],
-                    'Sheikh': 'حسن بن محمد منصور الدغريري',
-                    'DateInArabic': extract_arabic_date(text),
-                    'DateInGreg': msg['greg_date'],
-                    'DayOfWeek': day_of_week or 'Unknown',
-                    'ClipLength': msg['clip_length'],
-                    'Category': matched_series['category'],
-                    'MatchedBy': f'Schedule ({day_of_week})',
-                    'doubtsStatus': 'none'
-                }
-                stats['matched_by_schedule'] += 1
-            else:
-                # Could not match
-                record = {
-                    'TelegramFileName': msg['filename'],
-                    'Type': 'Unknown',
-                    'Topic': 'Not Available',
-                    'SeriesName': 'Not Available',
-                    'SubTopic': extract_subtopic(text),
-                    'Serial': extract_serial(text),
-                    'OriginalAuthor': 'Not Available',
-                    'Location/Online': location,
-                    'Sheikh': 'حسن بن محمد منصور الدغريري',
-                    'DateInArabic': extract_arabic_date(text),
-                    'DateInGreg': msg['greg_date'],
-                    'DayOfWeek': day_of_week or 'Unknown',
-                    'ClipLength': msg['clip_length'],
-                    'Category': 'Other',
-                    'MatchedBy': 'Not Matched',
-                    'doubtsStatus': f'Could not match to schedule (Day: {day_of_week}, Location: {location})'
-                }
-                stats['unmatched'] += 1
-
+        stats[outcome] += 1
         results.append(record)
 
     # Save to CSV
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Persistent, content-addressed cache of extraction results.
+
+Re-running an extractor over an export that grew by a few messages used to
+extract every message again. What an extractor makes of a message depends
+only on the message fields it reads and on its rules: its code and the
+parts of series_catalog.json it uses. Results are therefore cached in a
+small SQLite database (extraction_cache.sqlite) under
+
+    blake2b(rules fingerprint, message text, filename, date, clip length)
+
+so a rerun extracts only the messages whose key is missing: new messages,
+and all messages of an extractor whose rules changed (a new fingerprint
+makes every key of that extractor new, while the other extractors keep
+theirs). The text is keyed as it is, not normalized, since the records
+quote parts of it.
+
+Every run is one tick of the cache's clock, and each entry remembers the
+tick it was last read or written at; beyond max_entries the least
+recently used entries are evicted when the cache is closed.
+
+Usage:
+    python extraction_cache.py            # show what the cache holds
+    python extraction_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import sqlite3
+
+CACHE_FILE = 'extraction_cache.sqlite'
+MAX_ENTRIES = 100_000
+
+# Message fields the extractors read (normalized_text is derived from the text)
+MESSAGE_FIELDS = ('message_text', 'filename', 'greg_date', 'clip_length')
+
+# Keys per SELECT ... IN (...), under SQLite's limit on statement parameters
+_BATCH = 500
+
+
+def rules_fingerprint(modules, *parts):
+    """SHA-256 of the source of the named modules and of the given parts
+    (catalog fingerprints, tables; anything JSON-serializable)"""
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(importlib.util.find_spec(module).origin, 'rb') as f:
+            digest.update(f.read())
+        digest.update(b'\0')
+    for part in parts:
+        digest.update(json.dumps(part, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def message_key(fingerprint, message):
+    """16-byte digest of a rules fingerprint and the fields of a message
+    (a missing field is told apart from any string)"""
+    values = [message.get(field) for field in MESSAGE_FIELDS]
+    content = '\0'.join([fingerprint] + ['\1' if value is None else str(value) for value in values])
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+
+
+class ExtractionCache:
+    """Extraction results by message key, least recently used evicted
+    beyond ``max_entries``"""
+
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS results ('
+                        'key BLOB PRIMARY KEY, value BLOB, used INTEGER)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+        self.db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)')
+
+        row = self.db.execute("SELECT value FROM meta WHERE name = 'clock'").fetchone()
+        self.clock = (row[0] if row else 0) + 1
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('clock', ?)", (self.clock,))
+
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+
+    def lookup(self, keys):
+        """key -> cached result of those keys that are cached, marking them used"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), _BATCH):
+            batch = keys[start:start + _BATCH]
+            placeholders = ', '.join('?' * len(batch))
+            rows = self.db.execute(f'SELECT key, value FROM results WHERE key IN ({placeholders})', batch)
+            found.update((key, pickle.loads(value)) for key, value in rows)
+            self.db.execute(f'UPDATE results SET used = ? WHERE key IN ({placeholders})', [self.clock] + batch)
+        return found
+
+    def store(self, results):
+        """Cache (key, result) pairs"""
+        self.db.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                            ((key, pickle.dumps(result, pickle.HIGHEST_PROTOCOL), self.clock)
+                             for key, result in results))
+
+    def map(self, fingerprint, messages, extract_missing):
+        """Results of all messages, in order: the cached ones under the
+        fingerprint, and extract_missing(positions) -> results of the
+        messages at those positions for the rest (called once, if at all)"""
+        keys = [message_key(fingerprint, message) for message in messages]
+        found = self.lookup(keys)
+        missing = [position for position, key in enumerate(keys) if key not in found]
+
+        self.stats['hits'] += len(keys) - len(missing)
+        self.stats['misses'] += len(missing)
+        if missing:
+            extracted = dict(zip((keys[position] for position in missing), extract_missing(missing)))
+            self.store(extracted.items())
+            found.update(extracted)
+        return [found[key] for key in keys]
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def evict(self):
+        """Drop the least recently used entries beyond max_entries"""
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self.db.execute('DELETE FROM results WHERE key IN ('
+                            'SELECT key FROM results ORDER BY used, rowid LIMIT ?)', (excess,))
+            self.stats['evicted'] += excess
+
+    def summary(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = self.stats['hits'] / lookups * 100 if lookups else 0.0
+        return (f"🗃️  Extraction cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+                f"({rate:.1f}% hit rate), {len(self)} entries in {self.path}")
+
+    def close(self):
+        self.evict()
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or clear the extraction cache")
+    parser.add_argument('--cache', default=CACHE_FILE, help="extraction cache database")
+    parser.add_argument('--max-entries', type=int, default=MAX_ENTRIES,
+                        help="evict least recently used entries beyond this many")
+    parser.add_argument('--clear', action='store_true', help="delete the cache")
+    args = parser.parse_args()
+
+    if args.clear:
+        if os.path.exists(args.cache):
+            os.remove(args.cache)
+        print(f"🗑️  Cleared {args.cache}")
+        return
+
+    with ExtractionCache(args.cache, args.max_entries) as cache:
+        entries = len(cache)
+        runs = cache.db.execute('SELECT COUNT(DISTINCT used) FROM results').fetchone()[0]
+        cache.evict()
+        print(f"🗃️  {args.cache}: {entries} cached results, last used in {runs} different runs")
+        if cache.stats['evicted']:
+            print(f"   Evicted {cache.stats['evicted']} least recently used (limit {args.max_entries})")
+
+
+if __name__ == '__main__':
+    main()
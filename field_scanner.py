@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Field rules of the regex extractors, evaluated per message with shared
+trigger lookups.
+
+The regex extractors (ImprovedLectureExtractor, LectureExtractor)
+recognize each field (type, topic, subtopic, serial, author, location,
+Hijri date) with a priority-ordered list of patterns, and every pattern
+used to search the whole message from its start: a message was scanned
+dozens of times, mostly to find nothing.
+Almost every pattern starts with fixed text (a keyword such as 'الدرس'
+or 'للعلامة:', a marker such as '❲' or '▪️'), and a match can only start
+where that text occurs. So:
+
+- each FieldRule is compiled once, and its triggers (literal prefixes one
+  of which starts every match) are read off the parsed pattern
+- a MessageScan looks up where each trigger first occurs in the message,
+  once per trigger, for whichever field asks first
+- a rule whose triggers are all absent is skipped without running its
+  regex; otherwise the regex starts at the first trigger occurrence
+
+Rules without a literal prefix (the dates starting with a digit) search
+from the start of the text. Results are exactly those of re.search().
+
+    scan = MessageScan(text)
+    match = scan.first(SERIAL_RULES)    # -> first match of the first matching rule
+"""
+
+import re
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+# Rules with more literal prefixes than this are searched without triggers
+MAX_TRIGGERS = 32
+
+
+def _prefixes(items):
+    """(prefixes, complete) of a parsed pattern: literal prefixes one of
+    which starts every match, and whether they are the whole pattern"""
+    prefixes = ['']
+    for op, arg in items:
+        if op is sre_constants.LITERAL:
+            prefixes = [prefix + chr(arg) for prefix in prefixes]
+            continue
+
+        if op is sre_constants.SUBPATTERN and not arg[1]:
+            parts = [_prefixes(arg[-1])]
+        elif op is sre_constants.BRANCH:
+            parts = [_prefixes(branch) for branch in arg[1]]
+        else:
+            return prefixes, False
+
+        prefixes = [prefix + head for prefix in prefixes for part, _ in parts for head in part]
+        if len(prefixes) > MAX_TRIGGERS or not all(complete for _, complete in parts):
+            return prefixes, False
+    return prefixes, True
+
+
+class FieldRule:
+    """A compiled field pattern and the triggers its matches start with
+    (None when it has no literal prefix)"""
+
+    __slots__ = ('regex', 'triggers')
+
+    def __init__(self, pattern):
+        self.regex = re.compile(pattern)
+        prefixes, _ = _prefixes(sre_parse.parse(pattern))
+        if all(prefixes) and len(prefixes) <= MAX_TRIGGERS:
+            self.triggers = tuple(dict.fromkeys(prefixes))
+        else:
+            self.triggers = None
+
+
+def compile_rules(patterns):
+    return [FieldRule(pattern) for pattern in patterns]
+
+
+class MessageScan:
+    """Trigger positions of one message, looked up on demand"""
+
+    __slots__ = ('text', 'positions')
+
+    def __init__(self, text):
+        self.text = text
+        self.positions = {}
+
+    def position(self, trigger):
+        """First position of trigger in the text, or -1"""
+        position = self.positions.get(trigger)
+        if position is None:
+            position = self.positions[trigger] = self.text.find(trigger)
+        return position
+
+    def search(self, rule):
+        """rule.regex.search(text), starting at the first trigger"""
+        triggers = rule.triggers
+        if triggers is None:
+            return rule.regex.search(self.text)
+
+        positions = self.positions
+        start = -1
+        for trigger in triggers:
+            position = positions.get(trigger)
+            if position is None:
+                position = self.position(trigger)
+            if position != -1 and (start == -1 or position < start):
+                start = position
+        if start == -1:
+            return None
+        return rule.regex.search(self.text, start)
+
+    def first(self, rules):
+        """Match of the first rule (in order) that matches, or None"""
+        for rule in rules:
+            match = self.search(rule)
+            if match:
+                return match
+        return None
+
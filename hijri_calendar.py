@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Umm al-Qura calendar for 1350-1500 AH as precomputed day tables.
+
+parse_archive_messages.py used to build a hijri_converter Hijri object for
+every message it converted. The Umm al-Qura calendar is a published table
+of month lengths, so it is kept here as one:
+
+- MONTH_LENGTHS has three hex digits per year, a 12-bit mask in which bit
+  i set means month i + 1 has 30 days (else 29); the one shorter month
+  of the published table is listed in SHORT_MONTHS
+- at import, month_starts (the Gregorian ordinal of the first day of every
+  month, plus one past the end) and day_months (for every day of the
+  range, the index of its month) are built from it as compact arrays
+
+Hijri -> Gregorian is month_starts[month index] + day - 1 and Gregorian ->
+Hijri is day_months[ordinal - first ordinal] plus the offset into that
+month: a couple of array lookups either way. to_gregorian_many() and
+to_hijri_many() convert whole columns of dates at once, doing the same
+lookups as NumPy array operations over NumPy views of the tables.
+
+The month lengths are those of hijri-converter's Umm al-Qura data (which
+supports 1343-1500 AH), 1 Muharram 1350 being 19 May 1931 and 30 Dhu
+al-Hijjah 1500 being 16 November 2077.
+
+Usage:
+    python hijri_calendar.py 5/2/1447 1447-02-05 2025-07-31
+"""
+
+import re
+import sys
+from array import array
+from datetime import date
+
+import numpy as np
+
+FIRST_YEAR = 1350
+LAST_YEAR = 1500
+
+# 1 Muharram FIRST_YEAR
+FIRST_DAY = date(1931, 5, 19)
+
+MONTH_LENGTHS = (
+    'b4ab155559ad56ab554d4d5564b497'  # 1350-1359
+    'd55555555d55755d55555555d556d5'  # 1360-1369
+    '555ea5d2aaaacd5655572da9555aaa'  # 1370-1379
+    '55552da6d55a55574dd53d54556d55'  # 1380-1389
+    '2d5d55d54d4565552da5d55aad56aa'  # 1390-1399
+    'd4b52aa574ae97656cb55aaaa554ad'  # 1400-1409
+    '95d2da5d9db2ba4b4aa552b5575b6a'  # 1410-1419
+    'bd2bc4b89a9552d5adb6a6d4dc9d92'  # 1420-1429
+    'aa69562ae56d36ab55aaa94d49d95d'  # 1430-1439
+    '2ba5b55aad55a9a92e26e55dada6d4'  # 1440-1449
+    '6a554ba9754eaae5acba9d92b2564b'  # 1450-1459
+    'cab55ab556d2ea5e4aa9552daad36c'  # 1460-1469
+    '7596d269552da5b4ba9ba3b4b69b52'  # 1470-1479
+    'aa64b696d2ec6d9eb2d54d2aa564ae'  # 1480-1489
+    '96dd6ab54b29a9352ba57536ab56aa'  # 1490-1499
+    'e93'                             # 1500
+)
+
+# (year, month) -> length, for months shorter than 29 days
+SHORT_MONTHS = {(1364, 8): 28}
+
+
+def _build_tables():
+    lengths = []
+    for year_index in range(LAST_YEAR - FIRST_YEAR + 1):
+        mask = int(MONTH_LENGTHS[3 * year_index:3 * year_index + 3], 16)
+        for month in range(12):
+            lengths.append(SHORT_MONTHS.get((FIRST_YEAR + year_index, month + 1),
+                                            30 if mask >> month & 1 else 29))
+
+    month_starts = array('l', [FIRST_DAY.toordinal()])
+    for length in lengths:
+        month_starts.append(month_starts[-1] + length)
+    day_months = array('H')
+    for index, length in enumerate(lengths):
+        day_months.extend(array('H', [index]) * length)
+    return month_starts, day_months
+
+
+month_starts, day_months = _build_tables()
+FIRST_ORDINAL = month_starts[0]
+LAST_DAY = date.fromordinal(month_starts[-1] - 1)
+
+# The same tables as NumPy arrays (sharing their memory), for the column
+# conversions; datetime64[D] counts days from EPOCH_ORDINAL
+_starts = np.asarray(month_starts)
+_months = np.asarray(day_months)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def month_length(year, month):
+    """Days in a Hijri month (29 or 30)"""
+    index = _month_index(year, month)
+    return month_starts[index + 1] - month_starts[index]
+
+
+def _month_index(year, month):
+    if not (FIRST_YEAR <= year <= LAST_YEAR and 1 <= month <= 12):
+        raise ValueError(f"Hijri month {year}/{month} is outside {FIRST_YEAR}-{LAST_YEAR} AH")
+    return 12 * (year - FIRST_YEAR) + month - 1
+
+
+def to_ordinal(year, month, day):
+    """Gregorian ordinal (date.toordinal()) of a Hijri date"""
+    index = _month_index(year, month)
+    ordinal = month_starts[index] + day - 1
+    if day < 1 or ordinal >= month_starts[index + 1]:
+        raise ValueError(f"{year}/{month} has no day {day}")
+    return ordinal
+
+
+def to_gregorian(year, month, day):
+    """Gregorian date of a Hijri date; ValueError outside the table or for
+    a day the month does not have"""
+    return date.fromordinal(to_ordinal(year, month, day))
+
+
+def to_hijri(gregorian):
+    """(year, month, day) of a Gregorian date (or ordinal)"""
+    ordinal = gregorian if isinstance(gregorian, int) else gregorian.toordinal()
+    offset = ordinal - FIRST_ORDINAL
+    if not 0 <= offset < len(day_months):
+        raise ValueError(f"{date.fromordinal(ordinal)} is outside {FIRST_DAY} - {LAST_DAY}")
+    index = day_months[offset]
+    year, month = divmod(index, 12)
+    return FIRST_YEAR + year, month + 1, ordinal - month_starts[index] + 1
+
+
+def _hijri_parts(dates):
+    """(n, 3) int64 array of a column of Hijri dates and which rows parsed;
+    a rectangular column converts in one step, a mixed one row by row"""
+    if not isinstance(dates, np.ndarray):
+        dates = list(dates)
+    try:
+        parts = np.asarray(dates, dtype=np.int64).reshape(-1, 3)
+        if len(parts) == len(dates):
+            return parts, np.ones(len(parts), dtype=bool)
+    except (TypeError, ValueError, OverflowError):
+        pass
+
+    parts = np.zeros((len(dates), 3), dtype=np.int64)
+    valid = np.zeros(len(dates), dtype=bool)
+    for row, hijri in enumerate(dates):
+        try:
+            parts[row] = tuple(map(int, hijri))
+        except (TypeError, ValueError, OverflowError):
+            continue
+        valid[row] = True
+    return parts, valid
+
+
+def _ordinals(dates):
+    """int64 Gregorian ordinals of a column of dates (or of ordinals), and
+    which are present"""
+    column = np.asarray(dates)
+    if column.dtype.kind in 'iu':
+        return column.astype(np.int64), np.ones(len(column), dtype=bool)
+    days = np.asarray(dates, dtype='datetime64[D]')
+    present = ~np.isnat(days)
+    return np.where(present, days.astype(np.int64) + EPOCH_ORDINAL, 0), present
+
+
+def to_gregorian_many(dates):
+    """Gregorian dates of a column of (year, month, day) Hijri dates (parts
+    read with int()); None for missing or invalid ones"""
+    parts, valid = _hijri_parts(dates)
+    year, month, day = parts.T
+
+    index = 12 * (year - FIRST_YEAR) + month - 1
+    valid &= (month >= 1) & (month <= 12) & (index >= 0) & (index < len(_starts) - 1)
+    index = np.where(valid, index, 0)
+    ordinals = _starts[index] + day - 1
+    valid &= (day >= 1) & (ordinals < _starts[index + 1])
+
+    converted = (np.where(valid, ordinals, EPOCH_ORDINAL) - EPOCH_ORDINAL).astype('datetime64[D]')
+    converted = converted.astype(object)
+    converted[~valid] = None
+    return converted.tolist()
+
+
+def to_hijri_many(dates):
+    """(year, month, day) of a column of Gregorian dates (None for missing
+    ones) or of ordinals; None for those outside the table"""
+    ordinals, valid = _ordinals(dates if isinstance(dates, np.ndarray) else list(dates))
+    offsets = ordinals - FIRST_ORDINAL
+    valid &= (offsets >= 0) & (offsets < len(_months))
+
+    index = _months[np.where(valid, offsets, 0)].astype(np.int64)
+    years = FIRST_YEAR + index // 12
+    months = index % 12 + 1
+    days = ordinals - _starts[index] + 1
+    return [(year, month, day) if ok else None
+            for year, month, day, ok in zip(years.tolist(), months.tolist(), days.tolist(), valid.tolist())]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    for text in sys.argv[1:]:
+        try:
+            parts = [int(part) for part in re.split(r'[/\-.]', text)]
+            if len(parts) == 3 and parts[0] > 1900:
+                year, month, day = to_hijri(date(*parts))
+                print(f"{text} = {day}/{month}/{year} AH")
+            elif len(parts) == 3 and parts[0] >= FIRST_YEAR:
+                print(f"{text} AH = {to_gregorian(*parts)}")
+            elif len(parts) == 3:
+                print(f"{text} AH = {to_gregorian(parts[2], parts[1], parts[0])}")
+            else:
+                print(f"{text}: expected day/month/year or year-month-day")
+        except ValueError as e:
+            print(f"{text}: {e}")
+
+
+if __name__ == '__main__':
+    main()
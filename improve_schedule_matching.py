@@ -5,153 +5,132 @@ Reads the initial schedule-based CSV and improves unmatched records
 """
 
 import csv
+import os
 import re
-from collections import defaultdict
-
-# Keywords that indicate specific series
-SERIES_KEYWORDS = {
-    'تأسيس الأحكام شرح عمدة الأحكام': [
-        'تأسيس الأحكام', 'عمدة الأحكام', 'النكاح', 'الصلاة', 'الطهارة', 'الصيام',
-        'اللعان', 'أحمد النجمي', 'النجمي'
-    ],
-    'الملخص شرح كتاب التوحيد': [
-        'كتاب التوحيد', 'الملخص', 'التوحيد', 'صالح الفوزان', 'الفوزان'
-    ],
-    'الملخص الفقهي': [
-        'الملخص الفقهي', 'الفقهي', 'صالح الفوزان'
-    ],
-    'الأفنان الندية': [
-        'الأفنان الندية', 'الأفنان', 'الفرائض', 'البيوع', 'الربا',
-        'زيد المدخلي', 'المدخلي'
-    ],
-    'معارج القبول شرح منظومة سلم الوصول': [
-        'سلم الوصول', 'منظومة', 'معارج القبول', 'حافظ حكمي'
-    ],
-    'التفسير الميسر': [
-        'التفسير الميسر', 'سورة', 'الطارق', 'التكوير'
-    ],
-    'شرح السنة للبربهاري': [
-        'شرح السنة', 'البربهاري', 'السنة'
-    ],
-    'صحيح البخاري': [
-        'صحيح البخاري', 'البخاري'
-    ],
-    'المورد العذب الزلال': [
-        'المورد العذب', 'الزلال'
-    ],
-    'التحفة النجمية بشرح الأربعين النووية': [
-        'التحفة النجمية', 'الأربعين النووية', 'النووية'
-    ],
-    'مختصر السيرة النبوية': [
-        'مختصر السيرة', 'السيرة النبوية'
-    ],
-    'تنبيه الانام على ما في كتاب سبل السلام': [
-        'تنبيه الانام', 'سبل السلام'
-    ]
-}
-
-# Author to series mapping
-AUTHOR_SERIES = {
-    'صالح الفوزان': ['الملخص شرح كتاب التوحيد', 'الملخص الفقهي'],
-    'أحمد النجمي': ['تأسيس الأحكام شرح عمدة الأحكام', 'المورد العذب الزلال'],
-    'زيد المدخلي': ['الأفنان الندية'],
-    'حافظ حكمي': ['معارج القبول شرح منظومة سلم الوصول'],
-}
-
-# Series metadata
-SERIES_INFO = {
-    'تأسيس الأحكام شرح عمدة الأحكام': {
-        'author': 'أحمد بن يحيى النجمي',
-        'category': 'Hadeeth'
-    },
-    'الملخص شرح كتاب التوحيد': {
-        'author': 'صالح الفوزان',
-        'category': 'Aqeedah'
-    },
-    'الملخص الفقهي': {
-        'author': 'صالح الفوزان',
-        'category': 'Fiqh'
-    },
-    'الأفنان الندية': {
-        'author': 'زيد بن هادي المدخلي',
-        'category': 'Fiqh'
-    },
-    'معارج القبول شرح منظومة سلم الوصول': {
-        'author': 'حافظ حكمي',
-        'category': 'Aqeedah'
-    },
-    'التفسير الميسر': {
-        'author': 'نخبة من أهل العلم',
-        'category': 'Other'
-    },
-    'شرح السنة للبربهاري': {
-        'author': 'أحمد النجمي',
-        'category': 'Aqeedah'
-    },
-    'صحيح البخاري': {
-        'author': 'محمد بن إسماعيل البخاري',
-        'category': 'Hadeeth'
-    },
-    'المورد العذب الزلال': {
-        'author': 'أحمد النجمي',
-        'category': 'Aqeedah'
-    },
-    'التحفة النجمية بشرح الأربعين النووية': {
-        'author': 'أحمد النجمي',
-        'category': 'Hadeeth'
-    },
-    'مختصر السيرة النبوية': {
-        'author': 'محمد بن عبدالوهاب',
-        'category': 'Seerah'
-    },
-    'تنبيه الانام على ما في كتاب سبل السلام من الفوائد والأحكام': {
-        'author': 'أحمد النجمي',
-        'category': 'Fiqh'
-    }
-}
-
-# Day-based schedule
-DAY_SCHEDULE = {
-    'Saturday': ['غنية السائل', 'المورد العذب الزلال', 'شرح السنة للبربهاري',
-                 'التحفة النجمية', 'مختصر السيرة النبوية', 'تنبيه الانام',
-                 'التفسير الميسر'],
-    'Sunday': ['الملخص شرح كتاب التوحيد', 'تأسيس الأحكام شرح عمدة الأحكام', 'الأفنان الندية'],
-    'Monday': ['الملخص الفقهي', 'تأسيس الأحكام شرح عمدة الأحكام', 'الأفنان الندية'],
-    'Tuesday': ['الملخص شرح كتاب التوحيد', 'معارج القبول شرح منظومة سلم الوصول'],
-    'Wednesday': ['الملخص الفقهي', 'تأسيس الأحكام شرح عمدة الأحكام'],
-    'Friday': ['خطبة الجمعة', 'صحيح البخاري']
-}
-
-
-def find_series_by_keywords(text, subtopic, day_of_week, location):
-    """Find series using keyword matching"""
-
-    # Normalize text
-    text_combined = f"{text} {subtopic}".lower()
-
-    # Score each series
-    scores = defaultdict(int)
-
-    for series, keywords in SERIES_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword.lower() in text_combined:
-                scores[series] += len(keyword)  # Longer keyword = higher score
-
-    # Filter by day schedule if available
-    if day_of_week and day_of_week in DAY_SCHEDULE:
-        day_series = DAY_SCHEDULE[day_of_week]
-        # Boost scores for series on this day
-        for series in scores:
-            if any(day_s in series for day_s in day_series):
-                scores[series] += 20
-
-    # Return best match
-    if scores:
-        best_series = max(scores, key=scores.get)
-        if scores[best_series] >= 3:  # Minimum threshold
-            return best_series
-
-    return None
+import numpy as np
+
+from keyword_automaton import KeywordAutomaton
+from record_store import load_messages
+from series_catalog import load_catalog
+
+# Series tables of this pass, from series_catalog.json:
+# - SERIES_KEYWORDS: keywords that indicate specific series
+# - SERIES_INFO: series metadata (author, category)
+# - SERIES_ALIASES: title forms of each series, matched with spelling
+#   variants (a few edits) through SERIES_NAME_INDEX
+# - DAY_SCHEDULE: day-based schedule
+TABLES = load_catalog().extractors['improve_schedule_matching']
+SERIES_KEYWORDS = TABLES['keywords']
+SERIES_INFO = TABLES['info']
+SERIES_ALIASES = TABLES['title_variants']
+SERIES_NAME_INDEX = TABLES['title_index']
+DAY_SCHEDULE = TABLES['days']
+
+
+class KeywordScorer:
+    """Keyword scores of many texts at once, as array operations: a sparse
+    text x keyword hit matrix (the coordinates of its hits, found by one
+    Aho-Corasick scan of each text for all keywords) times a keyword
+    -> series weight matrix (the keyword's length per occurrence in the
+    series' list), plus the day boost of the series that scored, then the
+    best series per row.
+
+    Same results as scoring each text in a dict: a series scores only when
+    one of its keywords is in the text, the +20 boost only goes to series
+    that scored, and of equal scores the first series wins.
+    """
+
+    def __init__(self, series_keywords, day_schedule):
+        self.series = list(series_keywords)
+
+        columns = {}
+        entries = []
+        for series_idx, keywords in enumerate(series_keywords.values()):
+            for keyword in keywords:
+                column = columns.setdefault(keyword.lower(), len(columns))
+                entries.append((column, series_idx, len(keyword)))
+        self.keywords = list(columns)
+
+        self.automaton = KeywordAutomaton()
+        for keyword, column in columns.items():
+            self.automaton.add(keyword, column)
+        self.automaton.build()
+
+        # A keyword listed twice counts twice, as in the per-text loop
+        self.weights = np.zeros((len(self.keywords), len(self.series)), dtype=np.int64)
+        self.occurrences = np.zeros_like(self.weights)
+        for column, series_idx, length in entries:
+            self.weights[column, series_idx] += length
+            self.occurrences[column, series_idx] += 1
+
+        # One boost row per scheduled day, and a last all-zero row for
+        # texts without (or with an unscheduled) day
+        self.days = {day: i for i, day in enumerate(day_schedule)}
+        self.boosts = np.zeros((len(day_schedule) + 1, len(self.series)), dtype=np.int64)
+        for day_idx, day_series in enumerate(day_schedule.values()):
+            for series_idx, series in enumerate(self.series):
+                if any(day_s in series for day_s in day_series):
+                    self.boosts[day_idx, series_idx] = 20
+
+    def hits(self, texts):
+        """(rows, columns) of the hit matrix: keyword (column) occurs in
+        lowercased text (row), from one automaton scan per text"""
+        rows, columns = [], []
+        for row, text in enumerate(texts):
+            found = self.automaton.values_in(text)
+            rows.extend([row] * len(found))
+            columns.extend(found)
+        return np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)
+
+    def best(self, texts, days, threshold=3):
+        """Best series of each lowercased text on its day of week, or None
+        when no series scores at least threshold"""
+        texts = list(texts)
+        rows, columns = self.hits(texts)
+        scores = np.zeros((len(texts), len(self.series)), dtype=np.int64)
+        occurrences = np.zeros_like(scores)
+        np.add.at(scores, rows, self.weights[columns])
+        np.add.at(occurrences, rows, self.occurrences[columns])
+
+        scored = occurrences > 0
+        day_rows = [self.days.get(day, len(self.days)) for day in days]
+        scores += self.boosts[day_rows] * scored
+        scores[~scored] = -1
+
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(best)), best]
+        return [self.series[series_idx] if score >= threshold else None
+                for series_idx, score in zip(best.tolist(), best_scores.tolist())]
+
+
+SERIES_SCORER = KeywordScorer(SERIES_KEYWORDS, DAY_SCHEDULE)
+
+
+def keyword_text(text, subtopic):
+    """The lowercased text keywords are looked for in"""
+    return f"{text} {subtopic}".lower()
+
+
+def find_series_by_name(text):
+    """(series, edits) of the closest series title in text, allowing
+    spelling variants, or None"""
+    return SERIES_NAME_INDEX.best(text)
+
+
+def load_original_messages(records, messages_file='messages_parsed.json'):
+    """Message text of each record, when the schedule-based CSV still
+    lines up one row per message with messages_parsed.json"""
+    fallback = "series names are matched on filename and subtopic only"
+    if not os.path.exists(messages_file):
+        print(f"⚠️  {messages_file} not found: {fallback}")
+        return None
+    messages = load_messages(messages_file)
+    if len(messages) != len(records) or any(
+            msg['filename'] != record['TelegramFileName'] for msg, record in zip(messages, records)):
+        print(f"⚠️  {messages_file} ({len(messages)} messages) does not line up with the "
+              f"{len(records)} CSV records: {fallback}")
+        return None
+    return [msg['message_text'] for msg in messages]
 
 
 def main():
@@ -165,30 +144,53 @@ def main():
         records = list(reader)
 
     print(f"Loaded {len(records)} records")
+    message_texts = load_original_messages(records)
+    if message_texts:
+        print("Using the original message text for series names")
     print(f"Processing unmatched records...\n")
 
+    # Keyword-score all unmatched records at once
+    unmatched = [i for i, record in enumerate(records)
+                 if record['Type'] == 'Unknown' or record['SeriesName'] == 'Not Available']
+    keyword_series = dict(zip(unmatched, SERIES_SCORER.best(
+        [keyword_text(records[i]['TelegramFileName'] + " " + records[i]['SubTopic'], records[i]['SubTopic'])
+         for i in unmatched],
+        [records[i]['DayOfWeek'] for i in unmatched])))
+
     improved = 0
-    for i, record in enumerate(records):
-        if record['Type'] == 'Unknown' or record['SeriesName'] == 'Not Available':
-            # Try to find series using keywords
-            filename = record['TelegramFileName']
-            subtopic = record['SubTopic']
-            day = record['DayOfWeek']
-            location = record['Location/Online']
-
-            # Read the original message for more context
-            # For now, use what we have
-            series = find_series_by_keywords(filename + " " + subtopic, subtopic, day, location)
-
-            if series and series in SERIES_INFO:
-                record['Type'] = 'Series'
-                record['SeriesName'] = series
-                record['OriginalAuthor'] = SERIES_INFO[series]['author']
-                record['Category'] = SERIES_INFO[series]['category']
-                record['MatchedBy'] = f'Keyword Match ({day})'
-                record['doubtsStatus'] = 'matched by keywords'
-                improved += 1
-                print(f"  ✓ Matched: {filename[:50]} → {series[:40]}")
+    name_matched = 0
+    for i in unmatched:
+        record = records[i]
+        # Try to find series using keywords
+        filename = record['TelegramFileName']
+        subtopic = record['SubTopic']
+        day = record['DayOfWeek']
+
+        series = keyword_series[i]
+        matched_by = f'Keyword Match ({day})'
+        doubts_status = 'matched by keywords'
+
+        if not (series and series in SERIES_INFO):
+            # Series title in the message, possibly spelled differently
+            context = filename + " " + subtopic
+            if message_texts:
+                context += " " + message_texts[i]
+            by_name = find_series_by_name(context)
+            if by_name:
+                series, edits = by_name
+                matched_by = f'Series Name Match ({edits} edits)'
+                doubts_status = 'matched by series name' + (' variant' if edits else '')
+                name_matched += 1
+
+        if series and series in SERIES_INFO:
+            record['Type'] = 'Series'
+            record['SeriesName'] = series
+            record['OriginalAuthor'] = SERIES_INFO[series]['author']
+            record['Category'] = SERIES_INFO[series]['category']
+            record['MatchedBy'] = matched_by
+            record['doubtsStatus'] = doubts_status
+            improved += 1
+            print(f"  ✓ Matched: {filename[:50]} → {series[:40]}")
 
     # Save improved CSV
     output_file = 'extracted_lectures_final.csv'
@@ -215,7 +217,7 @@ def main():
     print(f"  - Series: {series}")
     print(f"  - Khutbas: {khutbas}")
     print(f"Still Unmatched: {unmatched} ({unmatched/len(records)*100:.1f}%)")
-    print(f"\nImproved in this pass: {improved}")
+    print(f"\nImproved in this pass: {improved} ({name_matched} by series name)")
     print("="*80 + "\n")
 
 
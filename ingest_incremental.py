@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Incremental ingestion of a new Telegram export drop.
+
+Keeps a high-water mark (last message id and its timestamp) per channel in
+ingest_state.json. Each run parses only the messages above it, then:
+1. Drops lessons already ingested from another, overlapping export
+   (see dedup_index.py)
+2. Appends the rest to the cumulative parsed JSON (only the file tail is rewritten)
+3. Runs the manual-style extraction on the delta and appends it to the CSV
+4. Merges the new rows into the sorted-by-series report
+5. Advances the high-water mark
+
+Every output is written to a temporary copy and moved into place only when
+all of them are written; the new dedup keys and the high-water mark are
+saved after that. A run that fails leaves the outputs, index and mark as
+they were, so it can simply be run again.
+
+A daily refresh therefore costs time proportional to the new messages, not
+to the channel's whole history.
+
+Usage:
+    python ingest_incremental.py 9feb26messages.html
+    python ingest_incremental.py messages.html --seed   # mark an already-ingested export
+"""
+
+import argparse
+import json
+import os
+import shutil
+from contextlib import nullcontext
+from datetime import datetime
+
+from dedup_index import DEDUP_INDEX, DedupIndex
+from telegram_parser import (
+    VIEWS, find_export_parts, iter_records, parse_export_dir, read_channel_name,
+)
+from extract_manual_style import extract_records, save_csv
+from sort_manual_extraction import sort_rows, output_columns_of, update_sorted_csv, write_sorted
+
+STATE_FILE = 'ingest_state.json'
+
+
+def load_state(state_file):
+    """Per-channel high-water marks: {channel: {last_message_id, last_date, updated}}"""
+    if not os.path.exists(state_file):
+        return {}
+    with open(state_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state, state_file):
+    temp_path = f'{state_file}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, state_file)
+
+
+def staged_copy(path):
+    """Temporary copy of path (no file when path does not exist yet) to
+    write instead of it, moved over it once all outputs are written"""
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    if os.path.exists(path):
+        shutil.copyfile(path, temp_path)
+    return temp_path
+
+
+def no_records(fields):
+    """View producing nothing, used to scan an export for its high-water mark"""
+    return []
+
+
+def parse_delta(export_path, view, since_id, workers=None):
+    """Records above since_id plus the export's new high-water mark stats"""
+    stats = {}
+    if os.path.isdir(export_path):
+        records = parse_export_dir(export_path, view, workers, since_id, stats)
+    else:
+        records = list(iter_records(export_path, VIEWS.get(view, view), stats, since_id))
+    return records, stats
+
+
+def append_json_records(json_file, records):
+    """Append records to a JSON array written with indent=2.
+
+    Only the closing bracket at the end of the file is rewritten, and the
+    result is byte-identical to dumping the whole list again.
+    """
+    if not records:
+        return
+
+    if not os.path.exists(json_file) or os.path.getsize(json_file) == 0:
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        return
+
+    # json.dumps(..., indent=2) is '[\n' + items + '\n]'
+    items = json.dumps(records, ensure_ascii=False, indent=2)[2:-2]
+
+    with open(json_file, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        tail_start = max(0, size - 64)
+        f.seek(tail_start)
+        tail = f.read()
+
+        head = tail[:tail.rstrip().rfind(b']')].rstrip()
+        separator = '\n' if head.endswith(b'[') else ',\n'
+
+        f.seek(tail_start + len(head))
+        f.truncate()
+        f.write((separator + items + '\n]').encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest only the new messages of a Telegram export")
+    parser.add_argument('export', help="messages.html, or an export directory holding messages*.html parts")
+    parser.add_argument('--view', choices=sorted(VIEWS), default='direct',
+                        help="record schema of the parsed JSON (default: direct, as messages_parsed.json)")
+    parser.add_argument('--parsed', default='messages_parsed.json', help="cumulative parsed JSON")
+    parser.add_argument('--extracted', default='extracted_lectures_manual_style.csv',
+                        help="cumulative manual-style extraction CSV")
+    parser.add_argument('--sorted', default='lectures_manual_sorted_by_series.csv',
+                        help="sorted-by-series report")
+    parser.add_argument('--state', default=STATE_FILE, help="high-water mark file")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for a split export")
+    parser.add_argument('--dedup-index', default=DEDUP_INDEX,
+                        help="content-hash index of ingested lessons (\"\" to disable)")
+    parser.add_argument('--bloom', type=int, default=None, metavar='CAPACITY',
+                        help="Bloom filter in front of the dedup index, sized for CAPACITY lessons")
+    parser.add_argument('--seed', action='store_true',
+                        help="only record the export's high-water mark and lessons (it is already ingested)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("INCREMENTAL INGESTION")
+    print("=" * 80)
+    print()
+
+    first_part = find_export_parts(args.export)[0] if os.path.isdir(args.export) else args.export
+    channel = read_channel_name(first_part) or os.path.basename(os.path.abspath(args.export))
+
+    state = load_state(args.state)
+    mark = state.get(channel, {})
+    since_id = mark.get('last_message_id')
+
+    print(f"📡 Channel: {channel}")
+    if since_id is not None:
+        print(f"   High-water mark: message {since_id} ({mark.get('last_date')})")
+    else:
+        print("   No high-water mark yet: ingesting everything")
+    print()
+
+    view = no_records if args.seed and not args.dedup_index else args.view
+    delta, stats = parse_delta(args.export, view, since_id, args.workers)
+
+    if stats['last_id'] == since_id:
+        print("✅ Already up to date, nothing to ingest")
+        return
+
+    # New keys are committed on leaving the block, once every output is in
+    # place; an exception rolls them back and leaves the outputs untouched
+    with DedupIndex(args.dedup_index, args.bloom) if args.dedup_index else nullcontext() as index:
+        if index is not None:
+            if args.seed:
+                index.register(delta, channel)
+                print(f"🔑 Registered {index.stats['added']} new lessons in {args.dedup_index}")
+                delta = []
+            else:
+                delta = index.filter_new(delta, channel)
+                if index.stats['duplicates']:
+                    print(f"🔁 Dropped {index.stats['duplicates']} lessons already ingested from another export")
+
+        if delta:
+            print(f"🆕 {len(delta)} new records")
+            staged = {path: staged_copy(path) for path in (args.parsed, args.extracted, args.sorted)}
+            try:
+                append_json_records(staged[args.parsed], delta)
+
+                new_rows = extract_records(delta)
+                save_csv(new_rows, staged[args.extracted], append=True)
+
+                if os.path.exists(args.sorted):
+                    update_sorted_csv(new_rows, staged[args.sorted])
+                else:
+                    rows_sorted, _ = sort_rows(new_rows)
+                    write_sorted(rows_sorted, output_columns_of(rows_sorted), staged[args.sorted])
+
+                for path, temp_path in staged.items():
+                    os.replace(temp_path, path)
+            finally:
+                for temp_path in staged.values():
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+
+            print(f"   Appended to {args.parsed}")
+            print(f"   Appended {len(new_rows)} rows to {args.extracted}")
+            print(f"   Updated {args.sorted}")
+        else:
+            print("🆕 No new records")
+
+    state[channel] = {
+        'last_message_id': stats['last_id'],
+        'last_date': stats['last_date'],
+        'updated': datetime.now().isoformat(timespec='seconds'),
+    }
+    save_state(state, args.state)
+
+    print()
+    print(f"✅ High-water mark for {channel}: message {stats['last_id']} ({stats['last_date']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Aho-Corasick automaton for finding many keywords in one pass over a text.
+
+Checking every keyword of a catalog with `keyword in text` costs one
+substring scan per keyword; the automaton is built once from all of them
+and reports every keyword occurrence in a single scan of the text, so
+matching cost depends on the text length rather than the catalog size.
+
+    automaton = KeywordAutomaton()
+    automaton.add('تأسيس', 0)
+    automaton.add('عمدة الأحكام', 0)
+    automaton.add('التوحيد', 1)
+    automaton.build()
+    automaton.values_in(text)    # -> {0, 1}: values of the keywords found
+"""
+
+from collections import deque
+
+
+class KeywordAutomaton:
+    """Multi-keyword matcher with plain substring semantics.
+
+    Every keyword carries a value (e.g. the index of the series it
+    belongs to); a keyword added with several values reports all of them.
+    """
+
+    def __init__(self):
+        # Node 0 is the root; goto[node] maps a character to the next node
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [set()]
+        # Complete transitions (goto with the failure links folded in)
+        self.delta = None
+        self.built = False
+
+    def add(self, keyword, value):
+        if not keyword:
+            return
+        node = 0
+        for char in keyword:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(set())
+            node = next_node
+        self.outputs[node].add(value)
+        self.built = False
+
+    def build(self):
+        """Compute failure links breadth-first, merge the outputs of each
+        node's failure chain into the node and fold the failure links into
+        one transition table, so scanning is a single lookup per character"""
+        queue = deque(self.goto[0].values())
+        for node in queue:
+            self.fail[node] = 0
+
+        self.delta = [None] * len(self.goto)
+        self.delta[0] = dict(self.goto[0])
+        order = list(queue)
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                order.append(child)
+
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.outputs[child] |= self.outputs[self.fail[child]]
+
+        # Breadth-first order: a node's failure target (shallower) is done first
+        for node in order:
+            transitions = dict(self.delta[self.fail[node]])
+            transitions.update(self.goto[node])
+            self.delta[node] = transitions
+
+        self.built = True
+        return self
+
+    def iter_matches(self, text):
+        """Yield (end index, value) for every keyword occurrence in text"""
+        if not self.built:
+            self.build()
+
+        delta, outputs = self.delta, self.outputs
+        node = 0
+        for index, char in enumerate(text):
+            node = delta[node].get(char, 0)
+            for value in outputs[node]:
+                yield index, value
+
+    def values_in(self, text):
+        """Set of the values of all keywords occurring in text"""
+        if not self.built:
+            self.build()
+
+        delta, outputs = self.delta, self.outputs
+        found = set()
+        node = 0
+        for char in text:
+            node = delta[node].get(char, 0)
+            if outputs[node]:
+                found |= outputs[node]
+        return found
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Read lecture durations straight from the audio files of an export.
+
+ClipLength is 'N/A' whenever the export has no duration block and the
+caption has no "مدة الصوتية" line. When the export's files/ directory is
+available, the duration (and bitrate) can be taken from the container
+headers instead:
+
+- m4a/mp4: the movie header box (moov/mvhd) gives timescale and duration;
+  boxes are walked by their headers only, skipping the media data
+- mp3: the first frame header plus its Xing/Info or VBRI tag gives the
+  frame count (VBR); without one the file is treated as CBR
+
+Only a few header bytes are read per file (the audio is never decoded),
+files are probed from a thread pool, and results are cached per file
+(keyed on size and mtime) in media_probe_cache.json.
+
+Usage:
+    python media_probe.py path/to/ChatExport/files
+    python media_probe.py files/AUDIO-2026-01-18-20-40-12.m4a
+"""
+
+import argparse
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from telegram_json import format_duration
+
+CACHE_FILE = 'media_probe_cache.json'
+WORKERS = 16
+
+MISSING_LENGTHS = ('N/A', 'Not Available', '', None)
+
+# MPEG audio Layer III tables (kbps, Hz) by MPEG version
+MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000],
+}
+MP3_SCAN_BYTES = 1 << 16
+
+
+def _mp4_boxes(f, start, end):
+    """(type, payload start, box end) of the boxes in [start, end), read
+    from their 8- or 16-byte headers only"""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_size:
+            return
+        yield kind, pos + header_size, pos + size
+        pos += size
+
+
+def probe_mp4(f, file_size):
+    """{duration, bitrate} of an m4a/mp4 file from moov/mvhd, or None"""
+    duration = None
+    media_bytes = 0
+    for kind, start, end in _mp4_boxes(f, 0, file_size):
+        if kind == b'mdat':
+            media_bytes += end - start
+        elif kind == b'moov':
+            for child, child_start, _ in _mp4_boxes(f, start, end):
+                if child != b'mvhd':
+                    continue
+                f.seek(child_start)
+                mvhd = f.read(32)
+                if mvhd[:1] == b'\x01':
+                    timescale, length = struct.unpack_from('>IQ', mvhd, 20)
+                else:
+                    timescale, length = struct.unpack_from('>II', mvhd, 12)
+                if timescale:
+                    duration = length / timescale
+                break
+
+    if not duration:
+        return None
+    return {'duration': duration, 'bitrate': round((media_bytes or file_size) * 8 / duration / 1000)}
+
+
+def _mp3_frame_header(data, pos):
+    """(version, bitrate kbps, sample rate, mono) of a Layer III frame header, or None"""
+    if data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    version = {3: 1, 2: 2, 0: 2.5}.get((data[pos + 1] >> 3) & 3)
+    layer = (data[pos + 1] >> 1) & 3
+    bitrate_index = data[pos + 2] >> 4
+    rate_index = (data[pos + 2] >> 2) & 3
+    if version is None or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = MP3_BITRATES[1 if version == 1 else 2][bitrate_index]
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    mono = data[pos + 3] >> 6 == 3
+    return version, bitrate, sample_rate, mono
+
+
+def probe_mp3(f, file_size):
+    """{duration, bitrate} of an mp3 file from its first frame, or None"""
+    audio_start = 0
+    head = f.read(10)
+    if head[:3] == b'ID3' and len(head) == 10:
+        # ID3v2 size is syncsafe (7 bits per byte); bit 4 of the flags adds a footer
+        size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        audio_start = 10 + size + (10 if head[5] & 0x10 else 0)
+
+    audio_end = file_size
+    if file_size >= 128:
+        f.seek(file_size - 128)
+        if f.read(3) == b'TAG':
+            audio_end -= 128
+
+    f.seek(audio_start)
+    data = f.read(MP3_SCAN_BYTES)
+    for pos in range(len(data) - 4):
+        header = _mp3_frame_header(data, pos)
+        if header is not None:
+            break
+    else:
+        return None
+
+    version, bitrate, sample_rate, mono = header
+    samples_per_frame = 1152 if version == 1 else 576
+    audio_bytes = audio_end - audio_start - pos
+
+    # VBR files carry the frame count in a Xing/Info tag after the side info,
+    # or in a VBRI tag 32 bytes after the header
+    side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+    frames = None
+    xing = pos + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info'):
+        (flags,) = struct.unpack_from('>I', data, xing + 4)
+        if flags & 1:
+            (frames,) = struct.unpack_from('>I', data, xing + 8)
+    elif data[pos + 36:pos + 40] == b'VBRI':
+        (frames,) = struct.unpack_from('>I', data, pos + 50)
+
+    if frames:
+        duration = frames * samples_per_frame / sample_rate
+        bitrate = round(audio_bytes * 8 / duration / 1000)
+    else:
+        duration = audio_bytes * 8 / (bitrate * 1000)
+
+    return {'duration': duration, 'bitrate': bitrate}
+
+
+PROBES = {
+    '.m4a': probe_mp4,
+    '.mp4': probe_mp4,
+    '.m4b': probe_mp4,
+    '.mp3': probe_mp3,
+}
+
+
+def probe_file(path):
+    """{duration (seconds), bitrate (kbps)} of one audio file, or None
+    for a missing, unsupported or unreadable file"""
+    probe = PROBES.get(os.path.splitext(path)[1].lower())
+    if probe is None:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return probe(f, os.fstat(f.fileno()).st_size)
+    except (OSError, struct.error, IndexError):
+        return None
+
+
+def load_cache(cache_file):
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+    with open(cache_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_cache(cache, cache_file):
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+
+
+def probe_files(paths, workers=WORKERS, cache_file=CACHE_FILE):
+    """{path: {duration, bitrate} or None} for many files.
+
+    Files whose size and mtime match the cache are not opened; the rest
+    are probed from a thread pool (the work is I/O bound).
+    """
+    cache = load_cache(cache_file)
+    results = {}
+    to_probe = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            results[path] = None
+            continue
+
+        key = os.path.abspath(path)
+        entry = cache.get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            results[path] = entry['probe']
+        else:
+            to_probe.append((path, key, stat))
+
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            probed = executor.map(probe_file, [path for path, _, _ in to_probe])
+            for (path, key, stat), probe in zip(to_probe, probed):
+                results[path] = probe
+                cache[key] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'probe': probe}
+
+        if cache_file:
+            save_cache(cache, cache_file)
+
+    return results
+
+
+def fill_clip_lengths(records, files_dir, workers=WORKERS, cache_file=CACHE_FILE):
+    """Set clip_length from the audio file for records that have none.
+
+    Returns the number of records filled.
+    """
+    missing = [record for record in records if record.get('clip_length') in MISSING_LENGTHS]
+    if not missing or not os.path.isdir(files_dir):
+        return 0
+
+    paths = {id(record): os.path.join(files_dir, record['filename']) for record in missing}
+    probes = probe_files(sorted(set(paths.values())), workers, cache_file)
+
+    filled = 0
+    for record in missing:
+        probe = probes.get(paths[id(record)])
+        if probe:
+            record['clip_length'] = format_duration(round(probe['duration']))
+            filled += 1
+    return filled
+
+
+def files_dir_of(html_file):
+    """The files/ directory of the export an HTML file belongs to"""
+    return os.path.join(os.path.dirname(os.path.abspath(html_file)), 'files')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read duration and bitrate from audio file headers")
+    parser.add_argument('inputs', nargs='+', help="audio files or directories (e.g. an export's files/)")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="probe threads")
+    parser.add_argument('--cache', default=CACHE_FILE, help="probe cache file (\"\" to disable)")
+    args = parser.parse_args()
+
+    paths = []
+    for input_path in args.inputs:
+        if os.path.isdir(input_path):
+            paths.extend(os.path.join(input_path, name) for name in sorted(os.listdir(input_path))
+                         if os.path.splitext(name)[1].lower() in PROBES)
+        else:
+            paths.append(input_path)
+
+    results = probe_files(paths, args.workers, args.cache)
+    for path in paths:
+        probe = results[path]
+        if probe:
+            print(f"{format_duration(round(probe['duration'])):>8}  {probe['bitrate']:4d} kbps  {path}")
+        else:
+            print(f"{'?':>8}  {'':9s}  {path}")
+
+    print()
+    print(f"✅ Probed {sum(1 for p in results.values() if p)}/{len(paths)} files")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+On-disk inverted index over parsed messages for keyword and phrase search.
+
+Finding the lessons of a series by hand ("search for 'تأسيس', filter by
+location") used to scan every message for every keyword. A message index
+(.msgidx, an SQLite file next to the parsed JSON) maps terms to the ids
+(positions in the parsed file) of the messages holding them:
+
+- w:<word>     normalized words of the caption and audio filename
+- #:<tag>      hashtags
+- loc:<place>  'Online' or 'جامع الورود' (same rule as the extractors)
+- day:<day>    weekday of the Gregorian date
+
+Postings are sorted uint32 arrays. Text is normalized with
+normalize_arabic() and lowercased, for queries as well as messages.
+
+search() keeps the extractors' substring semantics: each word of the query
+must be part of an indexed word (the first may be a word suffix, the last
+a prefix, the inner ones whole words), which the vocabulary answers from
+one joined string, and the candidates are checked against the stored
+text. words() matches whole words only.
+
+Usage:
+    python message_index.py messages_parsed.json 'تأسيس الأحكام'
+    python message_index.py messages_parsed.json 'التوحيد' --location Online --weekday Tuesday
+    python message_index.py messages_parsed.json --hashtag خطبة_الجمعة
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+
+from arabic_text import normalize_arabic
+from record_store import load_messages
+
+EXTENSION = '.msgidx'
+VERSION = '1'
+
+ONLINE_MARKERS = ['عن بُعد', 'عن بعد', 'بُعد', 'عبر قناة', 'عبر التليجرام']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DATE_FORMATS = ['%d.%m.%Y', '%d/%m/%Y', '%Y-%m-%d']
+
+_WORD = re.compile(r'\w+')
+_HASHTAG = re.compile(r'#(\w+)')
+
+
+def message_location(text):
+    """'Online' or 'جامع الورود', as the extractors decide it"""
+    return 'Online' if any(marker in text for marker in ONLINE_MARKERS) else 'جامع الورود'
+
+
+def message_weekday(greg_date):
+    """English weekday of a parsed Gregorian date, or None"""
+    if not greg_date or greg_date == 'Not Available':
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return WEEKDAYS[datetime.strptime(greg_date.split()[0], fmt).weekday()]
+        except ValueError:
+            continue
+    return None
+
+
+def search_form(text):
+    """Normalized, lowercased form that messages and queries are compared in"""
+    return normalize_arabic(text.lower()) if text else ''
+
+
+def message_terms(msg):
+    """(searchable text, set of terms) of a parsed message"""
+    text = search_form(f"{msg.get('message_text') or ''} {msg.get('filename') or ''}")
+    terms = {f'w:{word}' for word in _WORD.findall(text)}
+    terms.update(f'#:{tag}' for tag in _HASHTAG.findall(text))
+    terms.add(f"loc:{message_location(msg.get('message_text') or '')}")
+    weekday = message_weekday(msg.get('greg_date'))
+    if weekday:
+        terms.add(f'day:{weekday}')
+    return text, terms
+
+
+def index_path_of(messages_file):
+    """messages_parsed.json -> messages_parsed.msgidx"""
+    return os.path.splitext(messages_file)[0] + EXTENSION
+
+
+class MessageIndex:
+    """Inverted index over one parsed-message file (or an in-memory list
+    when built at ':memory:')"""
+
+    def __init__(self, db):
+        self.db = db
+        self.meta = dict(db.execute('SELECT key, value FROM meta'))
+        self._postings = {}
+        self._docs = {}
+
+        # Words joined into one string, so substring lookups over the
+        # vocabulary are str.find calls; starts[i] is where word i begins
+        words = [term[2:] for (term,) in db.execute("SELECT term FROM postings WHERE term LIKE 'w:%' ORDER BY term")]
+        self.vocabulary = words
+        self._joined = '\n'.join(words)
+        self.starts = []
+        position = 0
+        for word in words:
+            self.starts.append(position)
+            position += len(word) + 1
+
+    @classmethod
+    def open(cls, path):
+        return cls(sqlite3.connect(path))
+
+    @classmethod
+    def build(cls, messages, path=':memory:', source=None):
+        """Index a list of parsed messages; ``source`` (the parsed file)
+        is recorded so open_index() can tell when the index is stale"""
+        postings = {}
+        db = sqlite3.connect(path)
+        db.execute('DROP TABLE IF EXISTS meta')
+        db.execute('DROP TABLE IF EXISTS postings')
+        db.execute('DROP TABLE IF EXISTS docs')
+        db.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+        db.execute('CREATE TABLE postings (term TEXT PRIMARY KEY, ids BLOB)')
+        db.execute('CREATE TABLE docs (id INTEGER PRIMARY KEY, text TEXT)')
+
+        docs = []
+        for msg_id, msg in enumerate(messages):
+            text, terms = message_terms(msg)
+            docs.append((msg_id, text))
+            for term in terms:
+                postings.setdefault(term, array('I')).append(msg_id)
+
+        db.executemany('INSERT INTO docs VALUES (?, ?)', docs)
+        db.executemany('INSERT INTO postings VALUES (?, ?)',
+                       ((term, ids.tobytes()) for term, ids in postings.items()))
+        meta = {'version': VERSION, 'messages': str(len(messages))}
+        if source:
+            stat = os.stat(source)
+            meta.update(source=os.path.abspath(source), size=str(stat.st_size), mtime=str(stat.st_mtime_ns))
+        db.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+        db.commit()
+        return cls(db)
+
+    def __len__(self):
+        return int(self.meta['messages'])
+
+    def postings(self, term):
+        """Set of the ids of the messages holding a term"""
+        ids = self._postings.get(term)
+        if ids is None:
+            row = self.db.execute('SELECT ids FROM postings WHERE term = ?', (term,)).fetchone()
+            ids = frozenset(array('I', row[0])) if row else frozenset()
+            self._postings[term] = ids
+        return ids
+
+    def _words_containing(self, part, where):
+        """Vocabulary words containing part ('prefix', 'suffix' or anywhere)"""
+        joined, starts = self._joined, self.starts
+        found = set()
+        position = joined.find(part)
+        while position != -1:
+            index = bisect_right(starts, position) - 1
+            word = self.vocabulary[index]
+            start = starts[index]
+            if (where != 'prefix' or position == start) and \
+                    (where != 'suffix' or position + len(part) == start + len(word)):
+                found.add(word)
+            position = joined.find(part, position + 1)
+        return found
+
+    def _union(self, words):
+        ids = set()
+        for word in words:
+            ids |= self.postings(f'w:{word}')
+        return ids
+
+    def _texts(self, ids):
+        """{id: searchable text} of messages (kept once fetched)"""
+        missing = sorted(msg_id for msg_id in ids if msg_id not in self._docs)
+        # Stay below SQLite's limit on bound parameters
+        for i in range(0, len(missing), 900):
+            chunk = missing[i:i + 900]
+            self._docs.update(self.db.execute(
+                f"SELECT id, text FROM docs WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+        return {msg_id: self._docs[msg_id] for msg_id in ids}
+
+    def filter(self, ids, location=None, weekday=None):
+        if location:
+            ids = ids & self.postings(f'loc:{location}')
+        if weekday:
+            ids = ids & self.postings(f'day:{weekday}')
+        return ids
+
+    def search(self, query, location=None, weekday=None):
+        """Sorted ids of the messages containing query as a substring"""
+        query = search_form(query)
+        spans = [(match.group(), match.start(), match.end()) for match in _WORD.finditer(query)]
+        if not spans:
+            candidates = set(range(len(self)))
+        else:
+            candidates = None
+            for i, (word, start, end) in enumerate(spans):
+                # A query word touching the query's start can be the end of a
+                # longer word, one touching its end the start of one
+                if start == 0 and end == len(query):
+                    words = self._words_containing(word, 'anywhere')
+                elif start == 0:
+                    words = self._words_containing(word, 'suffix')
+                elif end == len(query):
+                    words = self._words_containing(word, 'prefix')
+                else:
+                    words = [word]
+                ids = self._union(words)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+
+        candidates = self.filter(candidates, location, weekday)
+        if len(spans) == 1 and spans[0][1] == 0 and spans[0][2] == len(query):
+            return sorted(candidates)
+        return sorted(msg_id for msg_id, text in self._texts(candidates).items() if query in text)
+
+    def words(self, phrase, location=None, weekday=None):
+        """Sorted ids of the messages containing phrase as whole words"""
+        phrase = search_form(phrase)
+        words = _WORD.findall(phrase)
+        if not words:
+            return []
+        candidates = frozenset.intersection(*(self.postings(f'w:{word}') for word in words))
+        candidates = self.filter(candidates, location, weekday)
+        if len(words) == 1 and words[0] == phrase:
+            return sorted(candidates)
+        pattern = re.compile(r'(?<!\w)' + re.escape(phrase) + r'(?!\w)')
+        return sorted(msg_id for msg_id, text in self._texts(candidates).items() if pattern.search(text))
+
+    def hashtag(self, tag, location=None, weekday=None):
+        """Sorted ids of the messages carrying #tag"""
+        tag = search_form(tag.lstrip('#'))
+        return sorted(self.filter(self.postings(f'#:{tag}'), location, weekday))
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_index(messages_file, messages=None):
+    """Message index of a parsed file, (re)built when it is missing or
+    older than the file"""
+    path = index_path_of(messages_file)
+    if os.path.exists(path):
+        index = MessageIndex.open(path)
+        stat = os.stat(messages_file)
+        if (index.meta.get('version') == VERSION and index.meta.get('size') == str(stat.st_size)
+                and index.meta.get('mtime') == str(stat.st_mtime_ns)):
+            return index
+        index.close()
+
+    if messages is None:
+        messages = load_messages(messages_file)
+    return MessageIndex.build(messages, path, source=messages_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search parsed messages through their inverted index")
+    parser.add_argument('messages', help="parsed JSON (.json) or record store (.tgrec)")
+    parser.add_argument('query', nargs='?', help="keyword or phrase (substring match)")
+    parser.add_argument('--words', action='store_true', help="match whole words only")
+    parser.add_argument('--hashtag', help="messages carrying this hashtag")
+    parser.add_argument('--location', choices=['Online', 'جامع الورود'])
+    parser.add_argument('--weekday', choices=WEEKDAYS)
+    parser.add_argument('--rebuild', action='store_true', help="rebuild the index first")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(index_path_of(args.messages)):
+        os.remove(index_path_of(args.messages))
+    start = time.perf_counter()
+    index = open_index(args.messages)
+    print(f"📇 {index_path_of(args.messages)}: {len(index)} messages, {len(index.vocabulary)} words "
+          f"({(time.perf_counter() - start) * 1000:.1f} ms to open)")
+
+    start = time.perf_counter()
+    if args.hashtag:
+        ids = index.hashtag(args.hashtag, args.location, args.weekday)
+    elif args.words:
+        ids = index.words(args.query or '', args.location, args.weekday)
+    else:
+        ids = index.search(args.query or '', args.location, args.weekday)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    messages = load_messages(args.messages)
+    for msg_id in ids:
+        msg = messages[msg_id]
+        print(f"  {msg_id:6d}  {msg['greg_date'] or '':12s} {msg['filename'][:50]}")
+    print()
+    print(f"✅ {len(ids)} messages ({elapsed:.2f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,105 +8,35 @@ These are historical lessons from previous years, well-organized with:
 - Clip lengths
 """
 
-from bs4 import BeautifulSoup
-import json
 import re
-from hijri_converter import Hijri, Gregorian
-
-# Arabic number conversion
-ARABIC_TO_ENGLISH = {
-    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
-    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9'
-}
-
-# Hijri months mapping
-HIJRI_MONTHS = {
-    'محرم': 1, 'صفر': 2, 'ربيع الأول': 3, 'ربيع الآخر': 4,
-    'جمادى الأولى': 5, 'جمادى الآخرة': 6, 'رجب': 7, 'شعبان': 8,
-    'رمضان': 9, 'شوال': 10, 'ذو القعدة': 11, 'ذو الحجة': 12
-}
-
-def arabic_to_english_numbers(text):
-    """Convert Arabic numerals to English"""
-    if not text:
-        return text
-    result = text
-    for ar, en in ARABIC_TO_ENGLISH.items():
-        result = result.replace(ar, en)
-    return result
-
-def extract_hijri_date(text):
-    """Extract Hijri date from text like '١ رمضان ١٤٤٣هـ'"""
-    if not text:
-        return None, None
-
-    # Pattern: day month year
-    # e.g., "١ رمضان ١٤٤٣هـ" or "٢٥ رمضان ١٤٤٣"
-    pattern = r'([\d\u0660-\u0669]+)\s+([\u0600-\u06FF\s]+?)\s+([\d\u0660-\u0669]+)\s*هـ?'
-    match = re.search(pattern, text)
-
-    if match:
-        day_ar = match.group(1).strip()
-        month_name = match.group(2).strip()
-        year_ar = match.group(3).strip()
-
-        # Convert Arabic numerals to English
-        day = int(arabic_to_english_numbers(day_ar))
-        year = int(arabic_to_english_numbers(year_ar))
 
-        # Find month number
-        month = None
-        for month_arabic, month_num in HIJRI_MONTHS.items():
-            if month_arabic in month_name:
-                month = month_num
-                break
-
-        if month:
-            return f"{day_ar} {month_name} {year_ar}هـ", (day, month, year)
-
-    return None, None
+from arabic_numbers import find_serial
+from arabic_text import to_arabic_digits
+from hijri_calendar import to_gregorian
+from media_probe import files_dir_of, fill_clip_lengths
+from record_store import save_messages, store_path_of
+from series_catalog import load_catalog
+from telegram_parser import parse_export
 
 def hijri_to_gregorian(day, month, year):
-    """Convert Hijri date to Gregorian"""
+    """Convert Hijri date to Gregorian (Umm al-Qura table, 1350-1500 AH)"""
     try:
-        hijri_date = Hijri(year, month, day)
-        greg_date = hijri_date.to_gregorian()
-        return f"{greg_date.day:02d}/{greg_date.month:02d}/{greg_date.year}"
-    except:
+        greg_date = to_gregorian(year, month, day)
+    except ValueError:
         return "N/A"
+    return f"{greg_date.day:02d}/{greg_date.month:02d}/{greg_date.year}"
+
+# Main book titles, highest priority first (longer patterns first for better
+# matching), and title -> author, from series_catalog.json
+TABLES = load_catalog().extractors['parse_archive_messages']
+SERIES_PATTERNS = TABLES['patterns']
+SERIES_AUTHORS = TABLES['authors']
 
 def extract_series_name(text):
     """Extract series name from text"""
-    # Look for main book titles (longer patterns first for better matching)
-    series_patterns = [
-        (r'تنبيه الأنام على مافي كتاب سبل السلام من الفوائد والأحكام',
-         'تنبيه الأنام على ما في كتاب سبل السلام من الفوائد والأحكام'),
-        (r'تنبيه الانام على ما في كتاب سبل السلام',
-         'تنبيه الأنام على ما في كتاب سبل السلام من الفوائد والأحكام'),
-        (r'الممتع شرح زاد المستقنع', 'الممتع شرح زاد المستقنع'),
-        (r'الممتع_شرح_زاد_المستقنع', 'الممتع شرح زاد المستقنع'),
-        (r'آداب المشي إلى الصلاة', 'كتاب آداب المشي إلى الصلاة'),
-        (r'آداب_المشي_إلى_الصلاة', 'كتاب آداب المشي إلى الصلاة'),
-        (r'الأفنان الندية شرح السبل السوية', 'الأفنان الندية شرح السبل السوية'),
-        (r'الأفنان الندية', 'الأفنان الندية'),
-        (r'الأفنان_الندية', 'الأفنان الندية'),
-        (r'المورد العذب الزلال', 'المورد العذب الزلال'),
-        (r'إرشاد الساري', 'إرشاد الساري شرح السنة للبربهاري'),
-        (r'معارج القبول', 'معارج القبول شرح منظومة سلم الوصول'),
-        (r'الملخص الفقهي', 'الملخص الفقهي'),
-        (r'كتاب الفقه الميسر', 'شرح كتاب الفقه الميسر'),
-        (r'تأسيس الأحكام', 'تأسيس الأحكام شرح عمدة الأحكام'),
-        (r'صحيح البخاري', 'صحيح البخاري'),
-        (r'التفسير الميسر', 'التفسير الميسر'),
-        (r'الملخص شرح كتاب التوحيد', 'الملخص شرح كتاب التوحيد'),
-        (r'مختصر السيرة النبوية', 'مختصر السيرة النبوية'),
-        (r'التحفة النجمية', 'التحفة النجمية بشرح الأربعين النووية'),
-        (r'غنية السائل', 'غنية السائل بما في لامية شيخ الإسلام من مسائل'),
-    ]
-
-    for pattern, standardized_name in series_patterns:
-        if re.search(pattern, text):
-            return standardized_name
+    standardized_name = SERIES_PATTERNS.first(text)
+    if standardized_name:
+        return standardized_name
 
     # Look for hashtags as series indicators
     hashtag_match = re.search(r'#([\u0600-\u06FF_]+)', text)
@@ -119,63 +49,23 @@ def extract_series_name(text):
     return None
 
 def extract_lesson_number(text):
-    """Extract lesson number from text like 'الدرس رقم ١' or 'الدرس الأول' or '{01}'"""
-    # Pattern 1: "الدرس رقم ١"
-    pattern1 = r'الدرس رقم\s*([\d\u0660-\u0669]+)'
-    match1 = re.search(pattern1, text)
-    if match1:
-        return match1.group(1)
-
-    # Pattern 2: "{01}" or "المجلس {02}" format
-    pattern2 = r'\{(\d+)\}'
-    match2 = re.search(pattern2, text)
-    if match2:
-        # Convert to Arabic numerals
-        english_num = match2.group(1)
-        arabic_num = ''.join(ARABIC_TO_ENGLISH.get(c, c) for c in str(int(english_num)))
-        # Convert back to Arabic
-        reverse_map = {v: k for k, v in ARABIC_TO_ENGLISH.items()}
-        return ''.join(reverse_map.get(c, c) for c in english_num)
-
-    # Pattern 3: "الدرس الأول" (ordinal)
-    ordinals = {
-        'الأول': '١', 'الثاني': '٢', 'الثالث': '٣', 'الرابع': '٤',
-        'الخامس': '٥', 'السادس': '٦', 'السابع': '٧', 'الثامن': '٨',
-        'التاسع': '٩', 'العاشر': '١٠'
-    }
-
-    for ordinal, number in ordinals.items():
-        if ordinal in text:
-            return number
+    """(lesson number in Arabic digits, its value) of a text like 'الدرس رقم ١',
+    'الدرس الحادي عشر' or 'المجلس {01}' (see arabic_numbers); (None, None)
+    when it has none"""
+    serial = find_serial(text)
+    if not serial:
+        return None, None
 
-    return None
+    value, digits = serial
+    # Keep the number as written ('٠١') when it is in digits
+    return to_arabic_digits(digits or str(value)), value
 
 def determine_author(series_name):
     """Determine original author based on series name"""
     if not series_name:
         return 'Not Available'
 
-    author_map = {
-        'تنبيه الأنام': 'محمد بن صالح العثيمين',
-        'تأسيس الأحكام': 'أحمد بن يحيى النجمي',
-        'الملخص الفقهي': 'صالح الفوزان',
-        'الملخص شرح كتاب التوحيد': 'صالح الفوزان',
-        'صحيح البخاري': 'محمد بن إسماعيل البخاري',
-        'المورد العذب': 'أحمد النجمي',
-        'الأفنان الندية': 'زيد بن هادي المدخلي',
-        'الأفنان': 'زيد بن هادي المدخلي',
-        'معارج القبول': 'حافظ حكمي',
-        'إرشاد الساري': 'أحمد النجمي',
-        'التفسير الميسر': 'نخبة من أهل العلم',
-        'مختصر السيرة': 'محمد بن عبد الوهاب',
-        'التحفة النجمية': 'أحمد النجمي',
-        'غنية السائل': 'ابن القيم',
-        'الفقه الميسر': 'مجموعة من أهل العلم',
-        'الممتع': 'محمد بن صالح العثيمين',
-        'آداب المشي': 'عبد العزيز بن باز',
-    }
-
-    for key, author in author_map.items():
+    for key, author in SERIES_AUTHORS.items():
         if key in series_name:
             return author
 
@@ -207,74 +97,67 @@ def determine_category(series_name):
 
     return 'Other'
 
-def parse_archive_messages(html_file):
-    """Parse archive HTML export and extract structured data"""
-
-    with open(html_file, 'r', encoding='utf-8') as f:
-        soup = BeautifulSoup(f.read(), 'html.parser')
+def archive_records(fields):
+    """Structured records for the audio files of one message (a
+    telegram_parser view)"""
+    records = []
 
-    messages = []
-    all_message_divs = soup.find_all('div', class_='message')
+    for audio in fields['audio_files']:
+        filename = audio['href']
 
-    print(f"Found {len(all_message_divs)} total message divs")
+        # Only process actual audio files (not links)
+        if filename and ('files/' in filename or '.m4a' in filename or '.mp3' in filename):
+            # Extract filename
+            audio_filename = filename.split('/')[-1] if '/' in filename else filename
 
-    audio_count = 0
-    for msg_div in all_message_divs:
-        # Look for audio files
-        audio_tags = msg_div.find_all('a', class_='media_audio_file')
+            # Extract clip length (duration)
+            clip_length = audio['status'] if audio['status'] is not None else 'N/A'
 
-        for audio_tag in audio_tags:
-            filename = audio_tag.get('href', '')
+            # Extract message text
+            message_text = fields['text']
 
-            # Only process actual audio files (not links)
-            if filename and ('files/' in filename or '.m4a' in filename or '.mp3' in filename):
-                audio_count += 1
+            # Extract series name
+            series_name = extract_series_name(message_text)
 
-                # Extract filename
-                audio_filename = filename.split('/')[-1] if '/' in filename else filename
+            # Extract lesson number, and its value for sorting
+            lesson_number, lesson_serial = extract_lesson_number(message_text)
 
-                # Extract clip length (duration)
-                clip_length = 'N/A'
-                status_div = audio_tag.find('div', class_='status details')
-                if status_div:
-                    clip_length = status_div.get_text(strip=True)
+            # Extract Hijri date
+            hijri_date_text, hijri_tuple = fields['hijri_date']
 
-                # Extract message text
-                text_div = msg_div.find('div', class_='text')
-                message_text = text_div.get_text(strip=True) if text_div else ''
+            # Convert to Gregorian
+            greg_date = 'N/A'
+            if hijri_tuple:
+                day, month, year = hijri_tuple
+                greg_date = hijri_to_gregorian(day, month, year)
 
-                # Extract series name
-                series_name = extract_series_name(message_text)
+            # Determine author and category
+            author = determine_author(series_name) if series_name else 'Not Available'
+            category = determine_category(series_name) if series_name else 'Other'
 
-                # Extract lesson number
-                lesson_number = extract_lesson_number(message_text)
+            records.append({
+                'filename': audio_filename,
+                'series_name': series_name or 'Not Available',
+                'lesson_number': lesson_number or 'Not Available',
+                'lesson_serial': lesson_serial,
+                'hijri_date': hijri_date_text or 'Not Available',
+                'greg_date': greg_date,
+                'clip_length': clip_length,
+                'author': author,
+                'category': category,
+                'message_text': message_text
+            })
 
-                # Extract Hijri date
-                hijri_date_text, hijri_tuple = extract_hijri_date(message_text)
+    return records
 
-                # Convert to Gregorian
-                greg_date = 'N/A'
-                if hijri_tuple:
-                    day, month, year = hijri_tuple
-                    greg_date = hijri_to_gregorian(day, month, year)
-
-                # Determine author and category
-                author = determine_author(series_name) if series_name else 'Not Available'
-                category = determine_category(series_name) if series_name else 'Other'
+def parse_archive_messages(html_file):
+    """Parse archive HTML export and extract structured data"""
 
-                messages.append({
-                    'filename': audio_filename,
-                    'series_name': series_name or 'Not Available',
-                    'lesson_number': lesson_number or 'Not Available',
-                    'hijri_date': hijri_date_text or 'Not Available',
-                    'greg_date': greg_date,
-                    'clip_length': clip_length,
-                    'author': author,
-                    'category': category,
-                    'message_text': message_text
-                })
+    stats = {}
+    messages = parse_export(html_file, {'archive': archive_records}, stats)['archive']
 
-    print(f"Extracted {audio_count} audio messages")
+    print(f"Found {stats['messages']} total message divs")
+    print(f"Extracted {len(messages)} audio messages")
     return messages
 
 def main():
@@ -288,9 +171,14 @@ def main():
 
     messages = parse_archive_messages(input_file)
 
-    # Save to JSON
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump(messages, f, ensure_ascii=False, indent=2)
+    # Fill missing clip lengths from the audio files, when the export has them
+    filled = fill_clip_lengths(messages, files_dir_of(input_file))
+    if filled:
+        print(f"🎧 Read {filled} clip lengths from the audio file headers")
+
+    # Save to JSON, plus the record store the extractors read
+    save_messages(messages, output_json)
+    save_messages(messages, store_path_of(output_json))
 
     print()
     print(f"✅ Saved {len(messages)} messages to {output_json}")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Ordered pattern rules compiled into one regex.
+
+The series extractors hold a priority-ordered list of (pattern, value)
+rules and return the value of the first rule whose pattern occurs
+anywhere in the text, which used to be one re.search per rule. A
+PatternUnion compiles all rules into a single alternation with one named
+group per rule:
+
+- patterns are factored on their leading literal characters (a trie), so
+  the alternatives at any point start with different characters and the
+  regex engine can skip positions that cannot start any rule
+- where a literal prefix is shared no further (a rule ends there, or the
+  next character is not a plain literal), the remaining alternatives are
+  listed in rule order, so at any position the match is the
+  highest-priority rule matching at that position
+
+Rules can still overlap across positions (a lower-priority rule may match
+earlier in the text), so the search continues one character after each
+match until no higher-priority rule is left; captions hold one or two
+matches, so this is usually one or two regex calls per message.
+
+    series = PatternUnion([('الأفنان الندية شرح السبل السوية', 'الأفنان الندية شرح السبل السوية'),
+                           ('الأفنان الندية', 'الأفنان الندية')])
+    series.first(text)           # -> value of the first rule found in text, or None
+"""
+
+import re
+
+_META = set('.^$*+?{}[]\\|()')
+_QUANTIFIERS = set('*+?{')
+
+
+def _leading_literal(source):
+    """First character of a pattern if it matches only itself, else None.
+    Patterns containing '|' are never factored."""
+    if source and '|' not in source and source[0] not in _META and source[1:2] not in _QUANTIFIERS:
+        return source[0]
+    return None
+
+
+def _alternation(rules):
+    """Regex source for [(rule index, remaining pattern)] in rule order"""
+    if len(rules) > 1 and all(_leading_literal(source) for _, source in rules):
+        branches = {}
+        for index, source in rules:
+            branches.setdefault(source[0], []).append((index, source[1:]))
+        parts = [re.escape(char) + _alternation(rest) for char, rest in branches.items()]
+        return parts[0] if len(parts) == 1 else '(?:' + '|'.join(parts) + ')'
+
+    return '(?:' + '|'.join(f'(?P<r{index}>{source})' for index, source in rules) + ')'
+
+
+class PatternUnion:
+    """First-matching-rule lookup over priority-ordered (pattern, value) rules.
+
+    Patterns are regex sources; they must not define their own named groups.
+    """
+
+    def __init__(self, rules):
+        rules = list(rules)
+        self.values = [value for _, value in rules]
+        self.regex = re.compile(_alternation([(index, pattern) for index, (pattern, _) in enumerate(rules)]))
+
+    @classmethod
+    def from_groups(cls, groups):
+        """Rules from {value: [patterns]}, in dict order then list order"""
+        return cls((pattern, value) for value, patterns in groups.items() for pattern in patterns)
+
+    def first_index(self, text):
+        """Index of the first rule (in rule order) matching text, or None"""
+        best = None
+        match = self.regex.search(text)
+        while match:
+            index = int(match.lastgroup[1:])
+            if best is None or index < best:
+                best = index
+                if index == 0:
+                    break
+            match = self.regex.search(text, match.start() + 1)
+        return best
+
+    def first(self, text, default=None):
+        """Value of the first rule (in rule order) matching text"""
+        index = self.first_index(text)
+        return default if index is None else self.values[index]
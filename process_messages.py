@@ -4,9 +4,10 @@ Process all messages and create CSV output
 This script reads the parsed messages and creates a template for data extraction
 """
 
-import json
 import csv
 
+from record_store import load_messages
+
 
 def classify_message(msg):
     """
@@ -84,8 +85,7 @@ def main():
     print("="*70 + "\n")
 
     # Load messages
-    with open('messages_parsed.json', 'r', encoding='utf-8') as f:
-        messages = json.load(f)
+    messages = load_messages('messages_parsed.json')
 
     print(f"📚 Processing {len(messages)} messages...\n")
 
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Compact binary store for the parsed-message intermediates.
+
+The parse stages used to hand their records to the extractors only as
+indent=2 JSON, which every extractor re-reads and re-decodes in full. A
+record store (.tgrec) holds the same records column by column:
+
+- columns with repeated values (clip_length, greg_date, author, ...) are
+  dictionary-encoded: a value table plus one uint32 code per record
+- the other columns (message_text, filename, ...) are slices of one
+  contiguous UTF-8 text blob, addressed by a uint64 offsets array
+
+A column that some records do not have also stores which records have it
+(one presence bit per record), so a record converts back without the keys
+it was written without rather than with None for them.
+
+Every section is length-prefixed and 8-byte aligned. RecordStore opens a
+file with mmap: codes and offsets are memoryview casts over the mapping
+and a record's text is decoded only when it is accessed (text_bytes()
+returns it without copying at all).
+
+Layout (little-endian):
+    magic 'TGREC002' | u32 records | u32 columns
+    per column: u16 name length, name, u8 kind ('D' or 'T'),
+        u8 sparse, padding,
+        if sparse: presence bits[records] (bit i & 7 of byte i >> 3), padding
+        'D': u32 values, u64 table size, table (u32 length + UTF-8 each),
+             padding, u32 codes[records], padding
+        'T': u64 offsets[records + 1] (into the blob)
+    u64 blob size, blob
+
+Derived columns (normalized_text, the normalize_arabic() form of
+message_text) are computed once when the store is written. They can be
+read like any other field but are not part of a record's keys, so a
+record converts back to exactly the dict it was written from. A derived
+column is present in the records that have its source column.
+
+JSON stays the export format (save_messages picks the format from the
+file extension) and load_messages() reads either; it falls back to the
+JSON when the store was written in an older layout.
+
+Usage:
+    python record_store.py messages_parsed.json      # -> messages_parsed.tgrec
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+from arabic_text import normalize_arabic
+
+MAGIC = b'TGREC002'
+EXTENSION = '.tgrec'
+
+# A column is dictionary-encoded when it has at most this share of distinct values
+DICTIONARY_RATIO = 0.5
+
+# Derived column -> (source column, function computing it from the source value)
+DERIVED_COLUMNS = {
+    'normalized_text': ('message_text', normalize_arabic),
+}
+
+
+def _pad(f):
+    f.write(b'\0' * (-f.tell() % 8))
+
+
+def _native(values):
+    """array in little-endian byte order for writing"""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def write_records(records, output_file):
+    """Write a list of flat {str: str} records as a record store"""
+    columns = []
+    for record in records:
+        for name in record:
+            if name not in columns:
+                columns.append(name)
+
+    derived = {}
+    sources = {}
+    for name, (source, compute) in DERIVED_COLUMNS.items():
+        if source in columns and name not in columns:
+            columns.append(name)
+            derived[name] = [compute(record.get(source)) for record in records]
+            sources[name] = source
+
+    blob = bytearray()
+    with open(output_file, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<II', len(records), len(columns)))
+
+        for name in columns:
+            values = derived.get(name) or [record.get(name) for record in records]
+            encoded_name = name.encode('utf-8')
+            f.write(struct.pack('<H', len(encoded_name)))
+            f.write(encoded_name)
+
+            # Absent keys are written as None and marked in the presence bits
+            present = sources.get(name, name)
+            presence = bytearray((len(records) + 7) // 8)
+            for index, record in enumerate(records):
+                if present in record:
+                    presence[index >> 3] |= 1 << (index & 7)
+            sparse = any(present not in record for record in records)
+
+            distinct = {}
+            for value in values:
+                distinct.setdefault(value, len(distinct))
+
+            kind = b'D' if len(distinct) <= max(1, len(values) * DICTIONARY_RATIO) else b'T'
+            f.write(kind + struct.pack('<B', sparse))
+            _pad(f)
+            if sparse:
+                f.write(presence)
+                _pad(f)
+
+            if kind == b'D':
+                table = bytearray()
+                for value in distinct:
+                    encoded = json.dumps(value, ensure_ascii=False).encode('utf-8')
+                    table += struct.pack('<I', len(encoded)) + encoded
+                f.write(struct.pack('<IQ', len(distinct), len(table)))
+                f.write(table)
+                _pad(f)
+                f.write(_native(array('I', [distinct[value] for value in values])).tobytes())
+                _pad(f)
+            else:
+                offsets = array('Q', [len(blob)])
+                for value in values:
+                    if not isinstance(value, str):
+                        # Non-text values of a text column keep their JSON form
+                        value = '\0' + json.dumps(value, ensure_ascii=False)
+                    blob += value.encode('utf-8')
+                    offsets.append(len(blob))
+                f.write(_native(offsets).tobytes())
+
+        f.write(struct.pack('<Q', len(blob)))
+        f.write(blob)
+
+
+class Record(Mapping):
+    """Read-only view of one record; values are decoded on access"""
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, name):
+        return self._store.value(self._index, name)
+
+    def __contains__(self, name):
+        return name in self._store.columns and self._store.has(self._index, name)
+
+    def __iter__(self):
+        store, index = self._store, self._index
+        if not store.presence:
+            return iter(store.fields)
+        return (name for name in store.fields if store.has(index, name))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class RecordStore(Sequence):
+    """Memory-mapped record store; a sequence of Record views"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        if view[:8] != MAGIC:
+            view.release()
+            self._mmap.close()
+            self._file.close()
+            raise ValueError(f"{path} is not a record store of this version")
+        self._count, column_count = struct.unpack_from('<II', view, 8)
+
+        self.columns = {}
+        # Presence bits of the columns some records do not have
+        self.presence = {}
+        pos = 16
+        for _ in range(column_count):
+            (name_length,) = struct.unpack_from('<H', view, pos)
+            pos += 2
+            name = bytes(view[pos:pos + name_length]).decode('utf-8')
+            pos += name_length
+            kind = bytes(view[pos:pos + 1])
+            sparse = view[pos + 1]
+            pos += 2
+            pos += -pos % 8
+            if sparse:
+                self.presence[name] = view[pos:pos + (self._count + 7) // 8]
+                pos += (self._count + 7) // 8
+                pos += -pos % 8
+
+            if kind == b'D':
+                value_count, table_size = struct.unpack_from('<IQ', view, pos)
+                pos += 12
+                table = []
+                end = pos + table_size
+                while pos < end:
+                    (length,) = struct.unpack_from('<I', view, pos)
+                    table.append(json.loads(bytes(view[pos + 4:pos + 4 + length]).decode('utf-8')))
+                    pos += 4 + length
+                pos += -pos % 8
+                codes = self._cast(view[pos:pos + 4 * self._count], 'I')
+                pos += 4 * self._count
+                pos += -pos % 8
+                self.columns[name] = ('D', table, codes)
+            else:
+                offsets = self._cast(view[pos:pos + 8 * (self._count + 1)], 'Q')
+                pos += 8 * (self._count + 1)
+                self.columns[name] = ('T', offsets, None)
+
+        self.fields = [name for name in self.columns if name not in DERIVED_COLUMNS]
+
+        (blob_size,) = struct.unpack_from('<Q', view, pos)
+        pos += 8
+        self._blob = view[pos:pos + blob_size]
+
+    @staticmethod
+    def _cast(section, typecode):
+        if sys.byteorder == 'little':
+            return section.cast(typecode)
+        values = array(typecode, section)
+        values.byteswap()
+        return values
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Record(self, i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('record index out of range')
+        return Record(self, index)
+
+    def text_bytes(self, index, name):
+        """UTF-8 bytes of a text column value, as a memoryview into the file"""
+        kind, offsets, _ = self.columns[name]
+        if kind != 'T':
+            raise KeyError(f"{name} is not a text column")
+        return self._blob[offsets[index]:offsets[index + 1]]
+
+    def has(self, index, name):
+        """Whether the record at index has the (existing) column name"""
+        bits = self.presence.get(name)
+        return bits is None or bool(bits[index >> 3] >> (index & 7) & 1)
+
+    def value(self, index, name):
+        if name in self.presence and not self.has(index, name):
+            raise KeyError(name)
+        if name not in self.columns and name in DERIVED_COLUMNS:
+            # Store written without this derived column
+            source, compute = DERIVED_COLUMNS[name]
+            return compute(self.value(index, source))
+
+        kind, data, codes = self.columns[name]
+        if kind == 'D':
+            return data[codes[index]]
+
+        text = str(self._blob[data[index]:data[index + 1]], 'utf-8')
+        if text.startswith('\0'):
+            return json.loads(text[1:])
+        return text
+
+    def close(self):
+        # Drop the views over the mapping before closing it
+        self.columns = {}
+        for bits in self.presence.values():
+            bits.release()
+        self.presence = {}
+        self._blob.release()
+        self._blob = None
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def store_path_of(json_file):
+    """messages_parsed.json -> messages_parsed.tgrec"""
+    return os.path.splitext(json_file)[0] + EXTENSION
+
+
+def save_messages(records, output_file):
+    """Write parsed records as JSON (.json) or as a record store (.tgrec)"""
+    if output_file.endswith(EXTENSION):
+        write_records(records, output_file)
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+
+
+def load_messages(path):
+    """Parsed records of a .json or .tgrec file.
+
+    For a .json path the record store next to it is used instead when it
+    is at least as new (e.g. messages_parsed.tgrec for
+    messages_parsed.json), so extractors skip decoding the JSON. Either
+    way the records carry the derived columns (normalized_text).
+    """
+    store_path = path if path.endswith(EXTENSION) else store_path_of(path)
+    if os.path.exists(store_path) and (
+            store_path == path or not os.path.exists(path)
+            or os.path.getmtime(store_path) >= os.path.getmtime(path)):
+        try:
+            return RecordStore(store_path)
+        except ValueError:
+            # Written in an older layout: read the JSON
+            if store_path == path or not os.path.exists(path):
+                raise
+
+    with open(path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+
+    for record in records:
+        for name, (source, compute) in DERIVED_COLUMNS.items():
+            if source in record:
+                record[name] = compute(record[source])
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert between parsed-message JSON and record stores")
+    parser.add_argument('input', help="parsed JSON (.json) or record store (.tgrec)")
+    parser.add_argument('output', nargs='?',
+                        help="output file (default: the input with the other extension)")
+    args = parser.parse_args()
+
+    if args.input.endswith(EXTENSION):
+        output = args.output or os.path.splitext(args.input)[0] + '.json'
+        with RecordStore(args.input) as store:
+            records = [dict(record) for record in store]
+    else:
+        output = args.output or store_path_of(args.input)
+        with open(args.input, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+
+    save_messages(records, output)
+    print(f"✅ Wrote {len(records)} records: {args.input} ({os.path.getsize(args.input):,} bytes) -> "
+          f"{output} ({os.path.getsize(output):,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
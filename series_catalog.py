@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+The series catalog (series_catalog.json), compiled once into the lookup
+tables and matchers of the extractors and cached as an on-disk snapshot.
+
+Series knowledge used to be repeated as Python literals in every
+extractor (SERIES_DATABASE, SCHEDULE, the scoring tables of
+improve_schedule_matching.py, the author/category/pattern tables of the
+regex extractors and of parse_archive_messages.py). series_catalog.json
+holds all of it declaratively:
+
+- series: name, type, author, category, aliases (other titles, matched by
+  the strict schedule extraction) and keywords (searched for by the
+  manual-style extraction), in manual-style priority order
+- weekly_slots: weekday -> [series, location] slots, in schedule order
+  (the first slot listed wins a tie between equally long names)
+- extractors: the tables of the extractors that name or attribute series
+  differently from the catalog, kept as they are so that their output
+  does not change when they read them from here
+
+compile_catalog() turns it into:
+- series_database and series_automaton (extract_manual_style.py): one
+  entry per series with keywords, its locations and days taken from the
+  weekly slots, and a KeywordAutomaton over the lowercased keywords
+- schedule and schedule_index (extract_with_schedule_strict.py): the
+  weekly slots as series entries with their normalize_arabic() names,
+  and (weekday, location) -> matcher, names longest first, plus
+  (weekday, None) -> matcher over all of the day's series
+- extractors: the per-extractor tables, with pattern lists compiled into
+  PatternUnions and title variants into a TrigramIndex
+- fingerprints: SHA-256 of each part (series, weekly_slots and every
+  extractor section), so that results cached from some of the parts
+  (extraction_cache.py) are only invalidated when those parts change
+
+load_catalog() returns the compiled catalog from series_catalog.snapshot
+(a pickle next to the catalog) when the snapshot was written by the same
+SNAPSHOT_VERSION from the same catalog file and the same code of the
+modules that compile it or whose objects it pickles (COMPILER_MODULES, by
+SHA-256), and otherwise compiles the catalog and rewrites the snapshot.
+A snapshot that cannot be read is simply recompiled. The catalog is loaded
+once per process and shared by every extractor importing it.
+
+Usage:
+    python series_catalog.py             # compile and write the snapshot
+    python series_catalog.py --summary   # also show what the catalog holds
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
+from types import SimpleNamespace
+
+from arabic_text import normalize_arabic
+from extraction_cache import rules_fingerprint
+from keyword_automaton import KeywordAutomaton
+from pattern_union import PatternUnion
+from trigram_index import TrigramIndex
+
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'series_catalog.json')
+SNAPSHOT_EXTENSION = '.snapshot'
+
+# Bump when the compiled form changes, so old snapshots are recompiled
+SNAPSHOT_VERSION = '2'
+
+# Modules whose code shapes the compiled catalog or the classes pickled in
+# the snapshot
+COMPILER_MODULES = ['series_catalog', 'arabic_text', 'keyword_automaton', 'pattern_union', 'trigram_index']
+
+LOCATION_KEYS = {'جامع الورود': 'masjid', 'Online': 'online'}
+
+_loaded = {}
+
+
+def snapshot_path_of(catalog_file):
+    """series_catalog.json -> series_catalog.snapshot"""
+    return os.path.splitext(catalog_file)[0] + SNAPSHOT_EXTENSION
+
+
+def _series_database(series_list, weekly_slots):
+    """Manual-style entries: the series with search keywords, with the
+    days they are held on at each location"""
+    days = {}
+    for day, slots in weekly_slots.items():
+        for name, location in slots:
+            days.setdefault((name, LOCATION_KEYS[location]), []).append(day)
+
+    database = []
+    for series in series_list:
+        if 'keywords' not in series:
+            continue
+        entry = {'name': series['name'], 'keywords': series['keywords']}
+        for key in LOCATION_KEYS.values():
+            entry[f'location_{key}'] = (series['name'], key) in days
+        entry['author'] = series['author']
+        entry['category'] = series['category']
+        for key in LOCATION_KEYS.values():
+            if (series['name'], key) in days:
+                entry[f'days_{key}'] = days[(series['name'], key)]
+        database.append(entry)
+    return database
+
+
+def _series_automaton(series_database):
+    """Keyword automaton over every series' (lowercased) keywords, whose
+    values are the indexes of the series they belong to"""
+    automaton = KeywordAutomaton()
+    for series_idx, series in enumerate(series_database):
+        for keyword in series['keywords']:
+            automaton.add(keyword.lower(), series_idx)
+    return automaton.build()
+
+
+def _schedule(series_list, weekly_slots):
+    """weekday -> schedule entries of its slots, with the names and aliases
+    in matching form (name first)"""
+    by_name = {series['name']: series for series in series_list}
+    schedule = {}
+    for day, slots in weekly_slots.items():
+        entries = schedule[day] = []
+        for name, location in slots:
+            series = by_name[name]
+            entry = {key: series[key] for key in ('name', 'type', 'author')}
+            entry['location'] = location
+            entry['category'] = series['category']
+            if series['aliases']:
+                entry['aliases'] = series['aliases']
+            entry['normalized_names'] = [normalize_arabic(name) for name in [name] + series['aliases']]
+            entries.append(entry)
+    return schedule
+
+
+def _schedule_matcher(candidates):
+    """(normalized name, series) of the candidates' names and aliases,
+    longest first; the sort is stable, so of two names of the same length
+    the one listed first comes first"""
+    names = [(name, series) for series in candidates for name in series['normalized_names'] if name]
+    return tuple(sorted(names, key=lambda entry: -len(entry[0])))
+
+
+def _schedule_index(schedule):
+    """(weekday, location) -> matcher over that day's series at that
+    location; (weekday, None) -> matcher over all of the day's series, the
+    fallback when none of them is at the message's location"""
+    index = {}
+    for day, day_series in schedule.items():
+        index[(day, None)] = _schedule_matcher(day_series)
+        for location in {series['location'] for series in day_series}:
+            index[(day, location)] = _schedule_matcher(
+                [series for series in day_series if series['location'] == location])
+    return index
+
+
+def _extractor_tables(extractors):
+    tables = {name: dict(section) for name, section in extractors.items()}
+
+    for section in tables.values():
+        patterns = section.get('patterns')
+        if isinstance(patterns, dict):
+            section['patterns'] = PatternUnion.from_groups(patterns)
+        elif patterns is not None:
+            section['patterns'] = PatternUnion(tuple(rule) for rule in patterns)
+
+        if 'title_variants' in section:
+            title_index = TrigramIndex(max_distance=2)
+            for series, variants in section['title_variants'].items():
+                for name in [series] + variants:
+                    title_index.add(name, series)
+            section['title_index'] = title_index
+    return tables
+
+
+def _fingerprints(catalog):
+    parts = {'series': catalog['series'], 'weekly_slots': catalog['weekly_slots']}
+    parts.update(catalog['extractors'])
+    return {name: hashlib.sha256(json.dumps(part, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+            for name, part in parts.items()}
+
+
+def compile_catalog(catalog):
+    """Compiled form of a parsed catalog (see the module docstring)"""
+    series_database = _series_database(catalog['series'], catalog['weekly_slots'])
+    schedule = _schedule(catalog['series'], catalog['weekly_slots'])
+    return SimpleNamespace(
+        version=catalog['version'],
+        series=catalog['series'],
+        series_database=series_database,
+        series_automaton=_series_automaton(series_database),
+        schedule=schedule,
+        schedule_index=_schedule_index(schedule),
+        extractors=_extractor_tables(catalog['extractors']),
+        fingerprints=_fingerprints(catalog),
+    )
+
+
+def _read_snapshot(path, source_hash):
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except Exception:
+        # Missing, truncated, or pickled by other code: compile instead
+        return None
+    if (isinstance(snapshot, dict) and snapshot.get('version') == SNAPSHOT_VERSION
+            and snapshot.get('source') == source_hash):
+        return snapshot.get('catalog')
+    return None
+
+
+def _write_snapshot(path, source_hash, compiled):
+    """Write the snapshot atomically; a catalog in a read-only directory is
+    simply compiled every time"""
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'version': SNAPSHOT_VERSION, 'source': source_hash, 'catalog': compiled},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def load_catalog(catalog_file=CATALOG_FILE, rebuild=False):
+    """Compiled series catalog, from its snapshot when that is current
+    (loaded once per process)"""
+    if not rebuild and catalog_file in _loaded:
+        return _loaded[catalog_file]
+
+    with open(catalog_file, 'rb') as f:
+        source = f.read()
+    source_hash = rules_fingerprint(COMPILER_MODULES, hashlib.sha256(source).hexdigest())
+    snapshot_path = snapshot_path_of(catalog_file)
+
+    compiled = None if rebuild else _read_snapshot(snapshot_path, source_hash)
+    if compiled is None:
+        compiled = compile_catalog(json.loads(source.decode('utf-8')))
+        _write_snapshot(snapshot_path, source_hash, compiled)
+
+    _loaded[catalog_file] = compiled
+    return compiled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the series catalog into its snapshot")
+    parser.add_argument('catalog', nargs='?', default=CATALOG_FILE, help="catalog file (JSON)")
+    parser.add_argument('--summary', action='store_true', help="show what the catalog holds")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = load_catalog(args.catalog, rebuild=True)
+    compiled_ms = (time.perf_counter() - start) * 1000
+
+    _loaded.clear()
+    start = time.perf_counter()
+    load_catalog(args.catalog)
+    loaded_ms = (time.perf_counter() - start) * 1000
+
+    print(f"📚 {args.catalog}: {len(catalog.series)} series, "
+          f"{sum(len(slots) for slots in catalog.schedule.values())} weekly slots")
+    print(f"✅ Wrote {snapshot_path_of(args.catalog)} "
+          f"(compiled in {compiled_ms:.1f} ms, loads in {loaded_ms:.1f} ms)")
+
+    if args.summary:
+        print()
+        for day, entries in catalog.schedule.items():
+            print(f"   {day:9s} | " + ', '.join(f"{entry['name'][:25]} ({entry['location']})" for entry in entries))
+        print()
+        for name, section in catalog.extractors.items():
+            print(f"   {name}: {', '.join(section)}")
+
+
+if __name__ == '__main__':
+    main()
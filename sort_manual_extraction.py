@@ -4,6 +4,7 @@ Sort the manual-style extraction by series and date,
 adding sequence numbers to easily identify missing lessons.
 """
 
+import bisect
 import csv
 from datetime import datetime
 from collections import defaultdict
@@ -18,34 +19,34 @@ def parse_date(date_str):
     except:
         return None
 
-def main():
-    input_file = 'extracted_lectures_manual_style.csv'
-    output_file = 'lectures_manual_sorted_by_series.csv'
+def series_key_of(row):
+    """SeriesName|Location key of a row, or None for rows without a series"""
+    series_name = row.get('SeriesName', 'N/A')
+    if series_name == 'N/A':
+        return None
+    return f"{series_name}|{row.get('Location/Online', 'N/A')}"
 
-    print("=" * 80)
-    print("SORTING MANUAL-STYLE EXTRACTION BY SERIES AND DATE")
-    print("=" * 80)
-    print()
+def date_key_of(row):
+    """Chronological sort key of a row (undated rows sort first)"""
+    parsed_date = parse_date(row.get('DateInGreg', ''))
+    return parsed_date if parsed_date else datetime(1900, 1, 1)
 
-    # Read the CSV
-    rows = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            rows.append(row)
+def output_columns_of(rows_sorted):
+    """Column order with SequenceInSeries placed right after SeriesName"""
+    original_columns = list(rows_sorted[0].keys())
+    original_columns.remove('SequenceInSeries')
 
-    print(f"📖 Read {len(rows)} records from {input_file}")
-    print()
+    series_name_index = original_columns.index('SeriesName')
+    return original_columns[:series_name_index+1] + ['SequenceInSeries'] + original_columns[series_name_index+1:]
 
+def sort_rows(rows):
+    """Sort rows by series (descending lesson count) then date, numbering
+    lessons within each series. Returns (rows_sorted, series_counts)."""
     # Group by SeriesName + Location to count lessons per series
     series_counts = defaultdict(int)
     for row in rows:
-        series_name = row.get('SeriesName', 'N/A')
-        location = row.get('Location/Online', 'N/A')
-
-        # Create unique series key
-        if series_name != 'N/A':
-            series_key = f"{series_name}|{location}"
+        series_key = series_key_of(row)
+        if series_key is not None:
             series_counts[series_key] += 1
 
     # Sort series by lesson count (descending)
@@ -64,19 +65,14 @@ def main():
 
     # Add sort key to each row
     for row in rows:
-        series_name = row.get('SeriesName', 'N/A')
-        location = row.get('Location/Online', 'N/A')
-        date_str = row.get('DateInGreg', '')
-
-        if series_name != 'N/A':
-            series_key = f"{series_name}|{location}"
+        series_key = series_key_of(row)
+        if series_key is not None:
             row['_series_order'] = series_sort_order.get(series_key, 9999)
         else:
             row['_series_order'] = 9999
 
         # Parse date for sorting
-        parsed_date = parse_date(date_str)
-        row['_date_parsed'] = parsed_date if parsed_date else datetime(1900, 1, 1)
+        row['_date_parsed'] = date_key_of(row)
 
     # Sort: first by series order, then by date within each series
     rows_sorted = sorted(rows, key=lambda x: (x['_series_order'], x['_date_parsed']))
@@ -87,11 +83,8 @@ def main():
     # Add sequence numbers within each series
     sequence_counter = defaultdict(int)
     for row in rows_sorted:
-        series_name = row.get('SeriesName', 'N/A')
-        location = row.get('Location/Online', 'N/A')
-
-        if series_name != 'N/A':
-            series_key = f"{series_name}|{location}"
+        series_key = series_key_of(row)
+        if series_key is not None:
             sequence_counter[series_key] += 1
             row['SequenceInSeries'] = sequence_counter[series_key]
         else:
@@ -105,24 +98,70 @@ def main():
         del row['_series_order']
         del row['_date_parsed']
 
-    # Define output column order (add SequenceInSeries after SeriesName)
-    original_columns = list(rows_sorted[0].keys())
-    original_columns.remove('SequenceInSeries')
+    return rows_sorted, series_counts
 
-    # Insert SequenceInSeries after SeriesName
-    series_name_index = original_columns.index('SeriesName')
-    output_columns = original_columns[:series_name_index+1] + ['SequenceInSeries'] + original_columns[series_name_index+1:]
+def merge_sorted_rows(rows_sorted, new_rows):
+    """Merge new rows into an already sorted report without re-sorting it.
 
-    # Write sorted CSV
+    Each new row is inserted chronologically into its series group and
+    only that group's sequence numbers from the insertion point on are
+    renumbered; groups are then re-ranked by lesson count (ties keep their
+    current order). Returns (rows_sorted, series_counts).
+    """
+    groups = {}
+    for row in rows_sorted:
+        groups.setdefault(series_key_of(row), []).append(row)
+
+    for row in new_rows:
+        series_key = series_key_of(row)
+        group = groups.setdefault(series_key, [])
+        position = bisect.bisect_right([date_key_of(r) for r in group], date_key_of(row))
+        group.insert(position, row)
+
+        if series_key is None:
+            row['SequenceInSeries'] = 'N/A'
+        else:
+            for sequence, member in enumerate(group[position:], position + 1):
+                member['SequenceInSeries'] = sequence
+
+    series_counts = {key: len(group) for key, group in groups.items() if key is not None}
+    ranked = sorted(series_counts, key=lambda key: series_counts[key], reverse=True)
+
+    merged = []
+    for series_key in ranked:
+        merged.extend(groups[series_key])
+    merged.extend(groups.get(None, []))
+    return merged, series_counts
+
+def write_sorted(rows_sorted, output_columns, output_file):
+    """Write the sorted report"""
     with open(output_file, 'w', encoding='utf-8', newline='') as f:
         writer = csv.DictWriter(f, fieldnames=output_columns)
         writer.writeheader()
         writer.writerows(rows_sorted)
 
-    print(f"✅ Created {output_file}")
-    print()
-
-    # Show sample of each series
+def update_sorted_csv(new_rows, output_file):
+    """Fold newly extracted rows into an existing sorted report in place"""
+    with open(output_file, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        output_columns = reader.fieldnames
+        rows_sorted = list(reader)
+
+    # The report's first column name carries the extraction CSV's BOM
+    # (it is read back as plain UTF-8); key the new rows the same way
+    first_column = output_columns[0]
+    plain_first = first_column.lstrip('\ufeff')
+    new_rows = [
+        {(first_column if key == plain_first else key): value for key, value in row.items()}
+        for row in new_rows
+    ]
+
+    merged, series_counts = merge_sorted_rows(rows_sorted, new_rows)
+    write_sorted(merged, output_columns, output_file)
+    return merged, series_counts
+
+def print_preview(rows_sorted, series_counts):
+    """Show the first three lessons of each series"""
     print("=" * 80)
     print("PREVIEW OF SORTED OUTPUT (First 3 lessons per series)")
     print("=" * 80)
@@ -152,6 +191,34 @@ def main():
             print(f"   [{seq:3}] {date:12s} | Serial: {serial:5s} | {subtopic}")
             shown_count += 1
 
+def main(input_file='extracted_lectures_manual_style.csv',
+         output_file='lectures_manual_sorted_by_series.csv'):
+    print("=" * 80)
+    print("SORTING MANUAL-STYLE EXTRACTION BY SERIES AND DATE")
+    print("=" * 80)
+    print()
+
+    # Read the CSV
+    rows = []
+    with open(input_file, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            rows.append(row)
+
+    print(f"📖 Read {len(rows)} records from {input_file}")
+    print()
+
+    rows_sorted, series_counts = sort_rows(rows)
+
+    # Write sorted CSV
+    write_sorted(rows_sorted, output_columns_of(rows_sorted), output_file)
+
+    print(f"✅ Created {output_file}")
+    print()
+
+    # Show sample of each series
+    print_preview(rows_sorted, series_counts)
+
     print()
     print("=" * 80)
     print("✨ SORTING COMPLETE!")
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic Telegram channel exports for benchmarking the parsers.
+
+The messages imitate 5feb26messages.html and archive_messages.html: day
+separators, AUDIO-*.m4a lectures with the channel's Arabic captions
+(series, lesson ordinal, location, Hijri date, "مدة الصوتية" line),
+archive-style "الدرس رقم" captions, duration blocks, stickers, text-only
+announcements and voice chat service messages.
+
+Both export formats can be written from the same seed, so the HTML and
+result.json backends can be compared on identical content:
+
+    python synth_export.py 100000 synth_100k.html
+    python synth_export.py 100000 synth_100k.json --format json
+
+The file is written message by message, so even 1M-message exports are
+generated in constant memory.
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from html import escape
+
+from extract_manual_style import SERIES_DATABASE
+from telegram_json import format_duration
+
+CHANNEL_NAME = 'قناة الشيخ حسن الدغريري '
+CHANNEL_LINK = 'https://t.me/daririhasan'
+START_DATE = datetime(2026, 1, 18, 1, 51, 59)
+START_ID = 6208
+
+ARABIC_DIGITS = '٠١٢٣٤٥٦٧٨٩'
+
+ORDINALS = [
+    'الأول', 'الثاني', 'الثالث', 'الرابع', 'الخامس', 'السادس', 'السابع',
+    'الثامن', 'التاسع', 'العاشر', 'الحادي عشر', 'الثاني عشر', 'الثالث عشر',
+    'الرابع عشر', 'الخامس عشر', 'السادس عشر', 'السابع عشر', 'الثامن عشر',
+    'التاسع عشر', 'العشرون', 'الحادي والعشرون', 'الثاني والعشرون',
+    'الثالث والعشرون', 'الرابع والعشرون', 'الخامس والعشرون', 'السادس والعشرون',
+    'السابع والعشرون', 'الثامن والعشرون', 'التاسع والعشرون', 'الثلاثون',
+    'الحادي والثلاثون', 'الثاني والثلاثون',
+]
+
+HIJRI_MONTH_NAMES = [
+    'محرم', 'صفر', 'ربيع الأول', 'ربيع الثاني', 'جمادى الأولى', 'جمادى الآخرة',
+    'رجب', 'شعبان', 'رمضان', 'شوال', 'ذو القعدة', 'ذو الحجة',
+]
+
+LOCATIONS = [
+    'بجامع الورود <br>بحي الورود بجدة',
+    'عن بُعد',
+]
+
+ANNOUNCEMENTS = [
+    '📢 تنبيه: يتوقف الدرس هذا الأسبوع بسبب سفر الشيخ حفظه الله',
+    '🔸 جدول الدروس الأسبوعية <br><br>الأحد: بعد المغرب <br>الاثنين: بعد العشاء',
+    '📌 رابط القناة على الواتساب:<br><a href="https://chat.whatsapp.com/DUvpoPZFcBk22nVL1nIrVg">https://chat.whatsapp.com/DUvpoPZFcBk22nVL1nIrVg</a>',
+    'جزى الله خيرا كل من ساهم في نشر الدروس',
+]
+
+FOOTER = (
+    '<br><br><br>---<br><br>📌 للاستماع عبر التلجرام:<br>╭─═┅┅┅┅┅┅┅═─╮<br>'
+    '<a href="{link}">{link}</a><br>╰─═┅┅┅┅┅┅┅═─╯<br><br><br>---<br><br>'
+    '↩️ أسهم في إعادة نشر هذه الرسالة<br>✅ &quot;فالدال على الخير كفاعله&quot;'
+)
+
+HEADER = '''<!DOCTYPE html>
+<html>
+
+ <head>
+
+  <meta charset="utf-8"/>
+<title>Exported Data</title>
+  <meta content="width=device-width, initial-scale=1.0" name="viewport"/>
+
+  <link href="css/style.css" rel="stylesheet"/>
+
+  <script src="js/script.js" type="text/javascript">
+
+  </script>
+
+ </head>
+
+ <body onload="CheckLocation();">
+
+  <div class="page_wrap">
+
+   <div class="page_header">
+
+    <div class="content">
+
+     <div class="text bold">
+{channel}
+     </div>
+
+    </div>
+
+   </div>
+
+   <div class="page_body chat_page">
+
+    <div class="history">
+'''
+
+FOOTER_HTML = '''
+    </div>
+
+   </div>
+
+  </div>
+
+ </body>
+
+</html>
+'''
+
+
+def to_arabic_digits(number):
+    return ''.join(ARABIC_DIGITS[int(d)] for d in str(number))
+
+
+def hashtag(tag):
+    return (f'<a href="" onclick="return ShowHashtag(&quot;{tag}&quot;)">'
+            f'#{tag}</a>')
+
+
+class HijriClock:
+    """Rough Hijri calendar that advances with the Gregorian one (30-day
+    months are plenty for synthetic captions)"""
+
+    def __init__(self, day=29, month=7, year=1447):
+        self.day, self.month, self.year = day, month, year
+
+    def advance(self, days):
+        for _ in range(days):
+            self.day += 1
+            if self.day > 30:
+                self.day = 1
+                self.month += 1
+                if self.month > 12:
+                    self.month = 1
+                    self.year += 1
+
+
+def lecture_caption(series, lesson, location, hijri, duration, link, style):
+    """Caption HTML of one lecture, in the channel's current style or the
+    archive's, with or without the "مدة الصوتية" line"""
+    if style == 'archive':
+        date = (f'{to_arabic_digits(hijri.day)} {HIJRI_MONTH_NAMES[hijri.month - 1]} '
+                f'{to_arabic_digits(hijri.year)}هـ')
+        return (f'🔸 التعليق على {hashtag(series["name"].split()[0])} من كتاب {series["name"]}'
+                f'<br><br>الدرس رقم {to_arabic_digits(lesson)}<br><br>'
+                f'للشيخ حسن بن محمد منصور الدغريري<br>-حفظه الله ورعاه-<br><br>'
+                f'{date}<br><br>🖇 <a href="{link}">{link}</a>')
+
+    date = (f'{to_arabic_digits(hijri.day)} /{to_arabic_digits(hijri.month)} '
+            f'/{to_arabic_digits(hijri.year)}')
+    ordinal = ORDINALS[(lesson - 1) % len(ORDINALS)]
+    caption = (f'🔸 {series["name"]} <br>🔸 للعلامة {series["author"]} <br><br>'
+               f'🔹 الدرس {ordinal} {location}  -  {date}<br><br>'
+               f'       مع فضيلة الشيخ<br>       حسن بن محمد منصور الدغريري<br>'
+               f'       حفظه الله ورعاه')
+    if duration is not None:
+        caption += f'<br><br>🎙 مدة الصوتية: {duration} دقيقة'
+    return caption + FOOTER.format(link=link)
+
+
+def generate_messages(count, seed=0):
+    """Yield ``count`` synthetic messages as dicts (format-neutral).
+
+    Keys: id, kind ('separator', 'lecture', 'sticker', 'text', 'voice_chat'),
+    date, joined, and per kind: file, seconds, caption, duration_block.
+    """
+    rng = random.Random(seed)
+    hijri = HijriClock()
+    lessons = [0] * len(SERIES_DATABASE)
+    date = START_DATE
+    message_id = START_ID
+    separator_id = -1
+    day = None
+    joined = False
+
+    produced = 0
+    while produced < count:
+        if date.date() != day:
+            if day is not None:
+                hijri.advance((date.date() - day).days)
+            day = date.date()
+            joined = False
+            yield {'id': separator_id, 'kind': 'separator', 'date': date}
+            separator_id -= 1
+            produced += 1
+            continue
+
+        roll = rng.random()
+        message = {'id': message_id, 'date': date, 'joined': joined}
+        if roll < 0.65:
+            series_index = rng.randrange(len(SERIES_DATABASE))
+            series = SERIES_DATABASE[series_index]
+            lessons[series_index] += 1
+            seconds = rng.randint(5 * 60, 75 * 60)
+            recorded = date - timedelta(hours=rng.randint(1, 12), seconds=rng.randint(0, 3599))
+
+            # Archive captions and some current ones omit the duration;
+            # those get a duration block instead
+            style = 'archive' if rng.random() < 0.2 else 'current'
+            caption_duration = None
+            if style == 'current' and seconds < 3600 and rng.random() < 0.85:
+                caption_duration = format_duration(seconds)
+            message.update({
+                'kind': 'lecture',
+                'file': f'files/AUDIO-{recorded:%Y-%m-%d-%H-%M-%S}.m4a',
+                'seconds': seconds,
+                'duration_block': caption_duration is None,
+                'caption': lecture_caption(
+                    series, lessons[series_index], rng.choice(LOCATIONS), hijri,
+                    caption_duration, f'{CHANNEL_LINK}/{message_id}', style),
+            })
+        elif roll < 0.75:
+            message['kind'] = 'sticker'
+        elif roll < 0.95:
+            message.update({'kind': 'text', 'caption': rng.choice(ANNOUNCEMENTS)})
+        else:
+            message.update({'kind': 'voice_chat', 'seconds': rng.randint(30, 7200)})
+
+        yield message
+        produced += 1
+        message_id += 1
+        joined = message['kind'] != 'voice_chat'
+        date += timedelta(minutes=rng.randint(5, 240), seconds=rng.randint(0, 59))
+
+
+def html_message(message):
+    """One message in Telegram Desktop's HTML export markup"""
+    date = message['date']
+    kind = message['kind']
+
+    if kind == 'separator':
+        return (f'\n     <div class="message service" id="message{message["id"]}">\n\n'
+                f'      <div class="body details">\n{date.day} {date:%B %Y}\n      </div>\n\n'
+                f'     </div>\n')
+    if kind == 'voice_chat':
+        return (f'\n     <div class="message service" id="message{message["id"]}">\n\n'
+                f'      <div class="body details">\nVoice chat ({message["seconds"]} seconds)\n'
+                f'      </div>\n\n     </div>\n')
+
+    classes = 'message default clearfix joined' if message['joined'] else 'message default clearfix'
+    parts = [f'\n     <div class="{classes}" id="message{message["id"]}">\n']
+    if not message['joined']:
+        parts.append('\n      <div class="pull_left userpic_wrap">\n\n'
+                     '       <div class="userpic userpic6" style="width: 42px; height: 42px">\n\n'
+                     '        <div class="initials" style="line-height: 42px">\nق\n        </div>\n\n'
+                     '       </div>\n\n      </div>\n')
+    parts.append(f'\n      <div class="body">\n\n'
+                 f'       <div class="pull_right date details" title="{date:%d.%m.%Y %H:%M:%S} UTC+03:00">\n'
+                 f'{date:%H:%M}\n       </div>\n')
+    if not message['joined']:
+        parts.append(f'\n       <div class="from_name">\n{CHANNEL_NAME}\n       </div>\n')
+
+    if kind == 'lecture':
+        name = message['file'].split('/')[-1]
+        parts.append(f'\n       <div class="media_wrap clearfix">\n\n'
+                     f'        <a class="media clearfix pull_left block_link media_audio_file" href="{escape(message["file"])}">\n\n'
+                     f'         <div class="fill pull_left">\n\n         </div>\n\n'
+                     f'         <div class="body">\n\n'
+                     f'          <div class="title bold">\n{name}\n          </div>\n\n'
+                     f'          <div class="status details">\n{format_duration(message["seconds"])}\n          </div>\n\n')
+        if message['duration_block']:
+            parts.append(f'          <div class="duration details">\n{format_duration(message["seconds"])}\n'
+                         f'          </div>\n\n')
+        parts.append('         </div>\n\n        </a>\n\n       </div>\n')
+    elif kind == 'sticker':
+        parts.append('\n       <div class="media_wrap clearfix">\n\n'
+                     '        <div class="media clearfix pull_left media_photo">\n\n'
+                     '         <div class="fill pull_left">\n\n         </div>\n\n'
+                     '         <div class="body">\n\n'
+                     '          <div class="title bold">\nSticker\n          </div>\n\n'
+                     '          <div class="description">\nNot included, change data exporting settings to download.\n'
+                     '          </div>\n\n'
+                     '          <div class="status details">\n📌, 9.0 KB\n          </div>\n\n'
+                     '         </div>\n\n        </div>\n\n       </div>\n')
+
+    if 'caption' in message:
+        parts.append(f'\n       <div class="text">\n{message["caption"]}\n       </div>\n')
+
+    parts.append('\n      </div>\n\n     </div>\n')
+    return ''.join(parts)
+
+
+def text_entities(caption):
+    """result.json text_entities of a caption's HTML (links, hashtags, line breaks)"""
+    entities = []
+    for line_index, line in enumerate(caption.split('<br>')):
+        if line_index:
+            entities.append({'type': 'plain', 'text': '\n'})
+        rest = line
+        while '<a href="' in rest:
+            before, _, rest = rest.partition('<a href="')
+            href, _, rest = rest.partition('">')
+            text, _, rest = rest.partition('</a>')
+            if before:
+                entities.append({'type': 'plain', 'text': before.replace('&quot;', '"')})
+            entities.append({'type': 'hashtag' if not href else 'link', 'text': text})
+        if rest:
+            entities.append({'type': 'plain', 'text': rest.replace('&quot;', '"')})
+    return entities
+
+
+def json_message(message):
+    """One message as Telegram Desktop's result.json writes it"""
+    date = message['date']
+    kind = message['kind']
+    if kind == 'separator':
+        return None
+
+    result = {
+        'id': message['id'],
+        'type': 'service' if kind == 'voice_chat' else 'message',
+        'date': f'{date:%Y-%m-%dT%H:%M:%S}',
+        'date_unixtime': str(int(date.timestamp())),
+    }
+    if kind == 'voice_chat':
+        result.update({'actor': CHANNEL_NAME.strip(), 'action': 'group_call',
+                       'duration_seconds': message['seconds']})
+    else:
+        result.update({'from': CHANNEL_NAME.strip(), 'from_id': 'channel1234567890'})
+    if kind == 'lecture':
+        result.update({'file': message['file'], 'media_type': 'audio_file',
+                       'mime_type': 'audio/x-m4a', 'duration_seconds': message['seconds']})
+    elif kind == 'sticker':
+        result.update({'file': '(File not included. Change data exporting settings to download.)',
+                       'media_type': 'sticker'})
+
+    entities = text_entities(message['caption']) if 'caption' in message else []
+    result['text'] = [e['text'] if e['type'] == 'plain' else e for e in entities] if entities else ''
+    result['text_entities'] = entities
+    return result
+
+
+def write_html(messages, output_file):
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(HEADER.format(channel=CHANNEL_NAME))
+        for message in messages:
+            f.write(html_message(message))
+        f.write(FOOTER_HTML)
+
+
+def write_json(messages, output_file):
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('{\n "name": %s,\n "type": "public_channel",\n "id": 1234567890,\n "messages": [' %
+                json.dumps(CHANNEL_NAME.strip(), ensure_ascii=False))
+        first = True
+        for message in messages:
+            result = json_message(message)
+            if result is None:
+                continue
+            f.write('\n  ' if first else ',\n  ')
+            f.write(json.dumps(result, ensure_ascii=False))
+            first = False
+        f.write('\n ]\n}\n')
+
+
+def generate_export(count, output_file, export_format='html', seed=0):
+    """Write a synthetic export of ``count`` messages (including day separators)"""
+    messages = generate_messages(count, seed)
+    if export_format == 'json':
+        write_json(messages, output_file)
+    else:
+        write_html(messages, output_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Telegram export")
+    parser.add_argument('messages', type=int, help="number of messages (e.g. 1000 to 1000000)")
+    parser.add_argument('output', help="output file")
+    parser.add_argument('--format', choices=['html', 'json'], default='html',
+                        help="messages.html (default) or result.json")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    generate_export(args.messages, args.output, args.format, args.seed)
+    print(f"✅ Wrote {args.messages} messages to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
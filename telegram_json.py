@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for Telegram Desktop's machine-readable export (result.json).
+
+The export is one JSON object whose "messages" array holds the whole
+channel history. Rather than json.load()-ing it, the file is read in
+fixed-size chunks and every message object is decoded on its own with
+json.JSONDecoder.raw_decode, so memory stays bounded by one message plus
+one chunk.
+
+Records come out in the same {filename, message_text, clip_length,
+greg_date} schema as parse_feb26_messages.py / telegram_parser's 'audio'
+view.
+"""
+
+import argparse
+import json
+import re
+
+from record_store import save_messages
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _ChunkReader:
+    """Character buffer over a text file that refills on demand"""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read one more chunk, dropping what was already consumed"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self):
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self.fill():
+                return
+
+    def peek(self):
+        """Next non-whitespace character, or '' at end of file"""
+        self.skip_whitespace()
+        return self.buffer[self.pos] if self.pos < len(self.buffer) else ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of the current chunk")
+        self.pos += 1
+
+    def decode_value(self):
+        """Decode the next complete JSON value, reading more as needed"""
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number can be cut at the chunk boundary and still decode
+            if end == len(self.buffer) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_export(json_file, chunk_size=CHUNK_SIZE, header=None):
+    """Yield the raw message objects of a single-chat result.json.
+
+    Top-level keys before "messages" (name, type, id) are small and are
+    collected into ``header`` if a dict is passed.
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        reader = _ChunkReader(f, chunk_size)
+        reader.expect('{')
+
+        while reader.peek() != '}':
+            key = reader.decode_value()
+            reader.expect(':')
+
+            if key != 'messages':
+                value = reader.decode_value()
+                if header is not None:
+                    header[key] = value
+            else:
+                reader.expect('[')
+                while reader.peek() != ']':
+                    yield reader.decode_value()
+                    if reader.peek() == ',':
+                        reader.pos += 1
+                reader.expect(']')
+
+            if reader.peek() == ',':
+                reader.pos += 1
+
+
+def flatten_text(text):
+    """Message text as the HTML export's get_text(strip=True) would give it.
+
+    ``text`` is a string or a list of strings and {type, text} entities.
+    Every entity (and every line, since lines are separated by <br> in the
+    HTML) becomes its own text node there, each of which is stripped.
+    """
+    if isinstance(text, str):
+        pieces = [text]
+    else:
+        pieces = [piece if isinstance(piece, str) else piece.get('text', '') for piece in text]
+
+    parts = []
+    for piece in pieces:
+        for line in piece.split('\n'):
+            line = line.strip()
+            if line:
+                parts.append(line)
+    return ''.join(parts)
+
+
+def format_duration(seconds):
+    """Seconds as the HTML export shows durations: MM:SS or H:MM:SS"""
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def audio_lecture_record(message, media_duration=False):
+    """Record for one message with an AUDIO-* attachment, or None.
+
+    By default clip_length follows parse_feb26_messages.py (the
+    "مدة الصوتية" line of the caption). With ``media_duration`` the exact
+    duration_seconds of the file is used when the caption has none.
+    """
+    if message.get('type') != 'message':
+        return None
+
+    filename = message.get('file', '')
+    # Only process AUDIO-* files (actual lectures)
+    if 'AUDIO-' not in filename:
+        return None
+
+    message_text = flatten_text(message.get('text_entities', message.get('text', '')))
+
+    # "2026-01-18T01:52:53" -> "18/01/2026"
+    greg_date = 'N/A'
+    date_match = re.match(r'(\d{4})-(\d{2})-(\d{2})', message.get('date', ''))
+    if date_match:
+        year, month, day = date_match.groups()
+        greg_date = f"{day}/{month}/{year}"
+
+    # Pattern: "مدة الصوتية: XX:XX دقيقة"
+    clip_length = 'N/A'
+    if message_text:
+        duration_match = re.search(r'مدة الصوتية:\s*(\d{1,2}:\d{2})\s*دقيقة', message_text)
+        if duration_match:
+            clip_length = duration_match.group(1)
+    if clip_length == 'N/A' and media_duration and 'duration_seconds' in message:
+        clip_length = format_duration(message['duration_seconds'])
+
+    return {
+        'filename': filename.split('/')[-1],  # Just the filename
+        'message_text': message_text,
+        'clip_length': clip_length,
+        'greg_date': greg_date
+    }
+
+
+def iter_audio_messages(json_file, media_duration=False, stats=None):
+    """Stream the audio lecture records of a result.json export.
+
+    If a dict is passed as ``stats`` it receives the number of messages
+    read ('messages'), records produced ('audio'), the highest message id
+    ('last_id') and the export header ('header').
+    """
+    if stats is None:
+        stats = {}
+    stats['messages'] = 0
+    stats['audio'] = 0
+    stats['last_id'] = None
+    stats['header'] = {}
+
+    for message in iter_export(json_file, header=stats['header']):
+        stats['messages'] += 1
+        message_id = message.get('id')
+        if isinstance(message_id, int) and (stats['last_id'] is None or message_id > stats['last_id']):
+            stats['last_id'] = message_id
+
+        record = audio_lecture_record(message, media_duration)
+        if record is not None:
+            stats['audio'] += 1
+            yield record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse a Telegram result.json export to the parsed-messages JSON")
+    parser.add_argument('input', help="result.json")
+    parser.add_argument('output', help="output JSON file (or .tgrec record store)")
+    parser.add_argument('--media-duration', action='store_true',
+                        help="fill clip_length from the file's exact duration when the caption has none")
+    args = parser.parse_args()
+
+    stats = {}
+    messages = list(iter_audio_messages(args.input, args.media_duration, stats))
+
+    save_messages(messages, args.output)
+
+    print(f"Channel: {stats['header'].get('name', 'Unknown')}")
+    print(f"Found {stats['messages']} total messages")
+    print(f"Extracted {stats['audio']} audio messages")
+    print(f"✅ Saved {len(messages)} messages to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
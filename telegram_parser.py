@@ -0,0 +1,670 @@
+#!/usr/bin/env python3
+"""
+Streaming parser for Telegram Desktop HTML exports.
+
+Instead of loading the whole export into a BeautifulSoup tree, the file is
+walked with lxml's iterparse and every <div class="message"> is handed out
+as soon as it is closed, then cleared. Memory stays bounded by the size of
+a single message no matter how many years of channel history the export
+holds.
+"""
+
+import argparse
+import heapq
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from lxml import etree
+
+from arabic_text import to_ascii_digits
+from media_probe import files_dir_of, fill_clip_lengths
+from record_store import save_messages
+
+
+def has_class(elem, class_name):
+    """Match an element's class like BeautifulSoup's class_ argument does.
+
+    A single class name matches any element carrying that class; a value
+    with spaces (e.g. 'pull_right date details') must equal the whole
+    class attribute.
+    """
+    classes = elem.get('class')
+    if not classes:
+        return False
+    if ' ' in class_name:
+        return classes == class_name
+    return class_name in classes.split()
+
+
+def find_first(elem, tag, class_name):
+    """Return the first descendant <tag> with the given class, or None"""
+    for child in elem.iterdescendants(tag):
+        if has_class(child, class_name):
+            return child
+    return None
+
+
+def find_all(elem, tag, class_name):
+    """Return all descendants <tag> with the given class"""
+    return [child for child in elem.iterdescendants(tag) if has_class(child, class_name)]
+
+
+def get_text(elem, separator=''):
+    """Equivalent of BeautifulSoup's get_text(separator, strip=True)"""
+    parts = (s.strip() for s in elem.itertext())
+    return separator.join(s for s in parts if s)
+
+
+def _release(elem):
+    """Free a processed message and the already-processed siblings before it"""
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def iter_message_divs(html_file):
+    """Yield every div.message of an export, one at a time.
+
+    Each element is cleared (together with the already-processed siblings
+    before it) once the caller moves on, so the partially built tree never
+    grows beyond the message currently being read.
+    """
+    context = etree.iterparse(html_file, events=('end',), tag='div',
+                              html=True, encoding='utf-8')
+    for _, elem in context:
+        if not has_class(elem, 'message'):
+            continue
+
+        yield elem
+        _release(elem)
+
+    del context
+
+
+def iter_message_divs_in_range(html_file, start, end, chunk_size=1 << 16):
+    """Yield the div.message elements of the byte range [start, end).
+
+    The file is memory-mapped and the range is fed to an HTML pull parser
+    chunk by chunk, so a worker never copies more than one chunk of its
+    shard. The range must start at a message boundary (see shard_offsets).
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag='div', encoding='utf-8')
+    with open(html_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for pos in range(start, end, chunk_size):
+            parser.feed(mm[pos:min(pos + chunk_size, end)])
+            for _, elem in parser.read_events():
+                if has_class(elem, 'message'):
+                    yield elem
+                    _release(elem)
+
+    parser.close()
+    for _, elem in parser.read_events():
+        if has_class(elem, 'message'):
+            yield elem
+            _release(elem)
+
+
+MESSAGE_START = b'<div class="message'
+
+
+def shard_offsets(html_file, shards):
+    """Split an export into at most ``shards`` byte ranges that each start
+    at a <div class="message boundary. Returns [(start, end), ...]."""
+    with open(html_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        first = mm.find(MESSAGE_START)
+        if first == -1:
+            return []
+
+        starts = [first]
+        for i in range(1, shards):
+            boundary = mm.find(MESSAGE_START, max(first, size * i // shards))
+            if boundary == -1:
+                break
+            if boundary > starts[-1]:
+                starts.append(boundary)
+
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def message_id_of(msg_div):
+    """Telegram message id from the div's id="message6209" attribute.
+
+    Date separators carry negative ids ("message-18") that are not real
+    message ids, so they (like divs without an id) give None.
+    """
+    match = re.match(r'message(\d+)$', msg_div.get('id', ''))
+    return int(match.group(1)) if match else None
+
+
+def read_channel_name(html_file):
+    """Channel title from the export's page header (read without parsing
+    any messages), or None"""
+    context = etree.iterparse(html_file, events=('end',), tag='div',
+                              html=True, encoding='utf-8')
+    for _, elem in context:
+        if has_class(elem, 'message'):
+            break
+        if has_class(elem, 'text bold'):
+            return get_text(elem) or None
+    return None
+
+
+def first_message_id(html_file):
+    """Id of the first message in an export part, or None"""
+    for msg_div in iter_message_divs(html_file):
+        message_id = message_id_of(msg_div)
+        if message_id is not None:
+            return message_id
+    return None
+
+
+# Hijri months mapping
+HIJRI_MONTHS = {
+    'محرم': 1, 'صفر': 2, 'ربيع الأول': 3, 'ربيع الآخر': 4,
+    'جمادى الأولى': 5, 'جمادى الآخرة': 6, 'رجب': 7, 'شعبان': 8,
+    'رمضان': 9, 'شوال': 10, 'ذو القعدة': 11, 'ذو الحجة': 12
+}
+
+
+def extract_hijri_date(text):
+    """Extract Hijri date from text like '١ رمضان ١٤٤٣هـ'"""
+    if not text:
+        return None, None
+
+    # Pattern: day month year
+    # e.g., "١ رمضان ١٤٤٣هـ" or "٢٥ رمضان ١٤٤٣"
+    pattern = r'([\d\u0660-\u0669]+)\s+([\u0600-\u06FF\s]+?)\s+([\d\u0660-\u0669]+)\s*هـ?'
+    match = re.search(pattern, text)
+
+    if match:
+        day_ar = match.group(1).strip()
+        month_name = match.group(2).strip()
+        year_ar = match.group(3).strip()
+
+        # Convert Arabic numerals to English
+        day = int(to_ascii_digits(day_ar))
+        year = int(to_ascii_digits(year_ar))
+
+        # Find month number
+        month = None
+        for month_arabic, month_num in HIJRI_MONTHS.items():
+            if month_arabic in month_name:
+                month = month_num
+                break
+
+        if month:
+            return f"{day_ar} {month_name} {year_ar}هـ", (day, month, year)
+
+    return None, None
+
+
+# Elements collected during the single walk over a message:
+# name -> (tag, class) with BeautifulSoup class_ semantics (see has_class)
+LOCATORS = {
+    'audio_links': ('a', 'media_audio_file'),
+    'audio_blocks': ('div', 'media_audio_file'),
+    'text': ('div', 'text'),
+    'date': ('div', 'pull_right date details'),
+    'any_date': ('div', 'date'),
+    'duration': ('div', 'duration details'),
+}
+
+# Field name -> function(MessageFields) returning the field value
+FIELD_EXTRACTORS = {}
+
+
+def field(name):
+    """Register a field extractor under the given name"""
+    def register(func):
+        FIELD_EXTRACTORS[name] = func
+        return func
+    return register
+
+
+class MessageFields:
+    """Lazily evaluated fields of one div.message.
+
+    The message subtree is walked exactly once, bucketing the elements
+    listed in LOCATORS; every field is then computed on first access from
+    those buckets and memoized, so asking several views for the same
+    field costs nothing extra.
+    """
+
+    def __init__(self, msg_div):
+        self.elem = msg_div
+        self.found = {name: [] for name in LOCATORS}
+        for child in msg_div.iterdescendants():
+            if not isinstance(child.tag, str) or not child.get('class'):
+                continue
+            for name, (tag, class_name) in LOCATORS.items():
+                if child.tag == tag and has_class(child, class_name):
+                    self.found[name].append(child)
+        self._values = {}
+
+    def first(self, name):
+        """First located element for the locator, or None"""
+        elems = self.found[name]
+        return elems[0] if elems else None
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            self._values[name] = FIELD_EXTRACTORS[name](self)
+        return self._values[name]
+
+
+@field('message_id')
+def _message_id(fields):
+    return message_id_of(fields.elem)
+
+
+@field('is_service')
+def _is_service(fields):
+    return has_class(fields.elem, 'service')
+
+
+@field('audio_files')
+def _audio_files(fields):
+    """href and 'status details' text of every a.media_audio_file"""
+    files = []
+    for audio_tag in fields.found['audio_links']:
+        status_div = find_first(audio_tag, 'div', 'status details')
+        files.append({
+            'href': audio_tag.get('href', ''),
+            'status': get_text(status_div) if status_div is not None else None,
+        })
+    return files
+
+
+@field('audio_title')
+def _audio_title(fields):
+    """Title of the first div.media_audio_file (exports without files)"""
+    media_div = fields.first('audio_blocks')
+    if media_div is None:
+        return None
+    title_div = find_first(media_div, 'div', 'title')
+    return get_text(title_div) if title_div is not None else None
+
+
+@field('audio_status')
+def _audio_status(fields):
+    """Status line ("14:56, 7.0 MB") of the first div.media_audio_file"""
+    media_div = fields.first('audio_blocks')
+    if media_div is None:
+        return None
+    status_div = find_first(media_div, 'div', 'status')
+    return get_text(status_div) if status_div is not None else None
+
+
+@field('date_title')
+def _date_title(fields):
+    date_div = fields.first('date')
+    return date_div.get('title', '') if date_div is not None else ''
+
+
+@field('any_date_title')
+def _any_date_title(fields):
+    """title of the first div carrying the 'date' class, if it has one"""
+    date_div = fields.first('any_date')
+    return date_div.get('title') if date_div is not None else None
+
+
+@field('duration')
+def _duration(fields):
+    duration_div = fields.first('duration')
+    return get_text(duration_div) if duration_div is not None else None
+
+
+@field('has_text')
+def _has_text(fields):
+    return fields.first('text') is not None
+
+
+@field('text')
+def _text(fields):
+    text_div = fields.first('text')
+    return get_text(text_div) if text_div is not None else ''
+
+
+@field('text_lines')
+def _text_lines(fields):
+    text_div = fields.first('text')
+    return get_text(text_div, separator='\n') if text_div is not None else ''
+
+
+@field('hashtags')
+def _hashtags(fields):
+    return re.findall(r'#(\w+)', fields['text'])
+
+
+@field('hijri_date')
+def _hijri_date(fields):
+    """(display text, (day, month, year)) or (None, None)"""
+    return extract_hijri_date(fields['text'])
+
+
+def audio_lecture_records(fields):
+    """{filename, message_text, clip_length, greg_date} records, one per
+    AUDIO-* attachment (parse_feb26_messages.py schema)"""
+    records = []
+
+    for audio in fields['audio_files']:
+        filename = audio['href']
+
+        # Only process AUDIO-* files (actual lectures)
+        if 'AUDIO-' not in filename:
+            continue
+
+        message_text = fields['text']
+        date_title = fields['date_title']
+
+        # Extract Gregorian date from title (format: "DD.MM.YYYY HH:MM:SS UTC+03:00")
+        greg_date = 'N/A'
+        if date_title:
+            date_match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', date_title)
+            if date_match:
+                day, month, year = date_match.groups()
+                greg_date = f"{day}/{month}/{year}"
+
+        # Extract clip length
+        clip_length = 'N/A'
+        if fields['duration'] is not None:
+            clip_length = fields['duration']
+
+        # If not in HTML duration div, try to extract from message text
+        # Pattern: "مدة الصوتية: XX:XX دقيقة"
+        if clip_length == 'N/A' and message_text:
+            duration_match = re.search(r'مدة الصوتية:\s*(\d{1,2}:\d{2})\s*دقيقة', message_text)
+            if duration_match:
+                clip_length = duration_match.group(1)
+
+        records.append({
+            'filename': filename.split('/')[-1],  # Just the filename
+            'message_text': message_text,
+            'clip_length': clip_length,
+            'greg_date': greg_date
+        })
+
+    return records
+
+
+def text_message_records(fields, min_length=0):
+    """One record per non-service message with text, in the schema of
+    extract_lectures.py / extract_direct.py (messages_parsed.json)"""
+    # Skip service messages (date separators) and messages without text
+    if fields['is_service'] or not fields['has_text']:
+        return []
+
+    message_text = fields['text_lines']
+
+    # Skip if message is too short or doesn't contain meaningful content
+    if len(message_text) < min_length:
+        return []
+
+    # Extract audio file info
+    audio_file = "Not Available"
+    clip_length = "Not Available"
+
+    if fields['audio_title'] is not None:
+        audio_file = fields['audio_title']
+
+    if fields['audio_status'] is not None:
+        # Extract duration (format: "14:56, 7.0 MB")
+        duration_match = re.match(r'(\d+:\d+)', fields['audio_status'])
+        if duration_match:
+            clip_length = duration_match.group(1)
+
+    # Extract date (format: "03.10.2025 12:25:20 UTC+03:00")
+    greg_date = "Not Available"
+    if fields['any_date_title'] is not None:
+        greg_date = fields['any_date_title'].split()[0]  # Get just the date part
+
+    return [{
+        'filename': audio_file,
+        'message_text': message_text,
+        'clip_length': clip_length,
+        'greg_date': greg_date
+    }]
+
+
+# Built-in views: name -> function(MessageFields) returning a list of records
+VIEWS = {
+    'audio': audio_lecture_records,
+    'text': text_message_records,
+    'direct': partial(text_message_records, min_length=50),
+}
+
+
+def parse_export(html_file, views, stats=None):
+    """Run several views over one export in a single pass.
+
+    ``views`` maps an output name to a function taking MessageFields and
+    returning a list of records (see VIEWS). Returns {name: [records]}.
+    If a dict is passed as ``stats`` it receives the number of message
+    divs seen under 'messages'.
+    """
+    if stats is None:
+        stats = {}
+    stats['messages'] = 0
+
+    results = {name: [] for name in views}
+    for msg_div in iter_message_divs(html_file):
+        stats['messages'] += 1
+        fields = MessageFields(msg_div)
+        for name, view in views.items():
+            results[name].extend(view(fields))
+
+    return results
+
+
+def _track_high_water(stats, fields):
+    """Record the highest message id (and its date title) seen so far"""
+    message_id = fields['message_id']
+    if message_id is not None and (stats['last_id'] is None or message_id > stats['last_id']):
+        stats['last_id'] = message_id
+        stats['last_date'] = fields['date_title'] or stats['last_date']
+
+
+def iter_records(html_file, view, stats=None, since_id=None):
+    """Stream the records one view produces, one message at a time.
+
+    Messages whose id is at or below ``since_id`` (a high-water mark from
+    an earlier run) are skipped before any of their fields are read.
+
+    If a dict is passed as ``stats`` it is filled with the number of
+    message divs seen ('messages'), skipped ('skipped') and of records
+    produced ('records'), plus the highest message id and its date title
+    ('last_id', 'last_date').
+    """
+    if stats is None:
+        stats = {}
+    stats['messages'] = 0
+    stats['skipped'] = 0
+    stats['records'] = 0
+    stats.setdefault('last_id', since_id)
+    stats.setdefault('last_date', None)
+
+    for msg_div in iter_message_divs(html_file):
+        stats['messages'] += 1
+        if since_id is not None:
+            message_id = message_id_of(msg_div)
+            if message_id is not None and message_id <= since_id:
+                stats['skipped'] += 1
+                continue
+
+        fields = MessageFields(msg_div)
+        _track_high_water(stats, fields)
+        for record in view(fields):
+            stats['records'] += 1
+            yield record
+
+
+def iter_audio_messages(html_file, stats=None):
+    """Stream the audio lecture records of an export one at a time.
+
+    If a dict is passed as ``stats`` it is filled with the number of
+    message divs seen ('messages') and of records produced ('audio').
+    """
+    if stats is None:
+        stats = {}
+    for record in iter_records(html_file, audio_lecture_records, stats):
+        yield record
+    stats['audio'] = stats['records']
+
+
+def find_export_parts(export_dir):
+    """Return the parts of a split export (messages.html, messages2.html,
+    ..., messagesN.html) in export order"""
+    parts = []
+    for name in os.listdir(export_dir):
+        match = re.fullmatch(r'messages(\d*)\.html', name)
+        if match:
+            parts.append((int(match.group(1) or 1), os.path.join(export_dir, name)))
+    return [path for _, path in sorted(parts)]
+
+
+def _collect(msg_divs, view, since_id=None):
+    """(message_id, record) pairs produced by a view over message divs,
+    plus high-water mark stats.
+
+    ``view`` is a VIEWS name or a picklable view function. Messages
+    without an id inherit the previous one so they keep their position
+    when results are merged.
+    """
+    view = VIEWS.get(view, view)
+    stats = {'last_id': since_id, 'last_date': None}
+    pairs = []
+    last_id = -1
+    for msg_div in msg_divs:
+        message_id = message_id_of(msg_div)
+        if message_id is None:
+            message_id = last_id
+        last_id = message_id
+        if since_id is not None and message_id <= since_id:
+            continue
+
+        fields = MessageFields(msg_div)
+        _track_high_water(stats, fields)
+        for record in view(fields):
+            pairs.append((message_id, record))
+    return pairs, stats
+
+
+def _parse_part(html_file, view, since_id=None):
+    """Worker: pairs and stats (see _collect) of one export part"""
+    return _collect(iter_message_divs(html_file), view, since_id)
+
+
+def _parse_range(html_file, start, end, view):
+    """Worker: pairs and stats (see _collect) of one byte range of a file"""
+    return _collect(iter_message_divs_in_range(html_file, start, end), view)
+
+
+def parse_export_sharded(html_file, view='audio', workers=None, shards=None):
+    """Parse one large export file in parallel.
+
+    The file is split at message boundaries into ``shards`` byte ranges
+    (default: one per worker, ``workers`` defaulting to the CPU count),
+    each range is parsed from the memory-mapped file by its own worker
+    process, and the results are stitched back in file order.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = shard_offsets(html_file, shards or workers)
+
+    if len(ranges) <= 1 or workers == 1:
+        results = [_parse_range(html_file, start, end, view) for start, end in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                _parse_range, [html_file] * len(ranges),
+                [start for start, _ in ranges], [end for _, end in ranges],
+                [view] * len(ranges)))
+
+    return [record for pairs, _ in results for _, record in pairs]
+
+
+def parse_export_dir(export_dir, view='audio', workers=None, since_id=None, stats=None):
+    """Parse every part of a split export concurrently and merge the
+    records in Telegram message order.
+
+    Each part is parsed in its own worker process (``workers`` defaults to
+    the number of CPUs). The merged list has the same schema as parsing a
+    single file with the same view. With ``since_id`` only messages above
+    that high-water mark are emitted, and parts that end below it (their
+    successor starts at or below since_id + 1) are not parsed at all.
+    ``stats`` receives 'parts', 'parts_skipped', 'last_id' and 'last_date'.
+    """
+    if stats is None:
+        stats = {}
+    parts = find_export_parts(export_dir)
+    if not parts:
+        raise FileNotFoundError(f"No messages*.html export parts in {export_dir}")
+    stats['parts'] = len(parts)
+
+    if since_id is not None:
+        first_ids = [first_message_id(part) for part in parts[1:]]
+        parts = [part for part, next_first in zip(parts, first_ids + [None])
+                 if next_first is None or next_first - 1 > since_id]
+    stats['parts_skipped'] = stats['parts'] - len(parts)
+
+    if len(parts) == 1 or workers == 1:
+        results = [_parse_part(part, view, since_id) for part in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_parse_part, parts, [view] * len(parts),
+                                        [since_id] * len(parts)))
+
+    stats['last_id'], stats['last_date'] = since_id, None
+    for _, part_stats in results:
+        if part_stats['last_id'] is not None and (
+                stats['last_id'] is None or part_stats['last_id'] > stats['last_id']):
+            stats['last_id'] = part_stats['last_id']
+            stats['last_date'] = part_stats['last_date']
+
+    merged = heapq.merge(*(pairs for pairs, _ in results), key=lambda pair: pair[0])
+    return [record for _, record in merged]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse a Telegram HTML export to JSON")
+    parser.add_argument('input', help="messages.html, or an export directory holding messages*.html parts")
+    parser.add_argument('output', help="output JSON file (or .tgrec record store)")
+    parser.add_argument('--view', choices=sorted(VIEWS), default='audio',
+                        help="record schema to produce (default: audio)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for a split export or --shards (default: all CPUs)")
+    parser.add_argument('--shards', type=int, default=None,
+                        help="parse a single file as this many byte ranges in parallel")
+    parser.add_argument('--probe-media', nargs='?', const='', default=None, metavar='FILES_DIR',
+                        help="fill missing clip lengths from the audio file headers "
+                             "(default directory: the export's files/)")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.input):
+        parts = find_export_parts(args.input)
+        print(f"Found {len(parts)} export parts in {args.input}")
+        messages = parse_export_dir(args.input, args.view, args.workers)
+    elif args.shards:
+        messages = parse_export_sharded(args.input, args.view, args.workers, args.shards)
+    else:
+        stats = {}
+        messages = list(iter_records(args.input, VIEWS[args.view], stats))
+        print(f"Found {stats['messages']} total messages")
+
+    if args.probe_media is not None:
+        first_part = find_export_parts(args.input)[0] if os.path.isdir(args.input) else args.input
+        filled = fill_clip_lengths(messages, args.probe_media or files_dir_of(first_part))
+        print(f"Read {filled} clip lengths from the audio file headers")
+
+    save_messages(messages, args.output)
+
+    print(f"✅ Saved {len(messages)} messages to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+from dedup_index import DedupIndex
+
+RECORD_A = {'message_text': 'الدرس الأول', 'filename': 'a.m4a', 'greg_date': '19.01.2026'}
+RECORD_B = {'message_text': 'الدرس الثاني', 'filename': 'b.m4a', 'greg_date': '20.01.2026'}
+
+
+def test_bloom_filter_rebuilt_after_run_without_it(tmp_path):
+    path = str(tmp_path / 'dedup.sqlite')
+
+    with DedupIndex(path, bloom_capacity=1000) as index:
+        assert index.filter_new([RECORD_A], 'first') == [RECORD_A]
+
+    # The saved Bloom filter does not see this key
+    with DedupIndex(path) as index:
+        assert index.filter_new([RECORD_B], 'second') == [RECORD_B]
+
+    with DedupIndex(path, bloom_capacity=1000) as index:
+        assert index.filter_new([RECORD_A, RECORD_B], 'third') == []
+        assert index.stats['duplicates'] == 2
+
+
+def test_bloom_filter_rebuilt_for_other_capacity(tmp_path):
+    path = str(tmp_path / 'dedup.sqlite')
+
+    with DedupIndex(path, bloom_capacity=10) as index:
+        index.register([RECORD_A])
+
+    with DedupIndex(path, bloom_capacity=100000) as index:
+        assert index.bloom.capacity == 100000
+        assert index.filter_new([RECORD_A]) == []
+
+
+def test_keys_rolled_back_on_error(tmp_path):
+    path = str(tmp_path / 'dedup.sqlite')
+
+    try:
+        with DedupIndex(path, bloom_capacity=1000) as index:
+            index.filter_new([RECORD_A], 'failed')
+            raise OSError("append failed")
+    except OSError:
+        pass
+
+    with DedupIndex(path, bloom_capacity=1000) as index:
+        assert index.filter_new([RECORD_A], 'retry') == [RECORD_A]
+
+
+def test_only_new_keys_counted_as_added(tmp_path):
+    path = str(tmp_path / 'dedup.sqlite')
+
+    with DedupIndex(path) as index:
+        index.register([RECORD_A])
+        assert index.stats['added'] == 1
+
+    # Seeding the same export again adds nothing
+    with DedupIndex(path) as index:
+        index.register([RECORD_A, RECORD_B])
+        assert index.stats['added'] == 1
+        assert len(index) == 2
@@ -0,0 +1,63 @@
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from hijri_calendar import (
+    FIRST_YEAR, LAST_YEAR, month_length, to_gregorian, to_gregorian_many, to_hijri, to_hijri_many,
+)
+
+# Umm al-Qura dates, as published (hijri-converter agrees)
+KNOWN_DATES = [
+    ((1350, 1, 1), date(1931, 5, 19)),
+    ((1370, 7, 15), date(1951, 4, 22)),
+    ((1400, 1, 1), date(1979, 11, 20)),
+    ((1420, 9, 29), date(2000, 1, 6)),
+    ((1445, 10, 1), date(2024, 4, 10)),
+    ((1447, 2, 5), date(2025, 7, 30)),
+    ((1447, 9, 1), date(2026, 2, 18)),
+    ((1480, 12, 29), date(2058, 6, 20)),
+    ((1500, 12, 30), date(2077, 11, 16)),
+]
+
+
+@pytest.mark.parametrize('hijri, gregorian', KNOWN_DATES)
+def test_known_dates(hijri, gregorian):
+    assert to_gregorian(*hijri) == gregorian
+    assert to_hijri(gregorian) == hijri
+
+
+def test_every_day_matches_hijri_converter():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', DeprecationWarning)
+        hijri_converter = pytest.importorskip('hijri_converter')
+
+    day = to_gregorian(FIRST_YEAR, 1, 1)
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        for month in range(1, 13):
+            reference = hijri_converter.Hijri(year, month, 1)
+            assert month_length(year, month) == reference.month_length(), (year, month)
+            assert to_gregorian(year, month, 1) == reference.to_gregorian(), (year, month)
+            for day_of_month in range(1, month_length(year, month) + 1):
+                assert to_hijri(day) == (year, month, day_of_month)
+                day += timedelta(days=1)
+
+
+def test_many_returns_none_for_invalid_dates():
+    assert to_gregorian_many([
+        (1447, 2, 5), ('1447', '2', '5'), None, (), ('a', 1, 1), (1447, 2), (1447, 13, 1), (1447, 2, 31),
+        (1349, 12, 29), (10 ** 20, 1, 1),
+    ]) == [date(2025, 7, 30), date(2025, 7, 30), None, None, None, None, None, None, None, None]
+    assert to_hijri_many([date(2025, 7, 30), None, date(1900, 1, 1)]) == [(1447, 2, 5), None, None]
+
+
+def test_many_matches_single_conversions():
+    hijri_dates = [hijri for hijri, _ in KNOWN_DATES]
+    gregorian_dates = [gregorian for _, gregorian in KNOWN_DATES]
+
+    assert to_gregorian_many(hijri_dates) == gregorian_dates
+    assert to_gregorian_many(np.array(hijri_dates)) == gregorian_dates
+    assert to_hijri_many(gregorian_dates) == hijri_dates
+    assert to_hijri_many([day.toordinal() for day in gregorian_dates]) == hijri_dates
+    assert to_gregorian_many([]) == to_hijri_many([]) == []
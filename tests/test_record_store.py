@@ -0,0 +1,36 @@
+from record_store import RecordStore, load_messages, save_messages
+
+MIXED_RECORDS = [
+    {'message_text': 'الدرس الأول', 'filename': 'a.m4a', 'extra': 5},
+    {'message_text': 'الدرس الثاني', 'filename': 'b.m4a'},
+    {'filename': 'c.m4a', 'extra': None},
+]
+
+
+def test_mixed_records_round_trip(tmp_path):
+    path = str(tmp_path / 'mixed.tgrec')
+    save_messages(MIXED_RECORDS, path)
+
+    with RecordStore(path) as store:
+        assert [dict(record) for record in store] == MIXED_RECORDS
+
+        # A key the record was written without is absent, not None
+        assert 'extra' not in store[1]
+        assert store[1].get('extra', 'default') == 'default'
+        assert 'extra' in store[2] and store[2]['extra'] is None
+        assert len(store[1]) == 2
+
+        # Derived columns follow their source column
+        assert store[0]['normalized_text']
+        assert 'normalized_text' not in store[2]
+
+
+def test_store_of_older_layout_falls_back_to_json(tmp_path):
+    json_path = str(tmp_path / 'mixed.json')
+    save_messages(MIXED_RECORDS, json_path)
+    with open(str(tmp_path / 'mixed.tgrec'), 'wb') as f:
+        f.write(b'TGREC001' + bytes(8))
+
+    records = load_messages(json_path)
+    assert [{key: value for key, value in record.items() if key != 'normalized_text'}
+            for record in records] == MIXED_RECORDS
@@ -0,0 +1,43 @@
+import pickle
+import shutil
+
+import pytest
+
+import series_catalog
+from series_catalog import CATALOG_FILE, load_catalog, snapshot_path_of
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    path = str(tmp_path / 'series_catalog.json')
+    shutil.copy(CATALOG_FILE, path)
+    yield path
+    series_catalog._loaded.pop(path, None)
+
+
+def load_fresh(catalog_file):
+    series_catalog._loaded.pop(catalog_file, None)
+    return load_catalog(catalog_file)
+
+
+@pytest.mark.parametrize('content', [b'\x80\x04K\x05.', b'not a pickle', b'',
+                                     pickle.dumps(['a', 'list'])])
+def test_unreadable_snapshot_is_recompiled(catalog_file, content):
+    expected = load_catalog(catalog_file, rebuild=True)
+    with open(snapshot_path_of(catalog_file), 'wb') as f:
+        f.write(content)
+
+    assert load_fresh(catalog_file).fingerprints == expected.fingerprints
+    with open(snapshot_path_of(catalog_file), 'rb') as f:
+        assert pickle.load(f)['version'] == series_catalog.SNAPSHOT_VERSION
+
+
+def test_snapshot_of_other_compiler_code_is_recompiled(catalog_file, monkeypatch):
+    load_catalog(catalog_file, rebuild=True)
+    with open(snapshot_path_of(catalog_file), 'rb') as f:
+        written = pickle.load(f)['source']
+
+    monkeypatch.setattr(series_catalog, 'COMPILER_MODULES', ['series_catalog'])
+    load_fresh(catalog_file)
+    with open(snapshot_path_of(catalog_file), 'rb') as f:
+        assert pickle.load(f)['source'] != written
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Character-trigram index for finding series names under spelling variants.
+
+Captions spell the same title in several ways ('تنبيه الانام' /
+'تنبيه الأنام', 'مافي' / 'ما في', underscores inside hashtags), which the
+exact patterns miss. A TrigramIndex finds every indexed name that occurs
+in a text with at most a few edits (insertions, deletions, substitutions):
+
+- names and texts are compared in their normalize_arabic() form, with
+  underscores read as spaces
+- every name trigram is posted in an inverted index; a name within k
+  edits of some substring keeps at least (trigrams - 3k) of its
+  trigrams, so only names sharing that many with the text are candidates
+- those trigrams also lie on diagonals (text position - name offset) at
+  most 2k apart, which locates the windows the name can occur in
+- candidates are verified with an edit-distance DP over that window only
+
+So a text costs one pass over its trigrams plus a few small DPs, instead
+of comparing it with every name.
+
+    index = TrigramIndex(max_distance=2)
+    index.add('تنبيه الأنام', 'تنبيه الانام على ما في كتاب سبل السلام')
+    index.best('... تنبيه الانام ...')     # -> (value, distance) or None
+"""
+
+from collections import defaultdict
+
+from arabic_text import normalize_arabic
+
+# A name may differ by one edit per this many characters (up to max_distance)
+CHARS_PER_EDIT = 6
+
+
+def match_form(text):
+    """normalize_arabic() form with underscores read as spaces"""
+    return normalize_arabic(text.replace('_', ' ')) if text else ''
+
+
+def trigrams(text):
+    """(trigram, position) of every trigram of text"""
+    return [(text[i:i + 3], i) for i in range(len(text) - 2)]
+
+
+def find_all(text, sub):
+    """Start positions of every occurrence of sub in text"""
+    positions = []
+    position = text.find(sub)
+    while position != -1:
+        positions.append(position)
+        position = text.find(sub, position + 1)
+    return positions
+
+
+def substring_distance(pattern, text, limit):
+    """Smallest edit distance between pattern and any substring of text,
+    or None when it exceeds limit (Myers' bit-parallel search: one column
+    of the DP per text character, as bit vectors over the pattern)"""
+    match_masks = {}
+    for i, char in enumerate(pattern):
+        match_masks[char] = match_masks.get(char, 0) | (1 << i)
+
+    mask = (1 << len(pattern)) - 1
+    last = 1 << (len(pattern) - 1)
+    plus, minus = mask, 0
+    score = best = len(pattern)
+    for char in text:
+        eq = match_masks.get(char, 0)
+        vertical = eq | minus
+        horizontal = (((eq & plus) + plus) ^ plus) | eq
+        horizontal_plus = minus | ~(horizontal | plus)
+        horizontal_minus = plus & horizontal
+        if horizontal_plus & last:
+            score += 1
+        elif horizontal_minus & last:
+            score -= 1
+            if score < best:
+                best = score
+        # A match may start anywhere: row 0 stays 0, so nothing is shifted in
+        horizontal_plus = (horizontal_plus << 1) & mask
+        horizontal_minus = (horizontal_minus << 1) & mask
+        plus = (horizontal_minus | ~(vertical | horizontal_plus)) & mask
+        minus = horizontal_plus & vertical
+    return best if best <= limit else None
+
+
+class TrigramIndex:
+    """Names (with the value each stands for) searchable by bounded edit distance"""
+
+    def __init__(self, max_distance=2):
+        self.max_distance = max_distance
+        self.names = []
+        self.values = []
+        self.limits = []
+        self.postings = defaultdict(list)
+
+    def add(self, name, value):
+        name = match_form(name)
+        if len(name) < 3:
+            return
+        name_id = len(self.names)
+        self.names.append(name)
+        self.values.append(value)
+        self.limits.append(min(self.max_distance, len(name) // CHARS_PER_EDIT))
+        # Keyed on character tuples, so a text's trigrams are one zip() away
+        for trigram, _ in trigrams(name):
+            self.postings[tuple(trigram)].append(name_id)
+
+    def search(self, text):
+        """[(distance, name, value)] of the names found in text, best first
+        (fewest edits, then longest name, then insertion order)"""
+        text = match_form(text)
+        shared = defaultdict(int)
+        for trigram in self.postings.keys() & zip(text, text[1:], text[2:]):
+            for name_id in self.postings[trigram]:
+                shared[name_id] += 1
+
+        found = []
+        for name_id, count in shared.items():
+            name = self.names[name_id]
+            limit = self.limits[name_id]
+            needed = len(name) - 2 - 3 * limit
+            if count < needed:
+                continue
+
+            if name in text:
+                found.append((0, -len(name), name_id))
+                continue
+            if limit == 0:
+                continue
+
+            # Text regions around windows of diagonals at most 2 * limit
+            # apart that hold enough hits; overlapping regions are merged
+            positions = {}
+            hits = []
+            for trigram, offset in trigrams(name):
+                if trigram not in positions:
+                    positions[trigram] = find_all(text, trigram)
+                hits.extend(position - offset for position in positions[trigram])
+            hits.sort()
+            regions = []
+            start = 0
+            for end in range(len(hits)):
+                while hits[end] - hits[start] > 2 * limit:
+                    start += 1
+                if end - start + 1 >= needed:
+                    low = max(0, hits[start] - limit)
+                    high = hits[end] + len(name) + limit
+                    if regions and low <= regions[-1][1]:
+                        regions[-1][1] = high
+                    else:
+                        regions.append([low, high])
+
+            distances = [substring_distance(name, text[low:high], limit) for low, high in regions]
+            distances = [distance for distance in distances if distance is not None]
+            if distances:
+                found.append((min(distances), -len(name), name_id))
+
+        found.sort()
+        return [(distance, self.names[name_id], self.values[name_id]) for distance, _, name_id in found]
+
+    def best(self, text):
+        """(value, distance) of the best name found in text, or None"""
+        found = self.search(text)
+        if not found:
+            return None
+        distance, _, value = found[0]
+        return value, distance